@@ -5,24 +5,127 @@ This package provides functions to log in, navigate the registration pages,
 and attempt to register for a predefined list of courses.
 """
 
-# Import functions from the module to make them directly accessible at the package level.
-from .sess_client import (
-    log_in,
-    navigate_to_registration_page,
-    get_available_courses,
-    handle_system_messages,
-    attempt_course_registration,
-    check_unavailable_course_reasons
-)
+import importlib
+
+# Where each public name lives. Submodules are imported the first time one of their
+# names is used (PEP 562), so `from automation import parse_course_plan` doesn't pay for
+# Selenium, urllib3 or the HTTP server: the GUI can paint, and the CLI start, before they load.
+_EXPORTS = {
+    'SESS_URL': 'portal',
+    'log_in': 'sess_client',
+    'navigate_to_registration_page': 'sess_client',
+    'get_available_courses': 'sess_client',
+    'handle_system_messages': 'sess_client',
+    'attempt_course_registration': 'sess_client',
+    'check_unavailable_course_reasons': 'sess_client',
+    'Outcome': 'messages',
+    'classify_message': 'messages',
+    'configure_message_patterns': 'messages',
+    'Course': 'plan',
+    'parse_course': 'plan',
+    'parse_course_plan': 'plan',
+    'SectionCatalog': 'catalog',
+    'read_catalog': 'catalog',
+    'TimetableGuard': 'timetable',
+    'parse_meeting_times': 'timetable',
+    'read_credit_budget': 'planner',
+    'choose_courses': 'planner',
+    'attempt_course_registration_http': 'http_engine',
+    'parse_opening_time': 'scheduler',
+    'wait_for_registration_window': 'scheduler',
+    'run_registration': 'workflow',
+    'SessionExpired': 'sess_client',
+    'SessionGuard': 'session_guard',
+    'register_in_parallel': 'parallel',
+    'WATCH_INTERVAL': 'watcher',
+    'watch_for_seats': 'watcher',
+    'DEFAULT_JOBS_REPORT': 'jobs',
+    'LOGIN_STAGGER': 'jobs',
+    'load_jobs': 'jobs',
+    'max_concurrent_browsers': 'jobs',
+    'run_jobs': 'jobs',
+    'DEFAULT_CONTROL_PORT': 'control_api',
+    'ControlServer': 'control_api',
+    'load_accounts': 'control_api',
+    'create_driver': 'driver_factory',
+    'DriverPrewarmer': 'driver_factory',
+    'DEFAULT_TRACE_FILE': 'tracing',
+    'span': 'tracing',
+    'start_tracing': 'tracing',
+    'stop_tracing': 'tracing',
+    'start_recording': 'recorder',
+    'stop_recording': 'recorder',
+    'RecyclableDriver': 'memory',
+    'launch_recyclable': 'memory',
+    'start_memory_governor': 'memory',
+    'stop_memory_governor': 'memory',
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    # Cache it, so later lookups don't come back here
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
 
 # Define the public API of the package. When a user writes `from automation import *`,
 # only the names listed in `__all__` will be imported. This also serves as
 # clear documentation for the package's intended interface.
 __all__ = [
+    'SESS_URL',
     'log_in',
     'navigate_to_registration_page',
     'get_available_courses',
     'handle_system_messages',
     'attempt_course_registration',
-    'check_unavailable_course_reasons'
+    'check_unavailable_course_reasons',
+    'attempt_course_registration_http',
+    'read_credit_budget',
+    'choose_courses',
+    'SectionCatalog',
+    'read_catalog',
+    'TimetableGuard',
+    'parse_meeting_times',
+    'Outcome',
+    'classify_message',
+    'configure_message_patterns',
+    'Course',
+    'parse_course',
+    'parse_course_plan',
+    'parse_opening_time',
+    'wait_for_registration_window',
+    'run_registration',
+    'SessionExpired',
+    'SessionGuard',
+    'register_in_parallel',
+    'WATCH_INTERVAL',
+    'watch_for_seats',
+    'DEFAULT_JOBS_REPORT',
+    'LOGIN_STAGGER',
+    'load_jobs',
+    'max_concurrent_browsers',
+    'run_jobs',
+    'DEFAULT_CONTROL_PORT',
+    'ControlServer',
+    'load_accounts',
+    'create_driver',
+    'DriverPrewarmer',
+    'DEFAULT_TRACE_FILE',
+    'span',
+    'start_tracing',
+    'stop_tracing',
+    'start_recording',
+    'stop_recording',
+    'RecyclableDriver',
+    'launch_recyclable',
+    'start_memory_governor',
+    'stop_memory_governor'
 ]
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""
+An asyncio variant of the automation API, driving Chrome over the DevTools protocol.
+
+    async with await Browser.launch(headless=True) as browser:
+        page = await browser.new_page()
+        await log_in(page, username, password)
+        await navigate_to_registration_page(page)
+        available, unavailable = await get_available_courses(page, courses)
+        await attempt_course_registration(page, available, semester)
+
+`run_sessions` registers several accounts from one event loop. The WebDriver
+functions in `automation` stay the main path; both run the same page scripts,
+message patterns, section catalog and round logic.
+"""
+
+from .cdp import Browser, CDPError, Page
+from .flow import (
+    attempt_course_registration,
+    check_unavailable_course_reasons,
+    get_available_courses,
+    log_in,
+    navigate_to_registration_page,
+    read_registration_catalog,
+    run_registration,
+    run_sessions
+)
+
+__all__ = [
+    'Browser',
+    'CDPError',
+    'Page',
+    'log_in',
+    'navigate_to_registration_page',
+    'read_registration_catalog',
+    'get_available_courses',
+    'attempt_course_registration',
+    'check_unavailable_course_reasons',
+    'run_registration',
+    'run_sessions'
+]
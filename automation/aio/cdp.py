@@ -0,0 +1,336 @@
+"""
+Chrome DevTools Protocol over asyncio.
+
+`Connection` multiplexes commands and events over one WebSocket: every command
+gets a future resolved by its reply, and events are delivered to subscribers
+(or to one-shot waiters) as they arrive, so nothing is polled. `Browser`
+launches Chrome (or attaches to one started by Selenium) and opens `Page`s,
+each in its own browser context when cookies must not be shared. A `Page` runs
+the same page scripts as the WebDriver path: `call` for `execute_script`-style
+scripts and `call_async` for `execute_async_script`-style ones.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import shutil
+import tempfile
+from urllib.request import urlopen
+
+from ..driver_factory import BLOCKED_URL_PATTERNS, LEAN_CHROME_ARGS
+from .websocket import ConnectionClosed, WebSocket
+
+# Chrome executables tried in order, unless CHROME_BINARY names one
+CHROME_NAMES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+# Seconds to wait for a launched Chrome to print its DevTools address
+LAUNCH_TIMEOUT = 30
+
+# Wraps a script written for execute_script (a function body using `return` and `arguments`)
+_CALL_WRAPPER = "(function () {{\n{script}\n}}).apply(null, {args})"
+# ... and one written for execute_async_script (the last argument is the callback)
+_CALL_ASYNC_WRAPPER = ("new Promise(function (resolve) {{ (function () {{\n{script}\n}})"
+                       ".apply(null, {args}.concat([resolve])); }})")
+
+# Resolves once an element matches (and, with `visible`, is rendered), watching DOM mutations; null on timeout
+_WAIT_FOR_SELECTOR_JS = r"""
+var done = arguments[arguments.length - 1];
+var selector = arguments[0], visible = arguments[1], timeout = arguments[2];
+var observer = null, timer = null;
+function found() {
+  var el = document.querySelector(selector);
+  return el && (!visible || el.offsetParent !== null) ? el : null;
+}
+function finish(result) {
+  if (observer) { observer.disconnect(); }
+  clearTimeout(timer);
+  done(result);
+}
+if (found()) { done(true); return; }
+observer = new MutationObserver(function () { if (found()) { finish(true); } });
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+timer = setTimeout(function () { finish(null); }, timeout * 1000);
+"""
+
+# Scrolls the element into view and returns its center, or null if it isn't on the page
+_CENTER_JS = r"""
+var el = typeof arguments[0] === 'string' ? document.querySelector(arguments[0]) : null;
+if (!el) { return null; }
+el.scrollIntoView({block: 'center', inline: 'center'});
+var rect = el.getBoundingClientRect();
+return [rect.left + rect.width / 2, rect.top + rect.height / 2];
+"""
+
+
+class CDPError(Exception):
+    """A DevTools command failed, or a page script threw."""
+
+
+class Connection:
+    """One DevTools WebSocket: commands with replies, and events fanned out to subscribers."""
+
+    def __init__(self, socket):
+        self.socket = socket
+        self._ids = itertools.count(1)
+        self._replies = {}
+        # (session id, method) -> list of callbacks
+        self._listeners = {}
+        self._reader = asyncio.get_running_loop().create_task(self._read())
+
+    @classmethod
+    async def connect(cls, url):
+        return cls(await WebSocket.connect(url))
+
+    async def _read(self):
+        try:
+            while True:
+                message = json.loads(await self.socket.recv())
+                if "id" in message:
+                    future = self._replies.pop(message["id"], None)
+                    if future is not None and not future.done():
+                        if "error" in message:
+                            future.set_exception(CDPError(message["error"].get("message", "unknown error")))
+                        else:
+                            future.set_result(message.get("result", {}))
+                    continue
+                key = (message.get("sessionId"), message.get("method"))
+                for callback in list(self._listeners.get(key, ())):
+                    callback(message.get("params", {}))
+        except ConnectionClosed as e:
+            error = e
+        except Exception as e:
+            logging.error(f"⚠️ DevTools connection failed: {e}")
+            error = ConnectionClosed(str(e))
+        for future in self._replies.values():
+            if not future.done():
+                future.set_exception(error)
+        self._replies.clear()
+
+    async def send(self, method, params=None, session_id=None):
+        """ Sends a command and returns its result. """
+        command_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._replies[command_id] = future
+        message = {"id": command_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        await self.socket.send(json.dumps(message))
+        return await future
+
+    def on(self, method, callback, session_id=None):
+        """ Calls `callback(params)` for every `method` event. Returns a function that unsubscribes. """
+        callbacks = self._listeners.setdefault((session_id, method), [])
+        callbacks.append(callback)
+
+        def unsubscribe():
+            if callback in callbacks:
+                callbacks.remove(callback)
+        return unsubscribe
+
+    def wait_for(self, method, predicate=None, session_id=None):
+        """ Returns a future resolved with the params of the next `method` event matching `predicate`. """
+        future = asyncio.get_running_loop().create_future()
+
+        def deliver(params):
+            if not future.done() and (predicate is None or predicate(params)):
+                future.set_result(params)
+                unsubscribe()
+
+        unsubscribe = self.on(method, deliver, session_id)
+        future.add_done_callback(lambda _: unsubscribe())
+        return future
+
+    async def close(self):
+        self._reader.cancel()
+        await self.socket.close()
+
+
+class Page:
+    """One tab, attached over a flattened DevTools session."""
+
+    def __init__(self, connection, session_id, target_id, context_id=None):
+        self.connection = connection
+        self.session_id = session_id
+        self.target_id = target_id
+        self.context_id = context_id
+        self.frame_id = None
+        self.url = None
+        # Status of the last document or XHR/fetch response, e.g. to spot a 401 from an expired session
+        self.last_status = None
+        self.on("Page.frameNavigated", self._navigated)
+        self.on("Network.responseReceived", self._responded)
+
+    def _navigated(self, params):
+        frame = params["frame"]
+        if not frame.get("parentId"):
+            self.frame_id = frame["id"]
+            self.url = frame.get("url")
+
+    def _responded(self, params):
+        if params.get("type") in ("Document", "XHR", "Fetch"):
+            self.last_status = params["response"].get("status")
+
+    def send(self, method, params=None):
+        return self.connection.send(method, params, self.session_id)
+
+    def on(self, method, callback):
+        return self.connection.on(method, callback, self.session_id)
+
+    def wait_for_event(self, method, predicate=None):
+        return self.connection.wait_for(method, predicate, self.session_id)
+
+    async def enable(self, block_urls=True):
+        await asyncio.gather(self.send("Page.enable"), self.send("Runtime.enable"), self.send("Network.enable"))
+        if block_urls:
+            await self.send("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+    def navigation(self):
+        """ A future resolved when the next document's DOM is ready (like the `eager` page load strategy). """
+        return self.wait_for_event("Page.domContentEventFired")
+
+    async def goto(self, url, timeout=30):
+        loaded = self.navigation()
+        result = await self.send("Page.navigate", {"url": url})
+        if result.get("errorText"):
+            loaded.cancel()
+            raise CDPError(f"Navigating to {url} failed: {result['errorText']}")
+        await asyncio.wait_for(loaded, timeout)
+
+    async def evaluate(self, expression):
+        result = await self.send("Runtime.evaluate", {"expression": expression, "returnByValue": True,
+                                                      "awaitPromise": True})
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise CDPError(details.get("exception", {}).get("description") or details.get("text", "script error"))
+        return result["result"].get("value")
+
+    def call(self, script, *args):
+        """ Runs a script written for WebDriver's execute_script and returns its result. """
+        return self.evaluate(_CALL_WRAPPER.format(script=script, args=json.dumps(list(args))))
+
+    def call_async(self, script, *args):
+        """ Runs a script written for WebDriver's execute_async_script and returns what it passes to its callback. """
+        return self.evaluate(_CALL_ASYNC_WRAPPER.format(script=script, args=json.dumps(list(args))))
+
+    async def wait_for_selector(self, selector, timeout=5, visible=False):
+        """ Returns True once an element matches `selector`, False on timeout. Waits on DOM mutations. """
+        return bool(await self.call_async(_WAIT_FOR_SELECTOR_JS, selector, visible, timeout))
+
+    async def click(self, selector):
+        """ Clicks the element's center with real mouse events, like WebDriver's click. """
+        center = await self.call(_CENTER_JS, selector)
+        if center is None:
+            raise CDPError(f"No element matches {selector}")
+        x, y = center
+        for event in ("mousePressed", "mouseReleased"):
+            await self.send("Input.dispatchMouseEvent", {"type": event, "x": x, "y": y, "button": "left",
+                                                         "clickCount": 1})
+
+    async def type(self, selector, text):
+        await self.call("document.querySelector(arguments[0]).focus();", selector)
+        await self.send("Input.insertText", {"text": text})
+
+    async def close(self):
+        await self.connection.send("Target.closeTarget", {"targetId": self.target_id})
+        if self.context_id:
+            await self.connection.send("Target.disposeBrowserContext", {"browserContextId": self.context_id})
+
+
+def find_chrome():
+    """ The Chrome executable: CHROME_BINARY, else the first of CHROME_NAMES on the PATH. """
+    if os.getenv("CHROME_BINARY"):
+        return os.getenv("CHROME_BINARY")
+    for name in CHROME_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise FileNotFoundError("Chrome not found; set CHROME_BINARY to its path.")
+
+
+class Browser:
+    """A Chrome instance driven over one DevTools connection."""
+
+    def __init__(self, connection, process=None, profile_dir=None):
+        self.connection = connection
+        self.process = process
+        self.profile_dir = profile_dir
+        self._stderr_task = None
+
+    @classmethod
+    async def launch(cls, headless=True, executable=None):
+        """ Starts Chrome with the lean flags (see automation.driver_factory) and connects to it. """
+        profile_dir = tempfile.mkdtemp(prefix="sess-cdp-")
+        args = [executable or find_chrome(), "--remote-debugging-port=0", f"--user-data-dir={profile_dir}",
+                *LEAN_CHROME_ARGS, "--blink-settings=imagesEnabled=false"]
+        if headless:
+            args += ["--headless=new", "--window-size=1280,900"]
+        process = await asyncio.create_subprocess_exec(*args, "about:blank", stdout=asyncio.subprocess.DEVNULL,
+                                                       stderr=asyncio.subprocess.PIPE)
+        try:
+            url = await asyncio.wait_for(cls._devtools_url(process.stderr), LAUNCH_TIMEOUT)
+            browser = cls(await Connection.connect(url), process, profile_dir)
+        except BaseException:
+            process.kill()
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        # Keep reading stderr, or Chrome blocks once the pipe is full
+        browser._stderr_task = asyncio.get_running_loop().create_task(cls._drain(process.stderr))
+        return browser
+
+    @staticmethod
+    async def _devtools_url(stream):
+        # Chrome announces its DevTools address on stderr once it's ready
+        while True:
+            line = await stream.readline()
+            if not line:
+                raise RuntimeError("Chrome exited before its DevTools endpoint was ready.")
+            text = line.decode(errors="replace").strip()
+            if text.startswith("DevTools listening on "):
+                return text[len("DevTools listening on "):]
+
+    @staticmethod
+    async def _drain(stream):
+        while await stream.readline():
+            pass
+
+    @classmethod
+    async def attach(cls, driver):
+        """ Connects to the Chrome behind a Selenium driver (e.g. a pre-warmed one). """
+        address = driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+        version = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: json.load(urlopen(f"http://{address}/json/version", timeout=10)))
+        return cls(await Connection.connect(version["webSocketDebuggerUrl"]))
+
+    async def new_page(self, isolated=True):
+        """ Opens a tab; `isolated` gives it its own cookies (a new browser context). """
+        context_id = None
+        params = {"url": "about:blank"}
+        if isolated:
+            context_id = (await self.connection.send("Target.createBrowserContext"))["browserContextId"]
+            params["browserContextId"] = context_id
+        target_id = (await self.connection.send("Target.createTarget", params))["targetId"]
+        session_id = (await self.connection.send("Target.attachToTarget",
+                                                 {"targetId": target_id, "flatten": True}))["sessionId"]
+        page = Page(self.connection, session_id, target_id, context_id)
+        await page.enable()
+        return page
+
+    async def close(self):
+        if self.process is not None:
+            try:
+                await asyncio.wait_for(self.connection.send("Browser.close"), 5)
+            except (CDPError, ConnectionClosed, asyncio.TimeoutError):
+                self.process.kill()
+            await self.process.wait()
+            if self._stderr_task is not None:
+                self._stderr_task.cancel()
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+        await self.connection.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -0,0 +1,409 @@
+"""
+The registration flow on asyncio, mirroring automation.sess_client.
+
+Each function takes a `Page` (see automation.aio.cdp) instead of a WebDriver and
+runs the same page scripts, message patterns, section catalog and round logic
+as the WebDriver path. Waits that don't depend on each other run at once: after
+clicking "Registration Operations" the bot waits for a toast, for the next
+document and for an auth error on the network together, and takes whichever
+comes first. While one session waits, the event loop drives the others.
+
+Expired sessions are detected with the same page check as the WebDriver path
+(`SESSION_STATE_JS`); `run_registration` then logs in again in the same tab, up
+to MAX_LOGIN_ATTEMPTS times in a row, and carries on with the pending courses.
+The credit planner, recorder and memory governor are WebDriver-only.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from ..catalog import SCAN_CATALOG_JS, cached_catalog, catalog_from_scan
+from ..course_checks import _CHECK_COURSES_JS, CHECK_BATCH_SIZE, CHECK_TIMEOUT
+from ..messages import COURSE_CLICK_OUTCOMES, NAVIGATION_OUTCOMES, REGISTRATION_OUTCOMES, Outcome, classifier
+from ..plan import parse_course_plan
+from ..portal import SESS_URL, page_layout
+from ..sess_client import (
+    COURSE_TOAST_TIMEOUT,
+    GROUP_TOAST_TIMEOUT,
+    NAVIGATION_TOAST_TIMEOUT,
+    REGISTRATION_PAGE_MARKER,
+    SCAN_REGISTRATION_STATE_JS,
+    SESSION_STATE_JS,
+    SessionExpired,
+    cached_check_answers,
+    confirmed_registrations,
+    registration_entry_allowed,
+    report_check_answers,
+    run_registration_rounds,
+    split_available_courses,
+    store_check_answers
+)
+from ..session_guard import MAX_LOGIN_ATTEMPTS
+from ..timetable import SCAN_GROUP_TIMES_JS, SCAN_TIMETABLE_JS, TimetableGuard
+from ..toasts import _MARK_JS, _WAIT_JS
+from ..tracing import span
+from .cdp import CDPError
+
+_LOGIN_FORM = "[name='edId']"
+_TILE_TEXT = "عملیات ثبت نام"
+
+# Clicks the "Registration Operations" tile once it's on the page
+_FIND_TILE_JS = r"""
+var tiles = document.querySelectorAll('div.inner');
+for (var i = 0; i < tiles.length; i++) {
+  if (tiles[i].textContent.indexOf(arguments[0]) !== -1) {
+    tiles[i].setAttribute('data-sess-tile', '1');
+    return true;
+  }
+}
+return false;
+"""
+
+
+async def _messages(page, timeout, match, until=None):
+    """ The toasts (texts) since the last mark, as in automation.toasts.wait_for_toasts. """
+    try:
+        found = await page.call_async(_WAIT_JS, None, list(match), until, timeout)
+    except CDPError:
+        # The document was replaced mid-wait; its toasts are gone with it
+        return []
+    return [text for _, text, _ in found or []]
+
+
+async def session_problem(page):
+    """ Why the portal session looks expired, or None, as in automation.sess_client.session_problem. """
+    try:
+        return await page.call(SESSION_STATE_JS)
+    except CDPError:
+        return None
+
+
+async def ensure_session(page):
+    """ Raises SessionExpired if the portal session looks expired. """
+    problem = await session_problem(page)
+    if problem:
+        raise SessionExpired(problem)
+
+
+async def log_in(page, username, password, sess_url=SESS_URL):
+    """
+    Logs into the university system using credentials passed as arguments.
+    """
+    if not username or not password:
+        raise ValueError("SESS_USERNAME and SESS_PASSWORD must be set in the .env file.")
+
+    with span("login"):
+        await page.goto(sess_url)
+        if not await page.wait_for_selector(_LOGIN_FORM, timeout=10):
+            raise CDPError("The login form did not show up.")
+        await page.type(_LOGIN_FORM, username)
+        await page.type("#edPass", password)
+        logged_in = page.navigation()
+        await page.click("#edEnter")
+        await asyncio.wait_for(logged_in, 30)
+
+
+async def try_enter_registration_page(page):
+    """
+    Clicks on "Registration Operations" once.
+    Returns True if the registration page was entered, False if registration is not active yet.
+    """
+    logging.info("🔄 Attempting to enter registration operations...")
+    with span("navigate.click"):
+        await page.wait_for_selector("div.inner", timeout=10)
+        if not await page.call(_FIND_TILE_JS, _TILE_TEXT):
+            # As on the WebDriver path: no tile means the page already changed, unless
+            # it changed because the session expired
+            await ensure_session(page)
+            logging.info("✅ Successfully entered registration operations (or page changed).")
+            return True
+        await page.call(_MARK_JS)
+        navigated = page.navigation()
+        try:
+            await page.click("div.inner[data-sess-tile]")
+        except BaseException:
+            navigated.cancel()
+            raise
+
+    # A toast, the registration page, a new document and an auth error are awaited together
+    with span("navigate.message_wait") as step:
+        toasts = asyncio.ensure_future(_messages(page, NAVIGATION_TOAST_TIMEOUT, classifier.sources(NAVIGATION_OUTCOMES),
+                                                 until=REGISTRATION_PAGE_MARKER))
+        rejected = page.wait_for_event("Network.responseReceived",
+                                       lambda params: params["response"].get("status") in (401, 403))
+        try:
+            done, _ = await asyncio.wait({toasts, navigated, rejected}, timeout=NAVIGATION_TOAST_TIMEOUT + 1,
+                                         return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            navigated.cancel()
+            rejected.cancel()
+            if not toasts.done():
+                toasts.cancel()
+        if rejected in done and toasts not in done:
+            raise SessionExpired("The portal rejected the session.")
+        texts = toasts.result() if toasts in done else []
+        step.set(messages=texts)
+    if not registration_entry_allowed(texts):
+        return False
+
+    # No message: the page changed, either to the registration page or back to the login page
+    await ensure_session(page)
+    logging.info("✅ Successfully entered registration operations.")
+    return True
+
+
+async def navigate_to_registration_page(page, retry_interval=10):
+    """
+    Clicks on "Registration Operations" and retries if registration is not active.
+    """
+    while not await try_enter_registration_page(page):
+        logging.warning(f"⏳ Registration is not active. Waiting for {retry_interval} seconds before retrying...")
+        with span("navigate.retry_wait"):
+            await asyncio.sleep(retry_interval)
+
+
+async def read_registration_catalog(page, semester_code=None, cache=None):
+    """ Waits for the course cells, then reads the page's section catalog (see automation.catalog). """
+    with span("page.scan"):
+        if not await page.wait_for_selector(REGISTRATION_PAGE_MARKER, timeout=5):
+            # An expired session would otherwise read as a page offering nothing
+            await ensure_session(page)
+            logging.warning("⚠️ No course cells found on the registration page.")
+        cached = cached_catalog(semester_code, cache)
+        scan = await page.call(SCAN_CATALOG_JS, cached.signature if cached else None, page_layout())
+        return catalog_from_scan(scan, cached, semester_code, cache)
+
+
+async def get_available_courses(page, course_list_string, catalog=None):
+    """
+    Checks if courses are available before attempting to register.
+    Returns the available and unavailable courses of the plan, highest priority first.
+    """
+    if not course_list_string:
+        logging.warning("⚠️ No courses found in the .env file. Please set the COURSES variable.")
+        return [], []
+    if catalog is None:
+        catalog = await read_registration_catalog(page)
+    return split_available_courses(parse_course_plan(course_list_string), catalog)
+
+
+async def _new_group_clashes(page, course, guard):
+    # Like the Selenium flow: group rows that only loaded with the cell click are checked before their click
+    if guard is None or guard.knows(course):
+        return set()
+    with span("timetable.groups", course=course.course_id):
+        try:
+            guard.add_group_rows(course, await page.call(SCAN_GROUP_TIMES_JS, page_layout(), course.course_id))
+        except CDPError as e:
+            logging.warning(f"⚠️ Could not read the meeting times of {course.course_id}'s groups ({e}).")
+            return set()
+    return guard.clashes(course)
+
+
+async def _select_and_register(page, course, semester_code, catalog, guard=None):
+    """ Clicks the course cell, then the row of the group currently tried. Returns the Outcome. """
+    group_ident = course.ident(semester_code)
+    row_selector = catalog.row_selector(course, semester_code)
+    cell_selector = catalog.cell_locator(course.course_id)[1]
+
+    with span("course.click", course=course.course_id):
+        if not await page.wait_for_selector(cell_selector, timeout=5, visible=True):
+            raise CDPError(f"Course cell {course.course_id} not found")
+        await page.call(_MARK_JS)
+        await page.click(cell_selector)
+
+    with span("course.message_wait", course=course.course_id) as step:
+        texts = await _messages(page, COURSE_TOAST_TIMEOUT, classifier.sources(COURSE_CLICK_OUTCOMES), until=row_selector)
+        outcome, message = classifier.classify_first(texts)
+        step.set(outcome=outcome.value, message=message)
+    if outcome is not Outcome.UNKNOWN:
+        return outcome
+
+    clashes = await _new_group_clashes(page, course, guard)
+    if clashes:
+        logging.info(f"🗓️ Course {course.course_id} (Group {course.group_code}) clashes with "
+                     f"{', '.join(sorted(clashes))} locally.")
+        return Outcome.CONFLICT
+
+    with span("group.click", ident=group_ident):
+        if not await page.wait_for_selector(row_selector, timeout=5, visible=True):
+            raise CDPError(f"Group row {group_ident} not found")
+        await page.call(_MARK_JS)
+        await page.click(row_selector)
+
+    logging.info(f"🔄 Attempting to register for course {course.course_id} (Group {course.group_code}, Sub-group {course.sub_group})...")
+
+    with span("group.message_wait", ident=group_ident) as step:
+        texts = await _messages(page, GROUP_TOAST_TIMEOUT, classifier.sources(REGISTRATION_OUTCOMES))
+        outcome, message = classifier.classify_first(texts)
+        step.set(outcome=outcome.value, message=message)
+    return outcome
+
+
+async def attempt_course_registration(page, course_list, semester_code, progress=None, retry_delay=0, guard=None,
+                                      max_rounds=None, catalog=None, results=None, executor=None):
+    """
+    Selects and registers the courses, as `automation.attempt_course_registration` does.
+    The round logic blocks between clicks, so it runs on a thread of `executor` (one
+    made for this call if not given) while every click and wait runs on the event loop.
+    Raises SessionExpired if the session expires; `results`, if given, keeps what was settled.
+    Returns a dict mapping each course id to its outcome (None if still pending).
+    """
+    if not semester_code:
+        raise ValueError("SEMESTER code must be set in the .env file.")
+
+    plan = parse_course_plan(course_list)
+    loop = asyncio.get_running_loop()
+    if catalog is None:
+        catalog = await read_registration_catalog(page, semester_code)
+    if guard is None:
+        with span("timetable.scan"):
+            try:
+                guard = TimetableGuard.from_scan(*await page.call(SCAN_TIMETABLE_JS, page_layout()))
+            except (CDPError, TypeError, ValueError) as e:
+                logging.warning(f"⚠️ Could not read meeting times; conflicts will only be detected by the portal ({e}).")
+
+    async def register(course):
+        try:
+            outcome = await _select_and_register(page, course, semester_code, catalog, guard)
+        except Exception:
+            logging.error(f"⚠️ Could not register for {course.course_id} (Group {course.group_code})")
+            outcome = Outcome.UNKNOWN
+        if outcome is Outcome.UNKNOWN:
+            # No answer may mean the portal sent the session back to the login page
+            await ensure_session(page)
+        return outcome
+
+    async def read_state():
+        with span("verify.scan"):
+            try:
+                state = await page.call(SCAN_REGISTRATION_STATE_JS, page_layout())
+            except CDPError as e:
+                logging.warning(f"⚠️ Could not read the registration page to verify courses: {e}")
+                return False
+        return state if state is None else (set(state[0]), set(state[1]))
+
+    # Called from the rounds thread; each blocks that thread only, never the event loop
+    def register_option(course):
+        return asyncio.run_coroutine_threadsafe(register(course), loop).result()
+
+    def verify(pending):
+        state = asyncio.run_coroutine_threadsafe(read_state(), loop).result()
+        return [] if state is False else confirmed_registrations(pending, state)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rounds")
+    try:
+        return await loop.run_in_executor(executor, partial(
+            run_registration_rounds, plan, register_option, progress=progress, verify=verify,
+            retry_delay=retry_delay, results=results, guard=guard, max_rounds=max_rounds))
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False)
+
+
+async def check_unavailable_course_reasons(page, unavailable_courses, semester_code=None, cache=None):
+    """
+    Checks the reason why the courses were not seen for registration, in batched
+    script calls; with a `cache` (see automation.course_checks), earlier answers are reused.
+    """
+    if not unavailable_courses:
+        return
+
+    logging.info("\n🔍 Checking the reason why some courses were not available:")
+    course_ids = [course.course_id for course in parse_course_plan(unavailable_courses)]
+    answers, to_check = cached_check_answers(course_ids, semester_code, cache)
+
+    if to_check:
+        checked = {}
+        try:
+            with span("unavailable.check", courses=len(to_check)):
+                for start in range(0, len(to_check), CHECK_BATCH_SIZE):
+                    found = await page.call_async(_CHECK_COURSES_JS, to_check[start:start + CHECK_BATCH_SIZE],
+                                                  CHECK_TIMEOUT)
+                    if found is None:
+                        raise RuntimeError("The course checker is not on the page.")
+                    checked.update(found)
+        except Exception as e:
+            logging.error(f"⚠️ Error checking courses {', '.join(to_check)}: {e}")
+        store_check_answers(answers, checked, semester_code, cache)
+
+    report_check_answers(course_ids, answers, to_check)
+
+
+async def run_registration(page, username, password, courses_str, semester, sess_url=SESS_URL, progress=None,
+                           catalog_cache=None, check_cache=None, executor=None):
+    """
+    Logs in, enters the registration page, registers the available courses and reports
+    why the others are unavailable. When the session expires on the way, logs in again
+    in the same tab and continues with the courses still pending (as SessionGuard does
+    on the WebDriver path). Returns {course id: outcome} of the attempted courses.
+    """
+    failures = 0
+
+    async def enter():
+        nonlocal failures
+        while True:
+            try:
+                await log_in(page, username, password, sess_url=sess_url)
+                await navigate_to_registration_page(page)
+                catalog = await read_registration_catalog(page, semester, cache=catalog_cache)
+                failures = 0
+                return catalog
+            except SessionExpired as e:
+                failures += 1
+                if failures >= MAX_LOGIN_ATTEMPTS:
+                    raise SessionExpired(f"{e}; logging in again failed {MAX_LOGIN_ATTEMPTS} times")
+                logging.warning(f"🔑 Session expired ({e}). Logging in again in the open tab...")
+
+    catalog = await enter()
+    available_courses, unavailable_courses = await get_available_courses(page, courses_str, catalog=catalog)
+    logging.info(f"Found {len(available_courses)} available courses for registration attempt.")
+
+    results = {}
+    pending = available_courses
+    stalled = 0
+    while pending:
+        try:
+            await attempt_course_registration(page, pending, semester, progress=progress, catalog=catalog,
+                                              results=results, executor=executor)
+            break
+        except SessionExpired as e:
+            # Give up if the session keeps expiring without any course getting settled
+            still_pending = [course for course in pending if results.get(course.course_id) is None]
+            stalled = stalled + 1 if len(still_pending) == len(pending) else 0
+            if stalled >= MAX_LOGIN_ATTEMPTS:
+                raise SessionExpired(f"{e}; expired {stalled} times in a row without progress")
+            pending = still_pending
+            logging.warning(f"🔑 Session expired ({e}). Logging in again in the open tab...")
+            catalog = await enter()
+    if unavailable_courses:
+        await check_unavailable_course_reasons(page, unavailable_courses, semester, cache=check_cache)
+    return results
+
+
+async def run_sessions(browser, accounts, courses_str, semester, sess_url=SESS_URL):
+    """
+    Registers several accounts at once from one event loop, each in its own tab and
+    browser context (cookies aren't shared). `accounts` is a list of (username, password).
+    Returns one results dict (or the exception it failed with) per account, in order.
+    """
+    # One rounds thread per session (see attempt_course_registration), for this run only
+    executor = ThreadPoolExecutor(max_workers=max(1, len(accounts)), thread_name_prefix="rounds")
+
+    async def run_one(username, password):
+        page = await browser.new_page(isolated=True)
+        try:
+            return await run_registration(page, username, password, courses_str, semester, sess_url=sess_url,
+                                          executor=executor)
+        finally:
+            await page.close()
+
+    try:
+        return await asyncio.gather(*(run_one(username, password) for username, password in accounts),
+                                    return_exceptions=True)
+    finally:
+        executor.shutdown(wait=False)
@@ -0,0 +1,137 @@
+"""
+A minimal asyncio WebSocket client (RFC 6455), enough for the DevTools protocol.
+
+Chrome's DevTools endpoint speaks plain `ws://` on localhost with text frames,
+so the client only handles the opening handshake, masked client frames,
+fragmented messages, ping/pong and close.
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+from urllib.parse import urlsplit
+
+_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+class ConnectionClosed(Exception):
+    """The WebSocket was closed by either side."""
+
+
+class WebSocket:
+    """One client connection; `recv` returns whole text messages."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+        self._write_lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, url, timeout=10):
+        parts = urlsplit(url)
+        if parts.scheme != "ws":
+            raise ValueError(f"Only ws:// URLs are supported, not {url}")
+        host, port = parts.hostname, parts.port or 80
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port, limit=2 ** 24), timeout)
+        key = base64.b64encode(os.urandom(16)).decode()
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        writer.write((f"GET {path or '/'} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        await writer.drain()
+
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+        status, *header_lines = head.decode("latin-1").split("\r\n")
+        if " 101 " not in f"{status} ":
+            writer.close()
+            raise ConnectionError(f"WebSocket handshake failed: {status}")
+        headers = {name.strip().lower(): value.strip()
+                   for name, _, value in (line.partition(":") for line in header_lines if line)}
+        accept = base64.b64encode(hashlib.sha1((key + _GUID).encode()).digest()).decode()
+        if headers.get("sec-websocket-accept") != accept:
+            writer.close()
+            raise ConnectionError("WebSocket handshake failed: bad Sec-WebSocket-Accept")
+        return cls(reader, writer)
+
+    async def _send_frame(self, opcode, payload):
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([0x80 | length])
+        elif length < 2 ** 16:
+            header += bytes([0x80 | 126]) + struct.pack("!H", length)
+        else:
+            header += bytes([0x80 | 127]) + struct.pack("!Q", length)
+        mask = os.urandom(4)
+        # Client frames are masked; XOR through int.from_bytes is much faster than per byte
+        repeated = (mask * (length // 4 + 1))[:length]
+        masked = (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(length, "big")
+        async with self._write_lock:
+            self.writer.write(header + mask + masked)
+            await self.writer.drain()
+
+    async def send(self, text):
+        if self.closed:
+            raise ConnectionClosed("The WebSocket is closed.")
+        await self._send_frame(OP_TEXT, text.encode("utf-8"))
+
+    async def _read_frame(self):
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length, = struct.unpack("!H", await self.reader.readexactly(2))
+        elif length == 127:
+            length, = struct.unpack("!Q", await self.reader.readexactly(8))
+        # Servers don't mask their frames, but tolerate it
+        mask = await self.reader.readexactly(4) if second & 0x80 else None
+        payload = await self.reader.readexactly(length)
+        if mask:
+            repeated = (mask * (length // 4 + 1))[:length]
+            payload = (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(length, "big")
+        return bool(first & 0x80), first & 0x0F, payload
+
+    async def recv(self):
+        """ Returns the next text (or binary) message. Raises ConnectionClosed once the connection ends. """
+        fragments = []
+        while True:
+            try:
+                final, opcode, payload = await self._read_frame()
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                self.closed = True
+                raise ConnectionClosed("The WebSocket connection was lost.") from e
+            if opcode == OP_PING:
+                await self._send_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                if not self.closed:
+                    self.closed = True
+                    try:
+                        await self._send_frame(OP_CLOSE, payload[:2])
+                    except ConnectionError:
+                        pass
+                raise ConnectionClosed("The WebSocket was closed by the server.")
+            if not fragments:
+                kind = opcode  # Continuation frames carry opcode 0
+            fragments.append(payload)
+            if final:
+                message = b"".join(fragments)
+                return message.decode("utf-8") if kind == OP_TEXT else message
+
+    async def close(self):
+        if not self.closed:
+            self.closed = True
+            try:
+                await self._send_frame(OP_CLOSE, struct.pack("!H", 1000))
+            except ConnectionError:
+                pass
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
@@ -0,0 +1,227 @@
+"""
+The section catalog: what the registration page offers, cached per semester.
+
+The first visit to the registration page scrapes every course cell (course id,
+credits) and group row (full ident, meeting times, capacity) in one script
+call and saves them to a small JSON file. Each group's locators are compiled
+once into exact-match CSS selectors (`tr[ident="14041:190131034:1:0"]`), so
+clicks no longer build XPaths or scan every row with `contains()`.
+
+Later visits send the cached page signature along with the scan: a hash of the
+course ids, the group idents and the shape of the cells and rows. If the page
+still matches, only the signature comes back and the cached catalog is used;
+if anything changed (a course added or removed, a new group, a new page
+layout), the page is scraped again and the cache replaced. Before logging in,
+a run can check its plan against the cached catalog without touching the portal.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from selenium.webdriver.common.by import By
+
+from .portal import page_layout
+
+DEFAULT_CATALOG_FILE = "section_catalog.json"
+
+# Returns [signature] if the page still matches arguments[0], else [signature, courses, groups].
+# arguments[1] is the page layout (see automation.portal); it is part of the signature, so
+# changing a selector setting scrapes the page again.
+SCAN_CATALOG_JS = """
+var known = arguments[0], layout = arguments[1];
+var cells = document.querySelectorAll('td.label-link[addnewcrs]');
+var rows = document.querySelectorAll('tr[ident]');
+var shape = function (el) {
+  if (!el) { return ''; }
+  var names = Array.prototype.map.call(el.attributes, function (attr) { return attr.name; })
+    .filter(function (name) { return name !== 'style' && name !== 'class'; });
+  return el.tagName + '[' + names.sort().join(',') + ']';
+};
+var parts = [JSON.stringify(layout), shape(cells[0]), shape(cells[0] && cells[0].closest('tr')), shape(rows[0])];
+Array.prototype.forEach.call(cells, function (cell) { parts.push(cell.getAttribute('addnewcrs')); });
+Array.prototype.forEach.call(rows, function (row) { parts.push(row.getAttribute('ident')); });
+// FNV-1a over the parts
+var text = parts.join('|'), hash = 2166136261;
+for (var i = 0; i < text.length; i++) {
+  hash ^= text.charCodeAt(i);
+  hash = Math.imul(hash, 16777619) >>> 0;
+}
+var signature = cells.length + '-' + rows.length + '-' + hash.toString(16);
+if (signature === known) { return [signature]; }
+
+var text_of = function (root, selector) {
+  var el = root && root.querySelector(selector);
+  return el ? el.textContent.trim() : null;
+};
+var courses = Array.prototype.map.call(cells, function (cell) {
+  return [cell.getAttribute('addnewcrs'), text_of(cell.closest('tr'), layout.CREDITS_SELECTOR)];
+});
+var groups = Array.prototype.map.call(rows, function (row) {
+  return [row.getAttribute('ident'), text_of(row, layout.MEETING_TIMES_SELECTOR), text_of(row, layout.SEAT_CAPACITY_SELECTOR)];
+});
+return [signature, courses, groups];
+"""
+
+
+def _option_key(ident):
+    """ "course:group:subgroup" of a group row's ident, or None if it has fewer parts. """
+    parts = (ident or '').split(':')
+    return ':'.join(parts[1:4]) if len(parts) >= 4 else None
+
+
+def course_cell_selector(course_id):
+    return f'td.label-link[addnewcrs="{course_id}"]'
+
+
+class SectionCatalog:
+    """Course cells and group rows of one semester's registration page, with precompiled locators."""
+
+    def __init__(self, semester, signature, courses, groups, scraped_at=None):
+        self.semester = semester
+        self.signature = signature
+        # course id -> credits text
+        self.courses = courses
+        # full ident -> {"times": ..., "capacity": ...}
+        self.groups = groups
+        self.scraped_at = scraped_at or time.time()
+
+        self.cell_locators = {course_id: (By.CSS_SELECTOR, course_cell_selector(course_id)) for course_id in courses}
+        # "course:group:subgroup" -> exact row selector
+        self.row_selectors = {}
+        for ident in groups:
+            key = _option_key(ident)
+            if key is not None:
+                self.row_selectors.setdefault(key, f'tr[ident="{ident}"]')
+        self.courses_with_rows = {key.split(':')[0] for key in self.row_selectors}
+
+    @classmethod
+    def from_scan(cls, semester, signature, course_rows, group_rows):
+        courses = {course_id: credits for course_id, credits in course_rows}
+        groups = {ident: {"times": times, "capacity": capacity} for ident, times, capacity in group_rows if ident}
+        if semester is None:
+            # The semester is the first part of every ident
+            semester = next((ident.split(':')[0] for ident in groups if _option_key(ident)), None)
+        return cls(semester, signature, courses, groups)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["semester"], data["signature"], data["courses"], data["groups"], data["scraped_at"])
+
+    def to_dict(self):
+        return {"semester": self.semester, "signature": self.signature, "courses": self.courses,
+                "groups": self.groups, "scraped_at": self.scraped_at}
+
+    def cell_locator(self, course_id):
+        locator = self.cell_locators.get(course_id)
+        return locator if locator is not None else (By.CSS_SELECTOR, course_cell_selector(course_id))
+
+    def row_selector(self, course, semester_code):
+        """ Exact selector of the row of the course's current group; a substring match if the row wasn't scraped. """
+        selector = self.row_selectors.get(course.option_key)
+        return selector if selector is not None else f"tr[ident*='{course.ident(semester_code)}']"
+
+    def missing_groups(self, course):
+        """ The course's requested options that have no group row, if the catalog knows its rows. """
+        if course.course_id not in self.courses_with_rows:
+            return []
+        return [key for key in course.option_keys() if key not in self.row_selectors]
+
+    def validate(self, plan):
+        """ Returns (courses not offered, {course id: requested options without a group row}). """
+        not_offered = [course for course in plan if course.course_id not in self.courses]
+        missing = {}
+        for course in plan:
+            if course.course_id in self.courses:
+                keys = self.missing_groups(course)
+                if keys:
+                    missing[course.course_id] = keys
+        return not_offered, missing
+
+
+class CatalogCache:
+    """Section catalogs keyed by semester, persisted to a JSON file."""
+
+    def __init__(self, path=DEFAULT_CATALOG_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._catalogs = None
+
+    def _load(self):
+        if self._catalogs is None:
+            self._catalogs = {}
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    for semester, data in json.load(f).items():
+                        self._catalogs[semester] = SectionCatalog.from_dict(data)
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        return self._catalogs
+
+    def get(self, semester_code):
+        """ Returns the cached catalog of the semester, or None. """
+        with self._lock:
+            return self._load().get(semester_code)
+
+    def put(self, catalog):
+        """ Stores the catalog under its semester and writes the file. An empty page isn't stored. """
+        if not catalog.semester or not catalog.courses:
+            return
+        with self._lock:
+            catalogs = self._load()
+            catalogs[catalog.semester] = catalog
+            try:
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump({semester: entry.to_dict() for semester, entry in catalogs.items()},
+                              f, ensure_ascii=False, indent=1)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logging.warning(f"⚠️ Could not save the section catalog to {self.path}: {e}")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_catalog_cache():
+    """ The cache shared by all sessions of this process. """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = CatalogCache()
+        return _default_cache
+
+
+def cached_catalog(semester_code, cache):
+    """ The catalog to send the signature of with SCAN_CATALOG_JS, or None. """
+    return cache.get(semester_code) if cache is not None and semester_code else None
+
+
+def read_catalog(driver, semester_code=None, cache=None):
+    """
+    Returns the section catalog of the registration page in one script call: the
+    cached one if the page's signature still matches it, else a freshly scraped one
+    (which replaces the cached one). Without `semester_code`, it's read from the idents.
+    """
+    cached = cached_catalog(semester_code, cache)
+    scan = driver.execute_script(SCAN_CATALOG_JS, cached.signature if cached else None, page_layout())
+    return catalog_from_scan(scan, cached, semester_code, cache)
+
+
+def catalog_from_scan(scan, cached, semester_code=None, cache=None):
+    """ The catalog for the result of SCAN_CATALOG_JS, sent `cached`'s signature. """
+    signature, *scraped = scan
+    if not scraped:
+        logging.info(f"📚 The registration page matches the cached section catalog "
+                     f"({len(cached.courses)} courses, {len(cached.groups)} groups).")
+        return cached
+
+    catalog = SectionCatalog.from_scan(semester_code, signature, *scraped)
+    if cached is not None:
+        logging.info("📚 The registration page changed since the section catalog was cached; scraped it again.")
+    if cache is not None:
+        cache.put(catalog)
+    return catalog
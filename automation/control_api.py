@@ -0,0 +1,458 @@
+"""
+A local HTTP control API for headless deployments.
+
+Operators submit registration jobs over HTTP instead of running one GUI or CLI
+process per student. Jobs name an account from the server's accounts file (no
+passwords travel over the API), are queued, and run on a fixed set of worker
+threads, each reusing one browser. Progress is pushed as Server-Sent Events:
+
+    POST   /jobs               {"account", "courses", "semester", "opens_at", "max_credits", "use_http_engine"}
+    GET    /jobs               every job's summary
+    GET    /jobs/<id>          one job's summary
+    DELETE /jobs/<id>          cancels a queued job, or stops a running one at the next course
+    GET    /jobs/<id>/events   SSE: the job's events from the start, until it finishes
+    GET    /events             SSE: every job's events (resumes after Last-Event-ID)
+    GET    /health
+
+Event types are "queued", "started", "attempt", "course" (a course settled) and
+"finished" (with every course's outcome). With a token configured, requests need
+"Authorization: Bearer <token>" or "?token=<token>".
+"""
+
+import hmac
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .driver_factory import create_driver, reset_driver
+from .jobs import JOBS_PER_DRIVER
+from .memory import launch_recyclable
+from .plan import parse_course_plan
+from .planner import choose_courses
+from .scheduler import parse_opening_time
+from .sess_client import SESS_URL
+from .workflow import run_registration
+
+DEFAULT_CONTROL_PORT = 8765
+# Events kept for replay to late or reconnecting subscribers
+EVENT_BUFFER = 10000
+# Finished jobs kept for GET /jobs; older ones are forgotten
+MAX_FINISHED_JOBS = 1000
+# Seconds between SSE keep-alive comments on an idle stream
+KEEPALIVE_INTERVAL = 15
+
+FINISHED_STATES = ("done", "failed", "terminated", "cancelled")
+
+
+def load_accounts(path):
+    """
+    Reads a JSON list of {"name", "username", "password"} objects (a jobs file works too).
+    Returns {name: (username, password)}.
+    """
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    accounts = {}
+    for entry in entries:
+        if not entry.get("username") or not entry.get("password"):
+            raise ValueError(f"Account {entry.get('name', '?')!r} in {path} needs a username and a password.")
+        accounts[entry.get("name") or entry["username"]] = (entry["username"], entry["password"])
+    return accounts
+
+
+class EventBus:
+    """Numbered events in a bounded buffer; subscribers wait for the ones after the last id they saw."""
+
+    def __init__(self, size=EVENT_BUFFER):
+        self._events = deque(maxlen=size)
+        self._condition = threading.Condition()
+        self._ids = itertools.count(1)
+        self.last_id = 0
+        self.closed = False
+
+    def publish(self, kind, job_id, **data):
+        with self._condition:
+            event = {"id": next(self._ids), "type": kind, "job": job_id, "time": time.time(), **data}
+            self._events.append(event)
+            self.last_id = event["id"]
+            self._condition.notify_all()
+        return event
+
+    def since(self, last_id, timeout=None):
+        """ Returns the buffered events after `last_id`, waiting up to `timeout` s if there are none yet. """
+        with self._condition:
+            self._condition.wait_for(lambda: self.closed or self.last_id > last_id, timeout)
+            if not self._events or self.last_id <= last_id:
+                return []
+            # Ids are consecutive, so the first new event's position follows from the oldest id
+            start = max(0, last_id - self._events[0]["id"] + 1)
+            return list(itertools.islice(self._events, start, None))
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class ControlJob:
+    """One queued registration and its state."""
+
+    def __init__(self, job_id, account, courses, semester, opens_at=None, max_credits=None, use_http_engine=False):
+        self.id = job_id
+        self.account = account
+        self.courses = courses
+        self.semester = semester
+        self.opens_at = opens_at
+        self.max_credits = max_credits
+        self.use_http_engine = use_http_engine
+        self.status = "queued"
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.results = {}
+        self.unavailable = []
+        self.error = None
+        self.first_event_id = None
+        self.stop_event = threading.Event()
+        # Set by DELETE /jobs/<id> (or the server stopping), unlike a stop from within the run
+        self.cancel_requested = False
+
+    def summary(self):
+        return {
+            "id": self.id, "account": self.account, "courses": self.courses, "semester": self.semester,
+            "status": self.status, "submitted": self.submitted, "started": self.started,
+            "finished": self.finished, "results": self.outcomes(), "unavailable": self.unavailable,
+            "error": self.error,
+        }
+
+    def outcomes(self):
+        return {course_id: outcome.value if outcome else None for course_id, outcome in self.results.items()}
+
+
+class JobProgress:
+    """The registration flow's progress hooks (see automation.parallel), published as events."""
+
+    def __init__(self, job, bus):
+        self.job = job
+        self.bus = bus
+
+    @property
+    def stopped(self):
+        return self.job.stop_event.is_set()
+
+    def stop(self):
+        self.job.stop_event.set()
+
+    def is_settled(self, course_id):
+        return False
+
+    def settle(self, course_id, registered=False):
+        self.bus.publish("course", self.job.id, course=course_id, registered=registered)
+
+    def attempted(self):
+        self.bus.publish("attempt", self.job.id)
+
+    def choose_courses(self, plan, credits, budget):
+        # Each job is its own account, with its own budget
+        return choose_courses(plan, credits, budget)
+
+    def release_credits(self, course_ids):
+        pass
+
+
+class BrowserRunner:
+    """Runs jobs through the normal registration flow, one reused browser per worker thread."""
+
+    def __init__(self, driver_factory=create_driver, sess_url=SESS_URL, jobs_per_driver=JOBS_PER_DRIVER):
+        self.driver_factory = driver_factory
+        self.sess_url = sess_url
+        self.jobs_per_driver = jobs_per_driver
+        self._local = threading.local()
+        self._drivers = []
+        self._lock = threading.Lock()
+
+    def _discard(self):
+        driver, self._local.driver = getattr(self._local, "driver", None), None
+        self._local.jobs = 0
+        if driver:
+            with self._lock:
+                if driver in self._drivers:
+                    self._drivers.remove(driver)
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def _take(self):
+        if getattr(self._local, "driver", None) and self._local.jobs >= self.jobs_per_driver:
+            self._discard()
+        if not getattr(self._local, "driver", None):
+            # Replaceable by the memory governor (MEMORY_LIMIT_MB) when one runs
+            self._local.driver = launch_recyclable(self.driver_factory)
+            self._local.jobs = 0
+            with self._lock:
+                self._drivers.append(self._local.driver)
+        self._local.jobs += 1
+        return self._local.driver
+
+    def __call__(self, job, credentials, progress):
+        driver = self._take()
+        try:
+            job.unavailable = [course.course_id for course in run_registration(
+                driver, *credentials, job.courses, job.semester, opens_at=job.opens_at,
+                use_http_engine=job.use_http_engine, progress=progress, sess_url=self.sess_url,
+                max_credits=job.max_credits, results=job.results, stop_event=job.stop_event)]
+            reset_driver(driver)
+        except BaseException:
+            # A browser in an unknown state isn't handed to the next job
+            self._discard()
+            raise
+
+    def close(self):
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+
+class ControlServer:
+    """The job queue, its worker threads and the HTTP front end."""
+
+    def __init__(self, accounts, workers=1, runner=None, host="127.0.0.1", port=DEFAULT_CONTROL_PORT,
+                 token=None, defaults=None):
+        self.accounts = accounts
+        self.runner = runner or BrowserRunner()
+        self.token = token
+        self.defaults = defaults or {}
+        self.bus = EventBus()
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._ids = itertools.count(1)
+        self._workers = [threading.Thread(target=self._work, name=f"control-worker-{index + 1}", daemon=True)
+                         for index in range(max(1, workers))]
+        self.httpd = ThreadingHTTPServer((host, port), ControlRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.control = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        for worker in self._workers:
+            worker.start()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="control-api", daemon=True)
+        self._thread.start()
+        logging.info(f"🛰️ Control API listening on {self.url} with {len(self._workers)} workers.")
+        return self
+
+    def stop(self):
+        """ Stops accepting requests, lets running jobs stop at their next course and quits the browsers. """
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        with self.lock:
+            for job in self.jobs.values():
+                job.cancel_requested = True
+                job.stop_event.set()
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self.bus.close()
+        if hasattr(self.runner, "close"):
+            self.runner.close()
+
+    def submit(self, spec):
+        """ Validates and queues a job. Raises ValueError for bad specs. """
+        spec = {**self.defaults, **{key: value for key, value in spec.items() if value not in (None, "")}}
+        account = spec.get("account")
+        if account not in self.accounts:
+            raise ValueError(f"Unknown account {account!r}.")
+        if not spec.get("courses") or not spec.get("semester"):
+            raise ValueError("A job needs courses and a semester.")
+        parse_course_plan(spec["courses"])
+        opens_at = spec.get("opens_at")
+        if isinstance(opens_at, str):
+            opens_at = parse_opening_time(opens_at)
+        max_credits = int(spec["max_credits"]) if spec.get("max_credits") is not None else None
+
+        job = ControlJob(f"job-{next(self._ids)}", account, spec["courses"], str(spec["semester"]),
+                         opens_at=opens_at, max_credits=max_credits,
+                         use_http_engine=bool(spec.get("use_http_engine", False)))
+        with self.lock:
+            self.jobs[job.id] = job
+            self._forget_old_jobs()
+            job.first_event_id = self.bus.publish("queued", job.id, account=account)["id"]
+        self._queue.put(job)
+        return job
+
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def cancel(self, job_id):
+        """ Cancels a queued job or asks a running one to stop. Returns the job, or None if unknown. """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            job.cancel_requested = True
+            job.stop_event.set()
+            if job.status == "queued":
+                self._finish(job, "cancelled")
+        return job
+
+    def _finish(self, job, status, error=None):
+        job.status = status
+        job.error = error
+        job.finished = time.time()
+        self.bus.publish("finished", job.id, status=status, results=job.outcomes(),
+                         unavailable=job.unavailable, error=error)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self.lock:
+                if job.status != "queued":
+                    continue
+                job.status = "running"
+                job.started = time.time()
+            self.bus.publish("started", job.id, worker=threading.current_thread().name,
+                             waited=round(job.started - job.submitted, 3))
+            status, error = "done", None
+            try:
+                self.runner(job, self.accounts[job.account], JobProgress(job, self.bus))
+            except SystemExit as e:
+                # Critical portal errors (e.g. incomplete evaluations) end this job only
+                status, error = "terminated", str(e)
+            except Exception as e:
+                logging.error(f"❌ [{job.id}] Job failed: {e}")
+                status, error = "failed", str(e)
+            if status == "done" and job.cancel_requested:
+                status = "cancelled"
+            with self.lock:
+                self._finish(job, status, error)
+
+
+class ControlRequestHandler(BaseHTTPRequestHandler):
+    server_version = "SessBotControl/1.0"
+
+    @property
+    def control(self):
+        return self.server.control
+
+    def log_message(self, format, *args):
+        logging.debug("control api: " + format, *args)
+
+    def _json(self, data, status=200):
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _authorized(self):
+        token = self.control.token
+        if not token:
+            return True
+        header = self.headers.get("Authorization", "")
+        given = header[len("Bearer "):] if header.startswith("Bearer ") else \
+            parse_qs(urlsplit(self.path).query).get("token", [""])[0]
+        if hmac.compare_digest(given.encode(), token.encode()):
+            return True
+        self._json({"error": "unauthorized"}, status=401)
+        return False
+
+    def _route(self):
+        return [part for part in urlsplit(self.path).path.split("/") if part]
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        parts = self._route()
+        if parts == ["health"]:
+            self._json({"ok": True, "queued": self.control._queue.qsize()})
+        elif parts == ["jobs"]:
+            with self.control.lock:
+                self._json([job.summary() for job in self.control.jobs.values()])
+        elif len(parts) == 2 and parts[0] == "jobs":
+            self._job_reply(self.control.jobs.get(parts[1]))
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+            job = self.control.jobs.get(parts[1])
+            if job is None:
+                return self._json({"error": "unknown job"}, status=404)
+            self._stream(job.first_event_id - 1, job=job.id)
+        elif parts == ["events"]:
+            last_id = self.headers.get("Last-Event-ID")
+            self._stream(int(last_id) if last_id and last_id.isdigit() else self.control.bus.last_id)
+        else:
+            self._json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if self._route() != ["jobs"]:
+            return self._json({"error": "not found"}, status=404)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            spec = json.loads(self.rfile.read(length) or b"{}")
+            job = self.control.submit(spec)
+        except (ValueError, TypeError, AttributeError) as e:
+            return self._json({"error": str(e)}, status=400)
+        self._json(job.summary(), status=202)
+
+    def do_DELETE(self):
+        if not self._authorized():
+            return
+        parts = self._route()
+        self._job_reply(self.control.cancel(parts[1]) if len(parts) == 2 and parts[0] == "jobs" else None)
+
+    def _job_reply(self, job):
+        if job is None:
+            return self._json({"error": "unknown job"}, status=404)
+        self._json(job.summary())
+
+    def _stream(self, last_id, job=None):
+        """ Writes events after `last_id` (only `job`'s, if given) as SSE until the client leaves. """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        bus = self.control.bus
+        try:
+            while not bus.closed:
+                events = bus.since(last_id, timeout=KEEPALIVE_INTERVAL)
+                if not events:
+                    if job is not None and getattr(self.control.jobs.get(job), "status", "done") in FINISHED_STATES:
+                        # Its "finished" event was already sent (or dropped from the buffer)
+                        return
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                last_id = events[-1]["id"]
+                if job is not None:
+                    events = [event for event in events if event["job"] == job]
+                # One write per batch of events
+                self.wfile.write("".join(
+                    f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+                    for event in events).encode("utf-8"))
+                self.wfile.flush()
+                if job is not None and any(event["type"] == "finished" for event in events):
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            pass
@@ -0,0 +1,137 @@
+"""
+Batched "why isn't this course offered?" checks.
+
+The registration page has a checker: type a course code into `edCrsCode`, click
+`btnCheckCrs` and read `lblCheckResult`. Instead of driving it one WebDriver
+command at a time, a single injected script runs the checker for a batch of
+courses. It clears the label before each click and waits until the label has
+new text, so a result left over from the previous course is never read twice.
+
+Answers are cached per semester and course in a small JSON file, so repeat runs
+on the same day don't ask the portal again.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+# Seconds to wait for one answer, and courses per script call (keeps a call under WebDriver's script timeout)
+CHECK_TIMEOUT = 5
+CHECK_BATCH_SIZE = 4
+
+DEFAULT_CHECK_CACHE_FILE = "course_checks.json"
+# Answers older than this are asked again
+CHECK_CACHE_TTL = 6 * 3600
+
+_CHECK_COURSES_JS = r"""
+var done = arguments[arguments.length - 1];
+var codes = arguments[0], timeout = arguments[1] * 1000;
+var input = document.getElementById('edCrsCode');
+var button = document.getElementById('btnCheckCrs');
+var label = document.getElementById('lblCheckResult');
+if (!input || !button || !label) { done(null); return; }
+
+var results = {};
+function check(index) {
+  if (index >= codes.length) { done(results); return; }
+  var code = codes[index], finished = false, timer = null, observer = null;
+
+  function finish(text) {
+    if (finished) { return; }
+    finished = true;
+    clearTimeout(timer);
+    observer.disconnect();
+    results[code] = text;
+    check(index + 1);
+  }
+  function changed() {
+    var text = label.textContent.trim();
+    if (text) { finish(text); }
+  }
+
+  // Clear the label first: the answer is whatever text shows up after the click
+  label.textContent = '';
+  observer = new MutationObserver(changed);
+  observer.observe(label, {childList: true, characterData: true, subtree: true});
+  timer = setTimeout(function () { finish(null); }, timeout);
+
+  input.value = code;
+  input.dispatchEvent(new Event('input', {bubbles: true}));
+  input.dispatchEvent(new Event('change', {bubbles: true}));
+  button.click();
+}
+check(0);
+"""
+
+
+class CourseCheckCache:
+    """Checker answers keyed by semester and course, persisted to a JSON file."""
+
+    def __init__(self, path=DEFAULT_CHECK_CACHE_FILE, ttl=CHECK_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, semester_code, course_id):
+        """ Returns the cached answer, or None if there is none or it's too old. """
+        with self._lock:
+            entry = self._load().get(f"{semester_code}:{course_id}")
+        if entry and time.time() - entry["checked_at"] < self.ttl:
+            return entry["result"]
+        return None
+
+    def put(self, semester_code, answers):
+        """ Stores {course id: answer} and writes the file. """
+        with self._lock:
+            entries = self._load()
+            now = time.time()
+            for course_id, result in answers.items():
+                entries[f"{semester_code}:{course_id}"] = {"result": result, "checked_at": now}
+            try:
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(entries, f, ensure_ascii=False, indent=1)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                logging.warning(f"⚠️ Could not save course check results to {self.path}: {e}")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_check_cache():
+    """ The cache shared by all sessions of this process. """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = CourseCheckCache()
+        return _default_cache
+
+
+def check_courses(driver, course_ids, timeout=CHECK_TIMEOUT, batch_size=CHECK_BATCH_SIZE):
+    """
+    Runs the portal's course checker for every course, a batch per script call.
+    Returns {course id: answer}, with None for courses that got no answer in time.
+    Raises RuntimeError if the checker isn't on the page.
+    """
+    answers = {}
+    for start in range(0, len(course_ids), batch_size):
+        batch = list(course_ids[start:start + batch_size])
+        found = driver.execute_async_script(_CHECK_COURSES_JS, batch, timeout)
+        if found is None:
+            raise RuntimeError("The course checker is not on the page.")
+        answers.update(found)
+    return answers
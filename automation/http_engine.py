@@ -0,0 +1,216 @@
+"""
+Direct HTTP registration engine.
+
+Logs in through Selenium as usual, then copies the session cookies and the
+anti-forgery token out of the driver and sends the same add-course requests the
+registration page's JavaScript sends, over a pooled keep-alive connection. Each
+course then costs one HTTP round-trip instead of two clicks and a render loop.
+
+The endpoints and the token field were taken from the local stand-in portal and
+are unverified against the live one: set HTTP_SELECT_PATH, HTTP_ADD_PATH and
+HTTP_TOKEN_FIELD (see automation.portal) to what the real page sends.
+
+If the portal answers in a way the engine doesn't understand (missing token,
+unknown endpoint, unexpected response format), it raises ProtocolChanged and the
+caller falls back to the Selenium path, with the cookies the engine received
+copied back into the browser.
+"""
+
+import json
+import logging
+import re
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urljoin
+
+import urllib3
+
+from .messages import classifier, Outcome
+from .plan import parse_course_plan
+from .portal import portal_setting
+from .sess_client import attempt_course_registration, run_registration_rounds
+from .timetable import read_timetable
+from .tracing import span
+
+# Reads everything the engine needs from the page in one call; the token field's name is the argument
+_SESSION_JS = """
+var token = document.querySelector('input[name="' + arguments[0] + '"]');
+return [location.href, navigator.userAgent, token ? token.value : null];
+"""
+
+# Answers that settle a course, so there is no point adding a group after selecting it
+_TERMINAL_OUTCOMES = (Outcome.REGISTERED, Outcome.CONFLICT, Outcome.CREDIT_LIMIT,
+                      Outcome.NOT_ALLOWED, Outcome.CAPACITY_FULL)
+
+_TOAST_HTML = re.compile(r'class="toast-message"[^>]*>(.*?)<', re.S)
+
+
+class ProtocolChanged(Exception):
+    """The portal no longer speaks the protocol this engine was written against."""
+
+
+class HttpRegistrationEngine:
+    """Sends add-course requests directly, reusing the driver's authenticated session."""
+
+    def __init__(self, driver, timeout=10):
+        self.select_path = portal_setting('HTTP_SELECT_PATH')
+        self.add_path = portal_setting('HTTP_ADD_PATH')
+        self.token_field = portal_setting('HTTP_TOKEN_FIELD')
+        page_url, user_agent, token = driver.execute_script(_SESSION_JS, self.token_field)
+        if not token:
+            raise ProtocolChanged(f"Anti-forgery token '{self.token_field}' not found on the registration page.")
+        self.base_url = page_url
+        self.token = token
+        # The driver's cookies with their attributes, to write rotated values back (see sync_cookies)
+        self.driver_cookies = {c['name']: c for c in driver.get_cookies()}
+        self.cookies = {name: c['value'] for name, c in self.driver_cookies.items()}
+        self.selected = set()
+        self.http = urllib3.PoolManager(
+            num_pools=1,
+            maxsize=4,
+            retries=False,
+            timeout=urllib3.Timeout(connect=3, read=timeout),
+            headers={
+                'User-Agent': user_agent,
+                'X-Requested-With': 'XMLHttpRequest',
+                'Referer': page_url,
+            },
+        )
+
+    def _request(self, method, path, fields=None):
+        headers = {'Cookie': '; '.join(f"{k}={v}" for k, v in self.cookies.items())}
+        url = urljoin(self.base_url, path)
+        if method == 'GET':
+            if fields:
+                url += '?' + urlencode(fields)
+            response = self.http.request(method, url, headers=headers, redirect=False)
+        else:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded; charset=UTF-8'
+            response = self.http.request(method, url, body=urlencode(fields or {}), headers=headers, redirect=False)
+
+        # Keep the cookie jar in sync with anything the server rotates
+        for header in response.headers.getlist('Set-Cookie'):
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+
+        if response.status in (301, 302, 401, 403, 404, 405):
+            raise ProtocolChanged(f"{method} {path} answered HTTP {response.status}.")
+        return response
+
+    def _message(self, response):
+        """Extracts the portal message from a JSON or HTML response."""
+        body = response.data.decode('utf-8', errors='replace')
+        content_type = response.headers.get('Content-Type', '')
+        if 'json' in content_type:
+            try:
+                data = json.loads(body)
+            except ValueError:
+                raise ProtocolChanged("Malformed JSON response.")
+            if not isinstance(data, dict) or 'message' not in data:
+                raise ProtocolChanged("JSON response without a message field.")
+            return str(data['message']).strip()
+        if 'html' in content_type:
+            found = _TOAST_HTML.search(body)
+            if found:
+                return found.group(1).strip()
+            # A full page without a toast (e.g. the login form) means we're off-protocol
+            raise ProtocolChanged("HTML response without a toast message.")
+        raise ProtocolChanged(f"Unexpected response type '{content_type}'.")
+
+    def register(self, semester_code, course_id, group_code, sub_group='0'):
+        """
+        Sends one add-course request. Returns a Classification: the Outcome and the portal's message.
+        """
+        # The page selects the course before adding a group; do the same once per course
+        if course_id not in self.selected:
+            with span("http.select", course=course_id):
+                response = self._request('GET', self.select_path, {'crs': course_id})
+                message = self._message(response)
+            self.selected.add(course_id)
+            answer = classifier.classify(message)
+            if answer.outcome in _TERMINAL_OUTCOMES:
+                return answer
+
+        ident = f"{semester_code}:{course_id}:{group_code}:{sub_group}"
+        with span("http.add", ident=ident):
+            response = self._request('POST', self.add_path, {'ident': ident, self.token_field: self.token})
+            message = self._message(response)
+        return classifier.classify(message)
+
+    def sync_cookies(self, driver):
+        """
+        Copies the cookies the server set or rotated during HTTP requests into the driver,
+        so the browser carries on with the current session rather than a stale one.
+        """
+        for name, value in self.cookies.items():
+            cookie = self.driver_cookies.get(name)
+            if cookie is not None and cookie['value'] == value:
+                continue
+            cookie = dict(cookie or {'name': name, 'path': '/'}, value=value)
+            try:
+                driver.add_cookie(cookie)
+            except Exception as e:
+                logging.warning(f"⚠️ Could not copy cookie '{name}' back into the browser: {e}")
+
+    def close(self):
+        self.http.clear()
+
+
+def attempt_course_registration_http(driver, course_list, semester_code, retry_delay=0.5, progress=None,
+                                     guard=None, max_rounds=None, catalog=None, session=None):
+    """
+    Registers the courses over direct HTTP requests, falling back to the Selenium
+    path for whatever is left if the engine detects a protocol change.
+    `progress`, `guard`, `max_rounds`, `catalog` and `session` are used as in `attempt_course_registration`. The page doesn't
+    show registrations made over HTTP, so pass the same guard to later calls.
+    Returns a dict mapping each course id to its outcome (None if still pending).
+    """
+    if not semester_code:
+        raise ValueError("SEMESTER code must be set in the .env file.")
+
+    plan = parse_course_plan(course_list)
+
+    try:
+        engine = HttpRegistrationEngine(driver)
+    except ProtocolChanged as e:
+        logging.warning(f"⚠️ HTTP engine unavailable ({e}). Falling back to browser registration.")
+        return attempt_course_registration(driver, plan, semester_code, progress=progress, guard=guard,
+                                           max_rounds=max_rounds, catalog=catalog, session=session)
+
+    def register_option(course):
+        logging.info(f"🔄 Attempting to register for course {course.course_id} (Group {course.group_code}, Sub-group {course.sub_group}) over HTTP...")
+        try:
+            outcome, message = engine.register(semester_code, course.course_id, course.group_code, course.sub_group)
+        except urllib3.exceptions.HTTPError as e:
+            logging.error(f"⚠️ Could not register for {course.course_id} (Group {course.group_code}): {e}")
+            return Outcome.UNKNOWN
+        if outcome is Outcome.UNKNOWN:
+            logging.info(f"🔄 Course {course.course_id} (Group {course.group_code}): {message or 'no answer'}. Trying again...")
+        return outcome
+
+    if guard is None:
+        # Meeting times of every group and registered course, for local conflict checks
+        with span("timetable.scan"):
+            guard = read_timetable(driver)
+
+    results = {}
+    try:
+        run_registration_rounds(plan, register_option, progress=progress,
+                                retry_delay=retry_delay, results=results, guard=guard,
+                                max_rounds=max_rounds)
+        # Later browser steps (unavailable-course reasons, seat watch) carry on with the same session
+        engine.sync_cookies(driver)
+        return results
+    except ProtocolChanged as e:
+        logging.warning(f"⚠️ HTTP engine detected a protocol change ({e}). Falling back to browser registration.")
+        engine.sync_cookies(driver)
+        driver.refresh()
+        # A 401 or a redirect to the login page is an expired session rather than a changed portal
+        if session is not None:
+            session.recover_if_expired()
+        remaining = [course for course in plan if results.get(course.course_id) is None]
+        # The page was reloaded: its catalog is read again
+        results.update(attempt_course_registration(driver, remaining, semester_code, progress=progress, guard=guard,
+                                                   max_rounds=max_rounds, session=session))
+        return results
+    finally:
+        engine.close()
@@ -0,0 +1,213 @@
+"""
+Running many students' registrations on one host.
+
+A jobs file lists one entry per account. The entries run in a bounded pool of
+worker processes, each driving one browser at a time, so a crash or a memory
+leak in one browser never takes the others down. The pool is sized from the
+CPU count and the free memory, logins are staggered so the portal isn't hit by
+every account in the same second, and each worker reuses its browser for
+several jobs (with cookies cleared in between) before replacing it.
+
+Every job's outcome, duration and peak memory go into a JSON report, together
+with the run's throughput (accounts completed per minute) and the host-wide
+peak memory of the bot and its browsers.
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from multiprocessing import util
+
+from .driver_factory import create_driver, reset_driver
+from .memory import MemorySampler, available_memory, launch_recyclable, memory_governor, start_memory_governor
+from .scheduler import parse_opening_time
+from .sess_client import SESS_URL
+from .workflow import run_registration
+
+DEFAULT_JOBS_REPORT = "jobs_report.json"
+# Seconds between two accounts' logins
+LOGIN_STAGGER = 2.0
+# Memory a registration browser needs, used to size the pool
+BROWSER_MEMORY = 400 * 1024 * 1024
+# Jobs a worker runs on one browser before launching a fresh one
+JOBS_PER_DRIVER = 5
+
+_REQUIRED_FIELDS = ("username", "password", "courses", "semester")
+
+
+def load_jobs(path, defaults=None):
+    """
+    Reads a JSON list of accounts: {"name", "username", "password", "courses", "semester",
+    "opens_at", "max_credits", "use_http_engine"}. Missing fields are taken from `defaults`.
+    Raises ValueError for entries without credentials, courses or semester.
+    """
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    jobs = []
+    for index, entry in enumerate(entries):
+        job = {**(defaults or {}), **{key: value for key, value in entry.items() if value not in (None, "")}}
+        missing = [field for field in _REQUIRED_FIELDS if not job.get(field)]
+        if missing:
+            raise ValueError(f"Job {index + 1} in {path} is missing {', '.join(missing)}.")
+        job.setdefault("name", job["username"])
+        jobs.append(job)
+    return jobs
+
+
+def max_concurrent_browsers(limit=None):
+    """ How many browsers this host can run at once: one per core, as far as free memory allows. """
+    count = os.cpu_count() or 1
+    memory = available_memory()
+    if memory is not None:
+        count = min(count, memory // BROWSER_MEMORY)
+    if limit:
+        count = min(count, limit)
+    return max(1, count)
+
+
+# --- Worker process side ---
+
+_worker = {"driver": None, "jobs": 0, "headless": True}
+
+
+def _quit_driver():
+    driver, _worker["driver"] = _worker["driver"], None
+    _worker["jobs"] = 0
+    if driver:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+
+def _init_worker(headless, log_level, memory_limit=None):
+    logging.basicConfig(level=log_level, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s',
+                        datefmt='%H:%M:%S')
+    logging.getLogger('selenium').setLevel(logging.ERROR)
+    _worker["headless"] = headless
+    if memory_limit:
+        # Also replaces a browser that grows past the limit within one long job
+        start_memory_governor(memory_limit)
+    # Pool workers leave through multiprocessing's exit path, which skips atexit handlers
+    util.Finalize(None, _quit_driver, exitpriority=10)
+
+
+def _take_driver():
+    # Reuses this worker's browser, replacing it after JOBS_PER_DRIVER jobs to keep its memory in check
+    if _worker["driver"] is not None and _worker["jobs"] >= JOBS_PER_DRIVER:
+        _quit_driver()
+    if _worker["driver"] is None:
+        _worker["driver"] = launch_recyclable(partial(create_driver, headless=_worker["headless"]))
+    _worker["jobs"] += 1
+    return _worker["driver"]
+
+
+def _run_job(job, not_before, sess_url):
+    result = {"name": job["name"], "username": job["username"], "status": "failed",
+              "results": {}, "unavailable": [], "error": None}
+    sampler = MemorySampler().start()
+    governor = memory_governor()
+    recycles_before = len(governor.recycles) if governor else 0
+    started = time.time()
+    try:
+        driver = _take_driver()
+        # Launch the browser first, then wait for this account's login slot
+        delay = not_before - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        started = time.time()
+        logging.info(f"🚀 [{job['name']}] Starting with courses: {job['courses']}")
+
+        results = {}
+        unavailable = run_registration(driver, job["username"], job["password"], job["courses"], job["semester"],
+                                       opens_at=job.get("opens_at"), use_http_engine=job.get("use_http_engine", False),
+                                       sess_url=sess_url, max_credits=job.get("max_credits"), results=results)
+        result["status"] = "done"
+        result["results"] = {course_id: outcome.value if outcome else None for course_id, outcome in results.items()}
+        result["unavailable"] = [course.course_id for course in unavailable]
+        # The next account must not inherit this one's session
+        reset_driver(driver)
+    except SystemExit as e:
+        # Critical portal errors (e.g. incomplete evaluations) end this account's job only
+        result["status"] = "terminated"
+        result["error"] = str(e)
+        _quit_driver()
+    except Exception as e:
+        result["error"] = str(e)
+        # A browser in an unknown state isn't handed to the next account
+        _quit_driver()
+    finally:
+        result["duration_s"] = round(time.time() - started, 2)
+        result["peak_memory_mb"] = sampler.stop()
+        if governor is not None:
+            result["browser_recycles"] = len(governor.recycles) - recycles_before
+    return result
+
+
+# --- Parent side ---
+
+def run_jobs(jobs, max_browsers=None, stagger=LOGIN_STAGGER, headless=True, sess_url=SESS_URL,
+             report_path=DEFAULT_JOBS_REPORT, memory_limit=None):
+    """
+    Runs every job (see `load_jobs`) in a pool of worker processes, at most `max_browsers`
+    browsers at a time (sized from CPU and memory if not given), with logins `stagger`
+    seconds apart. With `memory_limit` (MB), browsers growing past it are replaced
+    (see automation.memory). Writes the report to `report_path` and returns it.
+    """
+    workers = min(len(jobs), max_concurrent_browsers(max_browsers))
+    logging.info(f"👥 Running {len(jobs)} accounts with {workers} browsers at a time, logins {stagger:g} s apart.")
+
+    # Opening times are parsed here, where a bad value fails before any browser launches
+    jobs = [{**job, "opens_at": parse_opening_time(job["opens_at"]) if job.get("opens_at") else None} for job in jobs]
+
+    sampler = MemorySampler().start()
+    started = time.time()
+    reports = []
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(headless, logging.getLogger().getEffectiveLevel(), memory_limit))
+    try:
+        futures = {pool.submit(_run_job, job, started + index * stagger, sess_url): job
+                   for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                report = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. killed for memory)
+                report = {"name": job["name"], "username": job["username"], "status": "failed",
+                          "results": {}, "unavailable": [], "error": f"Worker crashed: {e}"}
+            reports.append(report)
+            registered = sum(outcome == "registered" for outcome in report["results"].values())
+            logging.info(f"📋 [{report['name']}] {report['status']}: {registered} registered, "
+                         f"{len(report['unavailable'])} unavailable ({len(reports)}/{len(jobs)} accounts done).")
+    except KeyboardInterrupt:
+        logging.warning("⚠️ Interrupted. Cancelling the accounts that haven't started.")
+        pool.shutdown(cancel_futures=True)
+        raise
+    finally:
+        pool.shutdown()
+        elapsed = time.time() - started
+        peak = sampler.stop()
+
+    completed = sum(report["status"] == "done" for report in reports)
+    summary = {
+        "started_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started)),
+        "elapsed_s": round(elapsed, 1),
+        "browsers": workers,
+        "accounts": len(jobs),
+        "completed": completed,
+        "accounts_per_minute": round(completed / elapsed * 60, 2) if elapsed else 0.0,
+        "peak_memory_mb": peak,
+        "jobs": sorted(reports, key=lambda report: report["name"]),
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    peak_text = f"{peak:.0f} MB" if peak else "unknown (install psutil)"
+    logging.info(f"📊 {completed}/{len(jobs)} accounts completed in {elapsed:.1f} s "
+                 f"({summary['accounts_per_minute']:.2f} accounts/min), peak memory {peak_text}. "
+                 f"Report written to {report_path}.")
+    return summary
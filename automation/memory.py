@@ -0,0 +1,321 @@
+"""
+Memory of the bot and its browsers, and a governor that keeps the browser's in check.
+
+`process_tree_rss` reads the resident memory of a process and its descendants
+(with psutil if it's installed, from /proc otherwise), and `MemorySampler`
+tracks a tree's peak on a background thread.
+
+Chrome's memory keeps growing over runs that last hours: the retry loop waiting
+for the registration window, many registration rounds, the seat watch. While a
+governor runs (`start_memory_governor`), the flow samples the browser's memory
+at safe points between steps (`memory_checkpoint`, at most every
+GOVERNOR_INTERVAL seconds per browser). Once it's over the limit, the browser
+is replaced: the old one is quit, a fresh one launched and the session
+restored (logged in again, and back on the registration page if the run was
+there). Only a `RecyclableDriver` can be replaced; it forwards everything to
+the current browser, so the code holding it carries on with the new one.
+Samples and replacements go into the trace (a "memory" counter track and
+`memory.recycle` spans) and into the summary logged when the governor stops.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+try:
+    import psutil
+except ImportError:  # Optional: without it, memory is read from /proc (Linux only)
+    psutil = None
+
+from .tracing import span, trace_counter
+
+# Seconds between memory samples of MemorySampler
+MEMORY_SAMPLE_INTERVAL = 0.5
+# Seconds between the governor's samples of one browser
+GOVERNOR_INTERVAL = 30
+# Governor samples kept (a day of samples every 30 s)
+GOVERNOR_HISTORY = 2880
+
+_MB = 1024 * 1024
+
+# The running MemoryGovernor, or None
+_governor = None
+
+
+def available_memory():
+    """ Bytes of memory available for new processes, or None if unknown. """
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _proc_children():
+    # {parent pid: [child pids]} from /proc
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; the parent pid is the second field after it
+        parent = int(stat[stat.rfind(')') + 2:].split()[1])
+        children.setdefault(parent, []).append(int(entry))
+    return children
+
+
+def process_rss(pid):
+    """ Resident memory in bytes of one process, or None if unknown. """
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def process_tree_rss(pid):
+    """ Resident memory in bytes of a process and all its descendants, or None if unknown. """
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            total = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total
+        except psutil.Error:
+            return None
+    if not os.path.isdir("/proc"):
+        return None
+
+    children = _proc_children()
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * page_size
+        except OSError:
+            continue
+        pending.extend(children.get(current, []))
+    return total
+
+
+class MemorySampler:
+    """Tracks the peak resident memory of a process tree on a background thread."""
+
+    def __init__(self, pid=None, interval=MEMORY_SAMPLE_INTERVAL):
+        self.pid = pid or os.getpid()
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            rss = process_tree_rss(self.pid)
+            if rss is None:
+                return
+            self.peak = max(self.peak or 0, rss)
+            if self._stop.wait(self.interval):
+                return
+
+    def stop(self):
+        """ Stops sampling. Returns the peak in MB, or None if memory can't be read here. """
+        self._stop.set()
+        self._thread.join()
+        return round(self.peak / _MB, 1) if self.peak else None
+
+
+class RecyclableDriver:
+    """Forwards to the current WebDriver; `recycle` replaces its browser with a fresh one."""
+
+    def __init__(self, factory, driver=None):
+        self._factory = factory
+        self._driver = driver if driver is not None else factory()
+        # Why the last replacement failed to launch, while there is no browser
+        self._launch_error = None
+
+    def __getattr__(self, name):
+        driver = self.__dict__.get('_driver')
+        if driver is None:
+            raise RuntimeError(f"The browser was quit to be replaced, but the new one failed to launch "
+                               f"({self._launch_error}). Call recycle() to try again.")
+        return getattr(driver, name)
+
+    @property
+    def wrapped_driver(self):
+        return self._driver
+
+    def recycle(self):
+        """
+        Quits the current browser (freeing its memory first) and launches a new one.
+        If the launch fails, the error is raised here, later calls raise a RuntimeError
+        naming it instead of failing on the quit browser, and `recycle()` may be tried again.
+        """
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+        try:
+            driver = self._factory()
+        except Exception as e:
+            self._driver, self._launch_error = None, e
+            raise
+        self._driver, self._launch_error = driver, None
+
+
+def browser_rss(driver):
+    """ Resident memory in bytes of the driver's chromedriver and browser processes, or None. """
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return None
+    return process_tree_rss(pid)
+
+
+class MemoryGovernor:
+    """Samples browser memory at safe points and replaces browsers that grew over `limit_mb`."""
+
+    def __init__(self, limit_mb, interval=GOVERNOR_INTERVAL, history=GOVERNOR_HISTORY):
+        self.limit_mb = limit_mb
+        self.interval = interval
+        # (unix time, browser MB, bot MB)
+        self.samples = deque(maxlen=history)
+        # {"time", "before_mb", "after_mb", "seconds"} per replaced browser
+        self.recycles = []
+        self._last_sample = {}
+        self._warned = set()
+        self._lock = threading.Lock()
+
+    def check(self, driver, restore=None):
+        """
+        Samples the driver's browser, if it wasn't sampled in the last `interval` seconds, and
+        replaces it if it's over the limit, then calls `restore()` to get the session back.
+        Returns True if the browser was replaced.
+        """
+        now = time.monotonic()
+        key = id(driver)
+        with self._lock:
+            if now - self._last_sample.get(key, -self.interval) < self.interval:
+                return False
+            self._last_sample[key] = now
+
+        rss = browser_rss(driver)
+        if rss is None:
+            return False
+        browser_mb = rss / _MB
+        bot_mb = (process_rss(os.getpid()) or 0) / _MB
+        with self._lock:
+            self.samples.append((time.time(), round(browser_mb, 1), round(bot_mb, 1)))
+        trace_counter("memory", browser_mb=round(browser_mb, 1), bot_mb=round(bot_mb, 1))
+
+        if browser_mb < self.limit_mb:
+            return False
+        if not isinstance(driver, RecyclableDriver):
+            if key not in self._warned:
+                self._warned.add(key)
+                logging.warning(f"🧠 The browser uses {browser_mb:.0f} MB (limit {self.limit_mb} MB), "
+                                f"but this session's browser can't be replaced.")
+            return False
+        self.recycle(driver, restore, browser_mb)
+        return True
+
+    def recycle(self, driver, restore, before_mb):
+        logging.warning(f"🧠 The browser uses {before_mb:.0f} MB (limit {self.limit_mb} MB). "
+                        f"Replacing it with a fresh one...")
+        started = time.perf_counter()
+        with span("memory.recycle", before_mb=round(before_mb, 1)) as step:
+            driver.recycle()
+            if restore is not None:
+                restore()
+            after = browser_rss(driver)
+            after_mb = round(after / _MB, 1) if after else None
+            step.set(after_mb=after_mb)
+        seconds = time.perf_counter() - started
+        with self._lock:
+            self._last_sample[id(driver)] = time.monotonic()
+            self.recycles.append({"time": time.time(), "before_mb": round(before_mb, 1), "after_mb": after_mb,
+                                  "seconds": round(seconds, 2)})
+        after_text = f"{after_mb:.0f} MB" if after_mb is not None else "unknown"
+        logging.info(f"🧠 Browser replaced and session restored in {seconds:.1f} s (now {after_text}).")
+
+    def metrics(self):
+        """ The samples and replacements so far, for run reports. """
+        with self._lock:
+            samples = list(self.samples)
+            recycles = list(self.recycles)
+        return {
+            "limit_mb": self.limit_mb,
+            "peak_browser_mb": max((sample[1] for sample in samples), default=None),
+            "peak_bot_mb": max((sample[2] for sample in samples), default=None),
+            "recycles": recycles,
+            "samples": samples,
+        }
+
+
+def start_memory_governor(limit_mb, interval=GOVERNOR_INTERVAL):
+    """ Starts governing the memory of every session's browser and returns the MemoryGovernor. """
+    global _governor
+    _governor = MemoryGovernor(limit_mb, interval)
+    logging.info(f"🧠 Browsers are replaced once they use more than {limit_mb} MB.")
+    return _governor
+
+
+def stop_memory_governor():
+    """ Stops the governor and logs its summary. Returns the MemoryGovernor, or None if none was running. """
+    global _governor
+    governor, _governor = _governor, None
+    if governor is None:
+        return None
+    metrics = governor.metrics()
+    if metrics["samples"]:
+        logging.info(f"🧠 Memory: browser peaked at {metrics['peak_browser_mb']:.0f} MB, the bot at "
+                     f"{metrics['peak_bot_mb']:.0f} MB; {len(metrics['recycles'])} browser replacements.")
+    return governor
+
+
+def memory_governor():
+    """ Returns the running MemoryGovernor, or None. """
+    return _governor
+
+
+def memory_checkpoint(driver, restore=None):
+    """
+    A safe point between steps: lets the running governor sample the browser and replace
+    it if needed (calling `restore()` afterwards). Does nothing while no governor runs.
+    """
+    governor = _governor
+    if governor is not None:
+        governor.check(driver, restore)
+
+
+def launch_recyclable(factory):
+    """ Launches a driver with `factory`; while a governor runs, as a RecyclableDriver it can replace. """
+    if _governor is None:
+        return factory()
+    return RecyclableDriver(factory)
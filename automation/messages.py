@@ -0,0 +1,123 @@
+"""
+Classification of the portal's toast messages.
+
+Every known message is an entry of a pattern table mapping a regular expression
+to an Outcome. The table is compiled once; the first entry whose pattern is
+found in a message decides its outcome. New server messages only need a table
+entry, either here or in a JSON file named by MESSAGE_PATTERNS:
+
+    [{"pattern": "ظرفیت.*پر شده", "outcome": "capacity_full"}]
+
+Patterns must be valid both as Python and as JavaScript regular expressions,
+since the toast watcher uses the same table to decide which toasts to wait for.
+"""
+
+import json
+import logging
+import re
+from collections import namedtuple
+from enum import Enum
+
+
+class Outcome(str, Enum):
+    """What a portal message means for the current step."""
+
+    REGISTERED = 'registered'
+    CONFLICT = 'conflict'
+    CREDIT_LIMIT = 'credit_limit'
+    NOT_ALLOWED = 'not_allowed'
+    CAPACITY_FULL = 'capacity_full'
+    EVALUATION_INCOMPLETE = 'evaluation_incomplete'
+    NOT_ACTIVE = 'not_active'
+    UNKNOWN = 'unknown'
+
+    def __str__(self):
+        return self.value
+
+
+# The outcome of a message, with the raw text (None when no message showed up)
+Classification = namedtuple('Classification', ['outcome', 'text'])
+
+NO_MESSAGE = Classification(Outcome.UNKNOWN, None)
+
+# Outcomes answering "Registration Operations" and an add-course click respectively
+NAVIGATION_OUTCOMES = (Outcome.EVALUATION_INCOMPLETE, Outcome.NOT_ACTIVE)
+REGISTRATION_OUTCOMES = (Outcome.REGISTERED, Outcome.CONFLICT, Outcome.CREDIT_LIMIT,
+                         Outcome.NOT_ALLOWED, Outcome.CAPACITY_FULL)
+# The answers a click on a course cell can produce. A late "registered" or "credit limit"
+# toast there can only belong to the previous course's group click, so it is not waited for.
+COURSE_CLICK_OUTCOMES = (Outcome.NOT_ALLOWED, Outcome.CONFLICT, Outcome.CAPACITY_FULL)
+
+# Toast texts (or distinctive parts of them) shown by the portal, checked in order
+DEFAULT_MESSAGE_PATTERNS = [
+    ('براي دروس زير ارزيابي انجام نداده ايد', Outcome.EVALUATION_INCOMPLETE),
+    ('در حال حاضر ثبت نام برای این دانشجو فعال نیست', Outcome.NOT_ACTIVE),
+    ('شما اجازه ثبت نام در هیچ کدامشان را ندارید', Outcome.NOT_ALLOWED),
+    ('تعداد واحد اخذ شده بیش از حد مجاز است', Outcome.CREDIT_LIMIT),
+    ('ثبت نام در کلاس با موفقیت انجام شد', Outcome.REGISTERED),
+    ('برخورد ساعات تشکیل', Outcome.CONFLICT),
+]
+
+
+class MessageClassifier:
+    """A compiled pattern table."""
+
+    def __init__(self, patterns=DEFAULT_MESSAGE_PATTERNS):
+        self.patterns = [(re.compile(pattern), Outcome(outcome)) for pattern, outcome in patterns]
+
+    def add_patterns(self, patterns):
+        """ Adds patterns checked before the existing ones, so they can also override them. """
+        self.patterns[:0] = [(re.compile(pattern), Outcome(outcome)) for pattern, outcome in patterns]
+
+    def classify(self, text):
+        """ Returns the Classification of one message (Outcome.UNKNOWN if no pattern matches). """
+        for pattern, outcome in self.patterns:
+            if pattern.search(text):
+                return Classification(outcome, text)
+        return Classification(Outcome.UNKNOWN, text)
+
+    def classify_first(self, texts):
+        """ Returns the Classification of the first recognized message, or NO_MESSAGE. """
+        for text in texts:
+            classification = self.classify(text)
+            if classification.outcome is not Outcome.UNKNOWN:
+                return classification
+        return NO_MESSAGE
+
+    def sources(self, outcomes):
+        """ The pattern sources for the given outcomes, to pass to the toast watcher. """
+        return [pattern.pattern for pattern, outcome in self.patterns if outcome in outcomes]
+
+
+def load_message_patterns(path):
+    """
+    Reads extra patterns from a JSON list of {"pattern": ..., "outcome": ...} objects.
+    Raises ValueError for unknown outcomes or invalid patterns.
+    """
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    patterns = []
+    for entry in entries:
+        try:
+            re.compile(entry['pattern'])
+            patterns.append((entry['pattern'], Outcome(entry['outcome'])))
+        except (KeyError, re.error, ValueError) as e:
+            raise ValueError(f"Invalid message pattern {entry!r} in {path}: {e}")
+    return patterns
+
+
+# The classifier used by the registration flow
+classifier = MessageClassifier()
+
+
+def configure_message_patterns(path):
+    """ Adds the patterns from the JSON file at `path` to the flow's classifier. """
+    extra = load_message_patterns(path)
+    classifier.add_patterns(extra)
+    logging.info(f"📝 Loaded {len(extra)} extra message patterns from {path}.")
+    return classifier
+
+
+def classify_message(text):
+    """ Returns the Outcome of one message with the configured classifier. """
+    return classifier.classify(text).outcome
@@ -0,0 +1,188 @@
+"""
+Parallel registration over several authenticated sessions.
+
+The course list is split across N browser sessions, each running the normal
+flow in its own thread. The sessions share a small state object: a credit-limit
+stop in one of them stops all of them, a course settled (registered,
+conflicting or not allowed) by one session is dropped by the others, and the
+credits left under the ceiling are one budget that every session plans from.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .driver_factory import create_driver
+from .memory import launch_recyclable
+from .plan import parse_course_plan, format_course_plan
+from .planner import choose_courses
+from .sess_client import SESS_URL
+from .workflow import run_registration
+
+
+class SharedRegistrationState:
+    """State shared by all sessions of a parallel run."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.settled = set()
+        self.registered = set()
+        # Credits under the ceiling no session has claimed, set by the first session to read
+        # the budget; claims maps the courses being attempted to (session, credits)
+        self.credits_left = None
+        self.claims = {}
+        self.released = threading.Condition(self.lock)
+
+    def settle(self, course_id, registered=False):
+        """Marks a course as settled. Returns True if no session had settled it yet."""
+        with self.lock:
+            if registered:
+                self.registered.add(course_id)
+            if course_id in self.settled:
+                return False
+            self.settled.add(course_id)
+            return True
+
+    def claim_credits(self, owner, plan, credits, budget):
+        """
+        Splits `plan` into (chosen, deferred) like planner.choose_courses, but within the
+        credits no session has claimed yet, and claims the chosen courses' credits for
+        `owner`. Courses another session has claimed are chosen without claiming them again,
+        and settled ones are dropped. While nothing fits and other sessions still hold claims, waits for them to be released.
+        """
+        with self.released:
+            if self.credits_left is None:
+                self.credits_left = budget
+            plan = [course for course in plan if course.course_id not in self.settled]
+            while True:
+                held = [course for course in plan if course.course_id in self.claims]
+                chosen, deferred = choose_courses([course for course in plan if course.course_id not in self.claims],
+                                                  credits, self.credits_left)
+                others = any(claimant != owner for claimant, _ in self.claims.values())
+                if chosen or held or not deferred or not others or self.stop_event.is_set():
+                    break
+                self.released.wait(timeout=1.0)
+            for course in chosen:
+                cost = credits.get(course.course_id) or 0
+                self.claims[course.course_id] = (owner, cost)
+                self.credits_left -= cost
+            chosen_ids = {course.course_id for course in chosen + held}
+            return [course for course in plan if course.course_id in chosen_ids], deferred
+
+    def release_credits(self, owner, course_ids):
+        """
+        Ends `owner`'s claims on `course_ids`: the credits of courses that weren't
+        registered (by any session) go back to the shared budget.
+        """
+        with self.released:
+            for course_id in course_ids:
+                claimant, cost = self.claims.get(course_id, (None, 0))
+                if claimant != owner:
+                    continue
+                del self.claims[course_id]
+                if course_id not in self.registered:
+                    self.credits_left += cost
+            self.released.notify_all()
+
+
+class WorkerProgress:
+    """One session's view of the shared state, plus its own throughput counters."""
+
+    def __init__(self, shared, name):
+        self.shared = shared
+        self.name = name
+        self.attempts = 0
+        self.registered = 0
+        self.started = None
+        self.finished = None
+
+    @property
+    def stopped(self):
+        return self.shared.stop_event.is_set()
+
+    def stop(self):
+        self.shared.stop_event.set()
+
+    def is_settled(self, course_id):
+        return course_id in self.shared.settled
+
+    def settle(self, course_id, registered=False):
+        if self.shared.settle(course_id, registered) and registered:
+            self.registered += 1
+
+    def choose_courses(self, plan, credits, budget):
+        return self.shared.claim_credits(self.name, plan, credits, budget)
+
+    def release_credits(self, course_ids):
+        self.shared.release_credits(self.name, course_ids)
+
+    def attempted(self):
+        self.attempts += 1
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def attempts_per_second(self):
+        return self.attempts / self.elapsed if self.elapsed else 0.0
+
+
+def split_courses(course_list, sessions, redundancy=1):
+    """
+    Deals the courses (highest priority first) round-robin over the sessions, so every
+    session starts with a high-priority course. With `redundancy` > 1 each course goes to that many sessions.
+    """
+    shares = [[] for _ in range(sessions)]
+    for index, course in enumerate(course_list):
+        for copy in range(min(redundancy, sessions)):
+            shares[(index + copy) % sessions].append(course)
+    return [share for share in shares if share]
+
+
+def register_in_parallel(username, password, courses_str, semester, sessions=2, redundancy=1,
+                         driver_factory=create_driver, opens_at=None, use_http_engine=False,
+                         sess_url=SESS_URL, max_credits=None):
+    """
+    Runs the registration flow in `sessions` browser sessions at once, each on its share
+    of the course list. Returns the WorkerProgress of every session.
+    """
+    course_list = parse_course_plan(courses_str)
+    # Each session parses its own copy, so sessions don't share a course's current alternate
+    shares = [format_course_plan(share) for share in split_courses(course_list, sessions, redundancy)]
+    shared = SharedRegistrationState()
+    workers = [WorkerProgress(shared, f"session-{index + 1}") for index in range(len(shares))]
+
+    def work(progress, share):
+        driver = None
+        try:
+            driver = launch_recyclable(driver_factory)
+            progress.started = time.perf_counter()
+            logging.info(f"🚀 [{progress.name}] Starting with courses: {share}")
+            run_registration(driver, username, password, share, semester, opens_at=opens_at,
+                             use_http_engine=use_http_engine, progress=progress, sess_url=sess_url,
+                             max_credits=max_credits, stop_event=shared.stop_event)
+        except SystemExit as e:
+            # Critical portal errors (e.g. incomplete evaluations) apply to every session
+            logging.critical(f"❌ [{progress.name}] Process terminated: {e}")
+            progress.stop()
+        except Exception as e:
+            logging.error(f"❌ [{progress.name}] Session failed: {e}")
+        finally:
+            progress.finished = time.perf_counter()
+            if driver:
+                driver.quit()
+
+    logging.info(f"🔀 Registering {len(course_list)} courses over {len(shares)} parallel sessions.")
+    with ThreadPoolExecutor(max_workers=len(shares), thread_name_prefix="registration") as pool:
+        for progress, share in zip(workers, shares):
+            pool.submit(work, progress, share)
+
+    for progress in workers:
+        logging.info(f"📊 [{progress.name}] {progress.attempts} attempts, {progress.registered} registered "
+                     f"in {progress.elapsed:.1f} s ({progress.attempts_per_second:.2f} attempts/s).")
+    return workers
@@ -0,0 +1,129 @@
+"""
+The course plan: which courses to register, in which order, with which fallbacks.
+
+The COURSES setting is parsed once into Course objects. Each entry has the form
+
+    unit_code:group[:subgroup][|group[:subgroup]...][@priority]
+
+for example `190131034:1|2` (group 1, else group 2) or `190130018:1:1|1:2@5`.
+Alternates are tried in order when a group conflicts or isn't allowed. Courses
+with a higher priority are attempted first; without an explicit priority,
+earlier entries come first.
+"""
+
+
+class Course:
+    """One course of the plan, with its alternate groups and the one currently tried."""
+
+    __slots__ = ('course_id', 'priority', 'options', 'option_index', 'explicit_priority')
+
+    def __init__(self, course_id, options, priority=0, explicit_priority=False):
+        self.course_id = course_id
+        # (group, subgroup) pairs; subgroup is None when the entry didn't give one
+        self.options = options
+        self.option_index = 0
+        self.priority = priority
+        self.explicit_priority = explicit_priority
+
+    @property
+    def group_code(self):
+        return self.options[self.option_index][0]
+
+    @property
+    def sub_group(self):
+        # Default to '0' when no subgroup was given
+        return self.options[self.option_index][1] or '0'
+
+    def ident(self, semester_code):
+        """ The `ident` attribute of the group row for the option currently tried. """
+        return f"{semester_code}:{self.course_id}:{self.group_code}:{self.sub_group}"
+
+    @property
+    def option_key(self):
+        """ "course:group:subgroup" for the option currently tried. """
+        return f"{self.course_id}:{self.group_code}:{self.sub_group}"
+
+    def option_keys(self):
+        """ "course:group:subgroup" for every option, in order (a group row's ident minus the semester). """
+        return [f"{self.course_id}:{group}:{sub or '0'}" for group, sub in self.options]
+
+    def advance(self):
+        """ Switches to the next alternate group. Returns False if there is none left. """
+        if self.option_index + 1 >= len(self.options):
+            return False
+        self.option_index += 1
+        return True
+
+    def rewind(self):
+        """ Goes back to the first group, to cycle through the options again. """
+        self.option_index = 0
+
+    @property
+    def alternates(self):
+        """ The options after the first, in COURSES syntax (e.g. "2|3:1"). """
+        return '|'.join(_option_spec(option) for option in self.options[1:])
+
+    def __str__(self):
+        spec = f"{self.course_id}:" + '|'.join(_option_spec(option) for option in self.options)
+        if self.explicit_priority:
+            spec += f"@{self.priority}"
+        return spec
+
+    def __repr__(self):
+        return f"Course({str(self)!r}, priority={self.priority})"
+
+
+def _option_spec(option):
+    group, sub = option
+    return f"{group}:{sub}" if sub is not None else group
+
+
+def parse_course(entry, default_priority=0):
+    """
+    Parses one COURSES entry into a Course. Raises ValueError for malformed entries.
+    """
+    entry = entry.strip()
+    spec, _, priority = entry.partition('@')
+    course_id, _, groups = spec.partition(':')
+    if not course_id or not groups:
+        raise ValueError(f"Invalid course entry '{entry}'. Expected unit_code:group[:subgroup].")
+
+    options = []
+    for option in groups.split('|'):
+        group, _, sub = option.strip().partition(':')
+        if not group:
+            raise ValueError(f"Invalid group '{option}' in course entry '{entry}'.")
+        options.append((group, sub or None))
+
+    if priority:
+        try:
+            return Course(course_id.strip(), options, int(priority), explicit_priority=True)
+        except ValueError:
+            raise ValueError(f"Invalid priority '{priority}' in course entry '{entry}'.")
+    return Course(course_id.strip(), options, default_priority)
+
+
+def parse_course_plan(courses):
+    """
+    Parses a COURSES string (or a list of entries / Course objects) into Courses,
+    ordered by priority, highest first. Duplicate course ids keep their first entry.
+    """
+    if not courses:
+        return []
+    if isinstance(courses, str):
+        courses = [entry for entry in courses.split(',') if entry.strip()]
+
+    plan = {}
+    count = len(courses)
+    for index, entry in enumerate(courses):
+        # Without an explicit priority, earlier entries rank higher
+        course = entry if isinstance(entry, Course) else parse_course(entry, default_priority=count - index)
+        plan.setdefault(course.course_id, course)
+
+    # sorted() is stable, so equal priorities keep their COURSES order
+    return sorted(plan.values(), key=lambda course: -course.priority)
+
+
+def format_course_plan(plan):
+    """ Turns Courses back into a COURSES string. """
+    return ','.join(str(course) for course in plan)
@@ -0,0 +1,152 @@
+"""
+Credit-budget aware course selection.
+
+The portal stops every registration beyond the student's credit ceiling with
+"تعداد واحد اخذ شده بیش از حد مجاز است". Instead of finding that out mid-run,
+the planner reads each course's credits and the ceiling from the registration
+page once, and picks the subset of courses with the highest total priority
+that fits the remaining budget (a 0/1 knapsack over credits). Only that subset
+is attempted; the rest are deferred and reconsidered if a chosen course fails.
+
+Where the page shows credits and the ceiling (CREDITS_SELECTOR, MAX_CREDITS_SELECTOR,
+see automation.portal) was modeled on the mock portal. Until those are confirmed
+on the live portal, set MAX_CREDITS; courses whose credits can't be read are
+always attempted.
+"""
+
+import logging
+import re
+from collections import namedtuple
+
+from .messages import Outcome
+from .portal import page_layout
+
+# Offered courses' credits, registered courses' credits and the ceiling, in one call
+SCAN_CREDITS_JS = """
+var layout = arguments[0];
+var text = function (root, selector) {
+  var el = root && root.querySelector(selector);
+  return el ? el.textContent : null;
+};
+var offered = {};
+document.querySelectorAll('td.label-link[addnewcrs]').forEach(function (cell) {
+  offered[cell.getAttribute('addnewcrs')] = text(cell.closest('tr'), layout.CREDITS_SELECTOR);
+});
+var registered = Array.prototype.map.call(
+  document.querySelectorAll(layout.REGISTERED_COURSES_SELECTOR + ' tr[' + layout.REGISTERED_COURSE_ATTRIBUTE + ']'),
+  function (row) { return text(row, layout.CREDITS_SELECTOR); });
+return [offered, registered, text(document, layout.MAX_CREDITS_SELECTOR)];
+"""
+
+CreditBudget = namedtuple('CreditBudget', ['credits', 'taken', 'max_credits'])
+
+_NUMBER = re.compile(r'\d+')
+
+
+def _number(text):
+    # Python's int() reads Persian digits too
+    found = _NUMBER.search(text or '')
+    return int(found.group()) if found else None
+
+
+def read_credit_budget(driver, max_credits=None):
+    """
+    Reads the credits of every offered course, the credits already taken and the
+    ceiling (unless `max_credits` overrides it) from the registration page.
+    """
+    offered, registered, ceiling = driver.execute_script(SCAN_CREDITS_JS, page_layout())
+    credits = {course_id: _number(text) for course_id, text in offered.items()}
+    if credits and all(value is None for value in credits.values()):
+        logging.warning("⚠️ No course credits found on the page (check CREDITS_SELECTOR); every course will be attempted.")
+    unread = sum(1 for text in registered if _number(text) is None)
+    if unread:
+        logging.warning(f"⚠️ Credits of {unread} registered courses couldn't be read (check CREDITS_SELECTOR); "
+                        f"they count as 0 toward the ceiling.")
+    taken = sum(_number(text) or 0 for text in registered)
+    if max_credits is None:
+        max_credits = _number(ceiling)
+    return CreditBudget(credits, taken, max_credits)
+
+
+def choose_courses(plan, credits, budget):
+    """
+    Splits the plan into (chosen, deferred): the chosen courses have the highest total
+    priority whose credits fit in `budget`, and keep their priority order. Courses with
+    unknown credits are always chosen.
+    """
+    known = [course for course in plan if credits.get(course.course_id) is not None]
+    budget = max(budget, 0)
+
+    # best[i][b]: highest total priority using the first i courses within b credits
+    best = [[0] * (budget + 1)]
+    for course in known:
+        weight, value = credits[course.course_id], max(course.priority, 1)
+        previous = best[-1]
+        best.append([
+            max(previous[b], previous[b - weight] + value) if weight <= b else previous[b]
+            for b in range(budget + 1)
+        ])
+
+    # Walk back through the table to recover the chosen courses
+    picked = set()
+    b = budget
+    for i in range(len(known), 0, -1):
+        if best[i][b] != best[i - 1][b]:
+            course = known[i - 1]
+            picked.add(course.course_id)
+            b -= credits[course.course_id]
+
+    chosen = [course for course in plan if course.course_id in picked or credits.get(course.course_id) is None]
+    deferred = [course for course in known if course.course_id not in picked]
+    return chosen, deferred
+
+
+def register_within_budget(driver, courses, register, max_credits=None, progress=None):
+    """
+    Registers `courses` (the plan, highest priority first) without going over the credit
+    ceiling. `register(chosen)` runs one registration pass and returns its results dict.
+    Courses that didn't fit are reconsidered with whatever budget failed picks left over.
+    With a `progress` (see automation.parallel), the picks are made through its
+    choose_courses/release_credits hooks, so sessions running at once share one budget.
+    Returns the merged results.
+    """
+    try:
+        budget = read_credit_budget(driver, max_credits)
+    except Exception as e:
+        logging.warning(f"⚠️ Could not read course credits ({e}). Registering without a credit plan.")
+        return register(courses)
+    if budget.max_credits is None:
+        logging.info("ℹ️ Credit ceiling not found on the page (set MAX_CREDITS to plan around it). "
+                     "Registering without a credit plan.")
+        return register(courses)
+
+    choose = progress.choose_courses if progress is not None else choose_courses
+    results = {}
+    taken = budget.taken
+    remaining = list(courses)
+    while remaining:
+        chosen, deferred = choose(remaining, budget.credits, budget.max_credits - taken)
+        if deferred:
+            logging.info(f"🧮 {budget.max_credits - taken} credits left: attempting "
+                         f"{', '.join(course.course_id for course in chosen) or 'nothing'}; deferring "
+                         f"{', '.join(course.course_id for course in deferred)}.")
+        if not chosen:
+            break
+
+        try:
+            round_results = register(chosen)
+        finally:
+            if progress is not None:
+                progress.release_credits([course.course_id for course in chosen])
+        results.update(round_results)
+        taken += sum(budget.credits.get(course_id) or 0
+                     for course_id, outcome in round_results.items() if outcome is Outcome.REGISTERED)
+        remaining = deferred
+        if Outcome.CREDIT_LIMIT in round_results.values() or (progress is not None and progress.stopped):
+            break
+
+    if remaining:
+        logging.warning(f"⚠️ Not attempted, over the credit limit: {', '.join(course.course_id for course in remaining)}")
+        for course in remaining:
+            results.setdefault(course.course_id, None)
+    return results
@@ -0,0 +1,40 @@
+"""
+Where the SESS portal lives, apart from the Selenium code so it can be used before Selenium loads.
+"""
+
+import os
+
+# Address of the SESS portal. Benchmarks point the bot at a local stand-in instead.
+SESS_URL = 'https://sess.sku.ac.ir/'
+
+# Endpoints, form fields and page elements the optional features rely on. The defaults
+# follow the local stand-in (tools/mock_portal.py) and have NOT been checked against the
+# live portal; each can be set with the environment variable of the same name (e.g. in
+# .env) once the real value is known from the browser's developer tools.
+PORTAL_DEFAULTS = {
+    # Requests sent by the registration page's JavaScript (HTTP engine)
+    'HTTP_SELECT_PATH': '/api/groups',
+    'HTTP_ADD_PATH': '/api/addcourse',
+    'HTTP_TOKEN_FIELD': '__RequestVerificationToken',
+    # Registration page: the meeting-times cell of each group row, and the table of
+    # registered courses, whose rows carry the course id in an attribute
+    'MEETING_TIMES_SELECTOR': 'td.crs-time',
+    'REGISTERED_COURSES_SELECTOR': '#registeredCourses',
+    'REGISTERED_COURSE_ATTRIBUTE': 'data-crs',
+    # Credit plan: the credits cell in course rows and registered-course rows, and the
+    # element showing the credit ceiling
+    'CREDITS_SELECTOR': 'td.crs-credits',
+    'MAX_CREDITS_SELECTOR': '#lblMaxCredits',
+    # Seat watch: the capacity cell of each group row, read as "enrolled/capacity"
+    'SEAT_CAPACITY_SELECTOR': 'td.crs-capacity',
+}
+
+
+def portal_setting(name):
+    """ Returns one of the PORTAL_DEFAULTS, or its environment variable if that is set. """
+    return os.getenv(name) or PORTAL_DEFAULTS[name]
+
+
+def page_layout():
+    """ All the settings as one object, passed to the page scripts that read them (`layout` there). """
+    return {name: portal_setting(name) for name in PORTAL_DEFAULTS}
@@ -0,0 +1,208 @@
+"""
+Recording real portal sessions for offline replay.
+
+While recording, a run saves what the portal showed and how fast it answered:
+
+- sanitized DOM snapshots of the login page, the home page, the registration
+  page and the page after registering
+- the group rows each course click revealed
+- every step's timing and portal message, taken from the tracer's spans (see
+  automation.tracing), e.g. how long the portal took to answer a group click
+- the course checker's answers, and the browser's resource timings
+
+Snapshots are sanitized in the page before they leave the browser: scripts,
+iframes, external stylesheets, event handlers and every input value are
+removed, and the anti-forgery token is replaced. The username, the password and
+any extra strings given (e.g. the student's name) are then redacted from the HTML.
+
+`python -m tools.replay_server <dir>` serves a recording back with its original
+timing, so new versions of the bot can be benchmarked against past registration days.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from . import tracing
+
+DEFAULT_RECORDING_DIR = "recording"
+RECORDING_FILE = "recording.json"
+# Steps whose timing and messages are kept
+RECORDED_STEPS = ("login", "navigate.click", "navigate.message_wait", "page.scan", "course.click",
+                  "course.message_wait", "group.click", "group.message_wait", "verify.scan", "unavailable.check")
+
+REDACTED = "REDACTED"
+
+# The page, sanitized, plus its load timing and the timing of every request it made
+_SNAPSHOT_JS = r"""
+var root = document.documentElement.cloneNode(true);
+root.querySelectorAll('script, noscript, iframe, object, embed, link[href], #toast-container').forEach(function (el) { el.remove(); });
+root.querySelectorAll('*').forEach(function (el) {
+  Array.prototype.slice.call(el.attributes).forEach(function (attr) {
+    if (/^on/i.test(attr.name)) { el.removeAttribute(attr.name); }
+  });
+});
+root.querySelectorAll('img[src], source[src], source[srcset]').forEach(function (el) {
+  el.removeAttribute('src');
+  el.removeAttribute('srcset');
+});
+root.querySelectorAll('input, textarea').forEach(function (el) {
+  if (el.name === '__RequestVerificationToken') {
+    el.setAttribute('value', 'replay');
+  } else {
+    el.removeAttribute('value');
+    el.textContent = '';
+  }
+});
+root.querySelectorAll('form').forEach(function (form) {
+  form.setAttribute('action', '/');
+  form.setAttribute('method', 'post');
+});
+var nav = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource')
+  .filter(function (entry) { return entry.initiatorType === 'fetch' || entry.initiatorType === 'xmlhttprequest'; })
+  .map(function (entry) {
+    return {path: new URL(entry.name).pathname, start: entry.startTime / 1000, duration: entry.duration / 1000};
+  });
+return {
+  html: '<!DOCTYPE html>\n' + root.outerHTML,
+  path: location.pathname,
+  page_load: nav ? (nav.responseEnd - nav.requestStart) / 1000 : null,
+  resources: resources
+};
+"""
+
+# The group rows currently on the page for one course
+_GROUP_ROWS_JS = r"""
+return Array.prototype.map.call(
+  document.querySelectorAll('tr[ident*=":' + arguments[0] + ':"]'),
+  function (row) { return row.outerHTML; });
+"""
+
+# The active SessionRecorder, or None while recording is off
+_recorder = None
+
+
+class SessionRecorder:
+    """Collects snapshots, group rows and checker answers, and writes them with the run's step timings."""
+
+    def __init__(self, path, redact=()):
+        self.path = path
+        self.redact = sorted({text for text in redact if text}, key=len, reverse=True)
+        self.started = time.time()
+        self.snapshots = []
+        self.group_rows = {}
+        self.checks = {}
+        self._lock = threading.Lock()
+        # Step timings come from the tracer: reuse the running one, or run one for the recording
+        self._own_tracer = not tracing.tracing_enabled()
+        self.tracer = tracing.start_tracing() if self._own_tracer else tracing.active_tracer()
+        os.makedirs(os.path.join(path, "snapshots"), exist_ok=True)
+
+    def _sanitize(self, html):
+        for text in self.redact:
+            html = html.replace(text, REDACTED)
+        return html
+
+    def snapshot(self, driver, step):
+        """ Saves the current page as `step`, once per step name. """
+        with self._lock:
+            if any(snapshot["step"] == step for snapshot in self.snapshots):
+                return
+            index = len(self.snapshots) + 1
+            # Reserve the step so concurrent sessions don't both save it
+            entry = {"step": step}
+            self.snapshots.append(entry)
+        page = driver.execute_script(_SNAPSHOT_JS)
+        file_name = f"snapshots/{index:02d}-{step}.html"
+        with open(os.path.join(self.path, file_name), 'w', encoding='utf-8') as f:
+            f.write(self._sanitize(page["html"]))
+        entry.update(file=file_name, path=page["path"], at=round(time.time() - self.started, 3),
+                     page_load_s=page["page_load"], resources=page["resources"])
+
+    def rows(self, driver, course_id):
+        """ Saves the group rows a course click revealed, once per course. """
+        if course_id in self.group_rows:
+            return
+        self.group_rows[course_id] = [self._sanitize(row) for row in driver.execute_script(_GROUP_ROWS_JS, course_id)]
+
+    def check(self, answers):
+        self.checks.update({course_id: self._sanitize(answer) for course_id, answer in answers.items() if answer})
+
+    def save(self):
+        """ Writes recording.json. Returns its path. """
+        steps = [
+            {"name": name, "start": round(start, 4), "duration": round(duration, 4),
+             **{key: self._sanitize(value) if isinstance(value, str) else value for key, value in args.items()}}
+            for name, start, duration, _, args in sorted(self.tracer.spans, key=lambda span: span[1])
+            if name in RECORDED_STEPS
+        ]
+        recording = {
+            "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+            "steps": steps,
+            "snapshots": [snapshot for snapshot in self.snapshots if "file" in snapshot],
+            "group_rows": self.group_rows,
+            "checks": self.checks,
+        }
+        target = os.path.join(self.path, RECORDING_FILE)
+        with open(target, 'w', encoding='utf-8') as f:
+            json.dump(recording, f, ensure_ascii=False, indent=1)
+        return target
+
+
+def recording_enabled():
+    return _recorder is not None
+
+
+def start_recording(path=DEFAULT_RECORDING_DIR, redact=()):
+    """ Starts recording the run into the directory `path`, redacting the `redact` strings. """
+    global _recorder
+    _recorder = SessionRecorder(path, redact)
+    logging.info(f"📼 Recording this session into {path}/")
+    return _recorder
+
+
+def stop_recording():
+    """ Stops recording and writes the recording. Returns its path, or None if nothing was recorded. """
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is None:
+        return None
+    if recorder._own_tracer:
+        tracing.stop_tracing()
+    try:
+        target = recorder.save()
+    except OSError as e:
+        logging.error(f"⚠️ Could not write the recording to {recorder.path}: {e}")
+        return None
+    logging.info(f"📼 Recorded {len(recorder.snapshots)} pages and {len(recorder.tracer.spans)} steps into {target}")
+    return target
+
+
+# The hooks below are called from the registration flow. While recording is off each
+# costs one global lookup; a failing hook never breaks the run it records.
+
+def record_snapshot(driver, step):
+    recorder = _recorder
+    if recorder is not None:
+        try:
+            recorder.snapshot(driver, step)
+        except Exception as e:
+            logging.debug(f"Recording snapshot '{step}' failed: {e}")
+
+
+def record_group_rows(driver, course_id):
+    recorder = _recorder
+    if recorder is not None:
+        try:
+            recorder.rows(driver, course_id)
+        except Exception as e:
+            logging.debug(f"Recording group rows of {course_id} failed: {e}")
+
+
+def record_checks(answers):
+    recorder = _recorder
+    if recorder is not None:
+        recorder.check(answers)
@@ -0,0 +1,169 @@
+"""
+Precise entry into the registration window.
+
+Instead of clicking "Registration Operations" every 10 seconds, the scheduler
+logs in early, estimates the offset between the local clock and the portal's
+clock from HTTP `Date` headers, keeps the session warm while it waits, and polls
+more and more often as the announced opening time approaches.
+"""
+
+import logging
+import math
+import time
+from collections import namedtuple
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+import urllib3
+
+from .sess_client import SessionExpired, try_enter_registration_page
+from .tracing import span
+
+ClockOffset = namedtuple('ClockOffset', ['offset', 'uncertainty', 'rtt'])
+ScheduleResult = namedtuple('ScheduleResult', ['clock', 'entry_latency', 'attempts'])
+
+# Start clicking this many seconds before the opening time
+FIRST_POLL_LEAD = 30
+# Seconds between keep-alive requests while waiting for the window
+KEEPALIVE_INTERVAL = 120
+
+_KEEPALIVE_JS = """
+var done = arguments[arguments.length - 1];
+fetch(location.href, {credentials: 'same-origin', cache: 'no-store'})
+  .then(function (r) { done([r.status, r.redirected]); }, function () { done([0, false]); });
+"""
+
+
+def parse_opening_time(text):
+    """
+    Parses "YYYY-MM-DD HH:MM[:SS]" or "HH:MM[:SS]" (today) in local time into a Unix timestamp.
+    """
+    text = text.strip()
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            pass
+    for fmt in ("%H:%M:%S", "%H:%M"):
+        try:
+            clock = datetime.strptime(text, fmt).time()
+            return datetime.combine(datetime.now().date(), clock).timestamp()
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid opening time '{text}'. Use 'YYYY-MM-DD HH:MM:SS' or 'HH:MM:SS'.")
+
+
+def estimate_clock_offset(url, samples=8):
+    """
+    Estimates `server clock - local clock` from the `Date` header of several requests.
+
+    Each response bounds the offset: the server read its clock somewhere between
+    sending and receiving (RTT compensation), and the header truncates it to a
+    whole second. Intersecting those bounds, and timing later requests to land on
+    the server's next second boundary, narrows the estimate well below one second.
+    """
+    http = urllib3.PoolManager(num_pools=1, retries=False, timeout=urllib3.Timeout(connect=5, read=5))
+    low, high = -math.inf, math.inf
+    rtts = []
+    try:
+        for _ in range(samples):
+            if rtts and low > -math.inf:
+                # Aim the request at the server's next second boundary, as the current estimate sees it
+                estimate = (low + high) / 2
+                rtt = min(rtts)
+                boundary = math.floor(time.time() + estimate + rtt) + 1
+                time.sleep(max(0.0, boundary - estimate - rtt / 2 - time.time()))
+
+            sent = time.time()
+            response = http.request('GET', url, redirect=False, preload_content=True)
+            received = time.time()
+            date_header = response.headers.get('Date')
+            if not date_header:
+                continue
+            server_second = parsedate_to_datetime(date_header).timestamp()
+
+            rtts.append(received - sent)
+            sample_low, sample_high = server_second - received, server_second + 1 - sent
+            if sample_low > high or sample_high < low:
+                # Inconsistent with earlier samples (the server's clock stepped); start over from this one
+                low, high = sample_low, sample_high
+            else:
+                low, high = max(low, sample_low), min(high, sample_high)
+    finally:
+        http.clear()
+
+    if not rtts:
+        raise RuntimeError("The portal did not send a Date header; cannot estimate the clock offset.")
+    return ClockOffset((low + high) / 2, (high - low) / 2, min(rtts))
+
+
+def keep_session_warm(driver):
+    """
+    Fetches the current page in the background so the portal session doesn't idle out.
+    Returns the HTTP status; raises SessionExpired if the session was already gone.
+    """
+    status, redirected = driver.execute_async_script(_KEEPALIVE_JS)
+    # The home page is only redirected away from (to the login page) once the session is gone
+    if status in (401, 403) or redirected:
+        raise SessionExpired(f"the keep-alive request was {'redirected' if redirected else f'answered HTTP {status}'}")
+    return status
+
+
+def poll_interval(remaining):
+    """ Seconds to wait between attempts, given the seconds left until the opening time. """
+    if remaining > 10:
+        return 2.0
+    if remaining > 3:
+        return 0.5
+    if remaining > -30:
+        return 0.2
+    # The window should be open by now; back off gently if the portal is late
+    return min(2.0, -remaining / 60)
+
+
+def wait_for_registration_window(driver, opens_at, clock=None, keepalive_interval=KEEPALIVE_INTERVAL,
+                                 checkpoint=None, stop_event=None):
+    """
+    Waits for the registration window opening at `opens_at` (Unix time, server clock)
+    and enters the registration page as soon as it opens. The driver must be logged in.
+    `checkpoint()`, if given, is called after each keep-alive, far from the opening.
+    Returns None without entering if `stop_event` is set while waiting.
+    """
+    def pause(seconds):
+        # True if the wait was cut short by `stop_event`
+        if stop_event is None:
+            time.sleep(seconds)
+            return False
+        return stop_event.wait(seconds)
+
+    if clock is None:
+        with span("schedule.clock_sync"):
+            clock = estimate_clock_offset(driver.current_url)
+    logging.info(f"🕒 Server clock offset: {clock.offset * 1000:+.0f} ms "
+                 f"(±{clock.uncertainty * 1000:.0f} ms, RTT {clock.rtt * 1000:.0f} ms).")
+
+    attempts = 0
+    while True:
+        remaining = opens_at - (time.time() + clock.offset)
+
+        if remaining > FIRST_POLL_LEAD:
+            # Far from the opening: sleep in chunks and keep the session alive in between
+            if pause(min(remaining - FIRST_POLL_LEAD, keepalive_interval)):
+                return None
+            if opens_at - (time.time() + clock.offset) > FIRST_POLL_LEAD:
+                status = keep_session_warm(driver)
+                logging.info(f"💤 {remaining / 60:.1f} min until registration opens (keep-alive status {status}).")
+                if checkpoint is not None:
+                    checkpoint()
+            continue
+
+        attempts += 1
+        if try_enter_registration_page(driver):
+            entry_latency = time.time() + clock.offset - opens_at
+            logging.info(f"⏱️ Entered registration {entry_latency * 1000:+.0f} ms relative to the opening "
+                         f"(server clock) after {attempts} attempts.")
+            return ScheduleResult(clock, entry_latency, attempts)
+
+        with span("schedule.poll_wait"):
+            if pause(poll_interval(remaining)):
+                return None
@@ -1,230 +1,582 @@
 import logging
 from time import sleep
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
+from .messages import classifier, Outcome, COURSE_CLICK_OUTCOMES, NAVIGATION_OUTCOMES, REGISTRATION_OUTCOMES
+from .portal import SESS_URL, page_layout
+from .plan import parse_course_plan
+from .catalog import read_catalog
+from .recorder import record_checks, record_group_rows, record_snapshot
+from .course_checks import check_courses
+from .timetable import SCAN_GROUP_TIMES_JS, read_timetable
+from .toasts import mark_toasts, wait_for_toasts
+from .tracing import span
+
+# Present once the registration page (course cells) is showing
+REGISTRATION_PAGE_MARKER = "td.label-link[addnewcrs]"
+
+# Reads the registered-courses table and the course cells still offered at once; arguments[0] is
+# the page layout. Returns null when neither is on the page (e.g. the session was sent back to the login page).
+SCAN_REGISTRATION_STATE_JS = """
+var layout = arguments[0];
+var attr = function (selector, name) {
+  return Array.prototype.map.call(document.querySelectorAll(selector), function (el) {
+    return el.getAttribute(name);
+  });
+};
+if (!document.querySelector(layout.REGISTERED_COURSES_SELECTOR + ', td.label-link[addnewcrs]')) { return null; }
+return [attr(layout.REGISTERED_COURSES_SELECTOR + ' tr[' + layout.REGISTERED_COURSE_ATTRIBUTE + ']', layout.REGISTERED_COURSE_ATTRIBUTE),
+        attr('td.label-link[addnewcrs]', 'addnewcrs')];
+"""
+
+# Why the session looks dead, or null: the login form is back, the page was redirected to a
+# login URL, or one of the page's own requests was answered 401/403 (Resource Timing keeps
+# the status of every fetch/XHR since the page loaded, so no hook has to be installed first).
+# Only requests that finished since the previous check count, so a single 403 isn't
+# reported again on every later check until the page reloads.
+SESSION_STATE_JS = """
+if (document.querySelector('input[name="edId"], #edPass')) { return 'the login form is showing'; }
+if (/(^|\\/)(login|logon|signin)/i.test(location.pathname)) { return 'redirected to ' + location.pathname; }
+var since = window.__sessCheckedAt || 0;
+window.__sessCheckedAt = performance.now();
+var denied = performance.getEntriesByType('resource').filter(function (entry) {
+  return entry.responseEnd > since &&
+    (entry.initiatorType === 'fetch' || entry.initiatorType === 'xmlhttprequest') &&
+    (entry.responseStatus === 401 || entry.responseStatus === 403);
+});
+return denied.length ? 'HTTP ' + denied[denied.length - 1].responseStatus + ' from the portal' : null;
+"""
+
+# The "Registration Operations" tile on the home page
+HOME_TILE_XPATH = "//div[@class='inner' and contains(., 'عملیات ثبت نام')]"
+
+# Upper bounds (seconds) for toast waits; the waits return as soon as a toast shows up
+NAVIGATION_TOAST_TIMEOUT = 3
+COURSE_TOAST_TIMEOUT = 2
+GROUP_TOAST_TIMEOUT = 3
+
+
+class SessionExpired(Exception):
+    """The portal sent the session back to the login page."""
+
+
+def session_problem(driver):
+    """
+    Returns why the portal session looks expired, or None if it looks alive, in one
+    script call. A page that can't be asked (e.g. mid-navigation) counts as alive.
+    """
+    try:
+        return driver.execute_script(SESSION_STATE_JS)
+    except Exception:
+        return None
+
 
+def ensure_session(driver):
+    """ Raises SessionExpired if the portal session looks expired. """
+    problem = session_problem(driver)
+    if problem:
+        raise SessionExpired(problem)
 
-def log_in(driver, username, password):
+
+def log_in(driver, username, password, sess_url=SESS_URL):
     """
     Logs into the university system using credentials passed as arguments.
     """
     if not username or not password:
         raise ValueError("SESS_USERNAME and SESS_PASSWORD must be set in the .env file.")
-    sess_url = 'https://sess.sku.ac.ir/'
-    
-    driver.get(sess_url)
-    sleep(0.5)
 
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.NAME, "edId"))).send_keys(username)
-    driver.find_element(By.ID, "edPass").send_keys(password)
-    sleep(0.5)
-    driver.find_element(By.ID, "edEnter").click()
+    with span("login"):
+        driver.get(sess_url)
+        record_snapshot(driver, "login")
+        sleep(0.5)
+
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.NAME, "edId"))).send_keys(username)
+        driver.find_element(By.ID, "edPass").send_keys(password)
+        sleep(0.5)
+        driver.find_element(By.ID, "edEnter").click()
 
 
-def navigate_to_registration_page(driver):
+def wait_for_home_page(driver, timeout=10):
     """
-    Clicks on "Registration Operations" and retries if registration is not active.
+    Waits for the home page after logging in. Raises SessionExpired if it doesn't show up,
+    e.g. because a wrong password brought the login form back.
     """
-    while True:
-        try:
-            # Click on "Registration Operations"
-            logging.info("🔄 Attempting to enter registration operations...")
-            WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[@class='inner' and contains(., 'عملیات ثبت نام')]"))
-            ).click()
-
-            # Wait a moment to see if an error message appears
-            sleep(1)
-
-            # Check for the CRITICAL "evaluation incomplete" error
-            evaluation_error_msg = driver.find_elements(By.XPATH, "//div[@class='toast-message' and contains(text(), 'براي دروس زير ارزيابي انجام نداده ايد')]")
-            if evaluation_error_msg:
-                logging.critical("❌ ERROR: Registration not allowed due to incomplete course evaluations.")
-                raise SystemExit("Incomplete course evaluations.") # Stop the entire script
-
-            # Check for the "registration not active" error
-            not_active_error_msg = driver.find_elements(By.XPATH, "//div[@class='toast-message' and contains(text(), 'در حال حاضر ثبت نام برای این دانشجو فعال نیست')]")
-            if not_active_error_msg:
-                logging.warning("⏳ Registration is not active. Waiting for 10 seconds before retrying...")
-                sleep(10)
-                continue # Retry the loop
-
-            # If no specific error messages are found, assume success
-            logging.info("✅ Successfully entered registration operations.")
-            break
-
-        except SystemExit as e:
-            # Re-raise the exception to ensure the script stops
-            raise e
-        except Exception as e:
-            # This handles cases where the page changes and the error message can't be found
-            logging.info("✅ Successfully entered registration operations (or page changed).")
-            break
+    try:
+        WebDriverWait(driver, timeout).until(EC.presence_of_element_located((By.XPATH, HOME_TILE_XPATH)))
+    except Exception:
+        ensure_session(driver)
+        raise SessionExpired("the home page didn't show up after logging in")
 
 
-def get_available_courses(driver, course_list_string):
+def registration_entry_allowed(texts):
     """
-    Checks if courses are available before attempting to register.
-    Returns a filtered list of available courses.
+    Reads the toasts shown after clicking "Registration Operations" (shared with automation.aio).
+    Raises SystemExit on incomplete course evaluations; returns False if registration is not
+    active yet, True otherwise.
     """
-    if not course_list_string:
-        logging.warning("⚠️ No courses found in the .env file. Please set the COURSES variable.")
-        return [], []
-        
-    course_list = [course.strip() for course in course_list_string.split(',')]
+    outcomes = {classifier.classify(text).outcome for text in texts}
 
-    available_courses = []
-    unavailable_courses = []
+    # Check for the CRITICAL "evaluation incomplete" error
+    if Outcome.EVALUATION_INCOMPLETE in outcomes:
+        logging.critical("❌ ERROR: Registration not allowed due to incomplete course evaluations.")
+        raise SystemExit("Incomplete course evaluations.") # Stop the entire script
+
+    # Check for the "registration not active" error
+    return Outcome.NOT_ACTIVE not in outcomes
 
-    for course_group in course_list:
-        course_id = course_group.split(':')[0]
+
+def try_enter_registration_page(driver):
+    """
+    Clicks on "Registration Operations" once.
+    Returns True if the registration page was entered, False if registration is not active yet.
+    """
+    try:
+        # Click on "Registration Operations"
+        logging.info("🔄 Attempting to enter registration operations...")
+        with span("navigate.click"):
+            tile = WebDriverWait(driver, 10).until(
+                EC.element_to_be_clickable((By.XPATH, HOME_TILE_XPATH))
+            )
+            record_snapshot(driver, "home")
+            mark_toasts(driver)
+            tile.click()
+
+        # Wait for a toast, or for the registration page to show up, whichever comes first
+        with span("navigate.message_wait") as step:
+            toasts = wait_for_toasts(driver, timeout=NAVIGATION_TOAST_TIMEOUT,
+                                     match=classifier.sources(NAVIGATION_OUTCOMES), until=REGISTRATION_PAGE_MARKER)
+            texts = [toast.text for toast in toasts]
+            step.set(messages=texts)
+        if not registration_entry_allowed(texts):
+            return False
+
+        # No message: the page changed, either to the registration page or back to the login page
+        ensure_session(driver)
+        logging.info("✅ Successfully entered registration operations.")
+        return True
+
+    except (SystemExit, SessionExpired) as e:
+        # Re-raise the exception to ensure the script stops (or logs in again)
+        raise e
+    except Exception as e:
+        # This handles cases where the page changes and the error message can't be found,
+        # unless it changed because the session expired (e.g. the tile click was sent to the login page)
+        ensure_session(driver)
+        logging.info("✅ Successfully entered registration operations (or page changed).")
+        return True
+
+
+def navigate_to_registration_page(driver, retry_interval=10, checkpoint=None, stop_event=None):
+    """
+    Clicks on "Registration Operations" and retries if registration is not active.
+    `checkpoint()`, if given, is called before each wait (see SessionGuard.checkpoint).
+    Returns True once the page is entered, or False if `stop_event` is set while waiting.
+    """
+    while not try_enter_registration_page(driver):
+        if checkpoint is not None:
+            checkpoint()
+        logging.warning(f"⏳ Registration is not active. Waiting for {retry_interval} seconds before retrying...")
+        with span("navigate.retry_wait"):
+            if stop_event is None:
+                sleep(retry_interval)
+            elif stop_event.wait(retry_interval):
+                return False
+    return True
+
+
+def read_registration_catalog(driver, semester_code=None, cache=None):
+    """
+    Gives the registration page a moment to render its course cells, then reads its
+    section catalog (see automation.catalog) in a single script call.
+    """
+    with span("page.scan"):
         try:
             WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located(
-                    (By.XPATH, f"//td[@class='label-link' and @addnewcrs='{course_id}']")
-                )
+                EC.presence_of_element_located((By.CSS_SELECTOR, REGISTRATION_PAGE_MARKER))
             )
-            available_courses.append(course_group)
         except Exception:
-            logging.warning(f"⚠️ Course {course_id} is not available for registration.")
-            unavailable_courses.append(course_group)
+            # An expired session would otherwise read as a page offering nothing
+            ensure_session(driver)
+            logging.warning("⚠️ No course cells found on the registration page.")
+        return read_catalog(driver, semester_code, cache=cache)
 
-    return available_courses, unavailable_courses
 
+def scan_registration_state(driver):
+    """
+    Reads the registered courses and the course cells still offered in a single script call.
+    Returns (set of registered course ids, set of offered course ids), or None if the
+    registration page isn't showing.
+    """
+    state = driver.execute_script(SCAN_REGISTRATION_STATE_JS, page_layout())
+    if state is None:
+        return None
+    registered, offered = state
+    return set(registered), set(offered)
 
-def handle_system_messages(driver, course_id, group_code, course_group, course_list):
+
+def confirmed_registrations(pending, state):
     """
-    Checks for system messages and handles different cases.
-    Returns False if the process should stop.
+    Returns the pending course ids the page shows as registered: in the registered
+    table, or with their cell gone from the offered courses. `state` is what
+    `scan_registration_state` returned.
     """
-    sleep(0.5)  # Wait for messages to appear
-    messages = driver.find_elements(By.XPATH, "//div[@class='toast-message']")
+    if state is None:
+        logging.warning("⚠️ The registration page is not showing; courses could not be verified.")
+        return []
 
-    for msg in messages:
-        message_text = msg.text.strip()
+    registered, offered = state
+    confirmed = [course_id for course_id in pending if course_id in registered or course_id not in offered]
+    still_available = [course_id for course_id in pending if course_id in offered and course_id not in registered]
+    if still_available:
+        logging.info(f"🔄 Still available: {', '.join(still_available)}. Trying again...")
+    return confirmed
 
-        # Case 1: Not allowed to register
-        if "شما اجازه ثبت نام در هیچ کدامشان را ندارید" in message_text:
-            logging.error(f"❌ Registration for course {course_id} with group {group_code} is not allowed. Removing from list.")
-            course_list.remove(course_group)
-            return True  # Continue process
 
-        # Case 2: Maximum credits reached -> STOP everything!
-        elif "تعداد واحد اخذ شده بیش از حد مجاز است" in message_text:
-            logging.critical("⚠️ Maximum allowed credits reached! Stopping registration process.")
-            return False  # Signal to stop the entire process
+def get_available_courses(driver, course_list_string, catalog=None):
+    """
+    Checks if courses are available before attempting to register.
+    `catalog` is the page's section catalog, if already read (see `read_registration_catalog`).
+    Returns the available and unavailable courses of the plan, highest priority first.
+    """
+    if not course_list_string:
+        logging.warning("⚠️ No courses found in the .env file. Please set the COURSES variable.")
+        return [], []
 
-        # Case 3: Successfully registered
-        elif "ثبت نام در کلاس با موفقیت انجام شد" in message_text:
-            logging.info(f"✅ Course {course_id} with group {group_code} successfully registered. Removing from list.")
-            course_list.remove(course_group)
-            return True  # Continue process
+    plan = parse_course_plan(course_list_string)
 
-        # Case 4: Time conflict with another course
-        elif "برخورد ساعات تشکیل" in message_text:
-            logging.warning(f"⏳ Course {course_id} (Group {group_code}) has a scheduling conflict. Removing from list.")
-            course_list.remove(course_group)
-            return True  # Continue process
+    if catalog is None:
+        catalog = read_registration_catalog(driver)
+    record_snapshot(driver, "registration")
+    return split_available_courses(plan, catalog)
 
-    return True  # Default: Continue process
 
+def split_available_courses(plan, catalog):
+    """ Splits the plan into the courses the catalog offers and the rest, warning about missing groups. """
+    available_courses = []
+    unavailable_courses = []
 
-def attempt_course_registration(driver, course_list, semester_code):
-    """
-    Handles the automated process of selecting and registering for courses.
-    """
-    if not semester_code:
-        raise ValueError("SEMESTER code must be set in the .env file.")
-    
-    # Continue attempting until all courses are processed
-    while course_list:
-        for course_group in course_list[:]:  # Iterate over a copy to allow modifications
-            
-            parts = course_group.split(':')
-            course_id = parts[0]
-            group_code = parts[1]
-            # Set sub_group to the third part if it exists, otherwise default to '0'
-            sub_group = parts[2] if len(parts) > 2 else '0'
-            
-            try:
-                # Attempt to select course
-                WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, f"//td[@class='label-link' and @addnewcrs='{course_id}']"))
-                ).click()
+    for course in plan:
+        if course.course_id in catalog.courses:
+            available_courses.append(course)
+            # Only known for courses with group rows on the page (rows may also be loaded only after a click)
+            if len(catalog.missing_groups(course)) == len(course.option_keys()):
+                logging.warning(f"⚠️ Course {course.course_id} is offered, but not in the requested groups ({course}).")
+        else:
+            logging.warning(f"⚠️ Course {course.course_id} is not available for registration.")
+            unavailable_courses.append(course)
 
-                # Check system messages for errors before selecting group
-                if not handle_system_messages(driver, course_id, group_code, course_group, course_list):
-                    continue  # Skip further processing if the course was removed
+    return available_courses, unavailable_courses
 
-                # Select group
-                WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, f"//tr[contains(@ident, '{semester_code}:{course_id}:{group_code}:{sub_group}')]"))
-                ).click()
 
-                logging.info(f"🔄 Attempting to register for course {course_id} (Group {group_code}, Sub-group {sub_group})...")
+def handle_system_messages(driver, timeout=GROUP_TOAST_TIMEOUT, until=None, outcomes=REGISTRATION_OUTCOMES):
+    """
+    Waits for the portal's answer to the last click and classifies it.
+    Only toasts that appeared since the last `mark_toasts` call are considered.
+    Returns a Classification (outcome and raw text); the outcome is Outcome.UNKNOWN
+    and the text None if no relevant message showed up.
+    """
+    # Wait for messages to appear, returning early on the first relevant one
+    toasts = wait_for_toasts(driver, timeout=timeout, match=classifier.sources(outcomes), until=until)
+    return classifier.classify_first(toast.text for toast in toasts)
 
-                # Check system messages for the result
-                if not handle_system_messages(driver, course_id, group_code, course_group, course_list):
-                    return  # Skip further checks if the course was removed
 
-            except:
-                logging.error(f"⚠️ Could not register for {course_id} (Group {group_code})")
+def run_registration_rounds(plan, register_option, progress=None, verify=None, retry_delay=0.5, results=None,
+                            guard=None, max_rounds=None, checkpoint=None):
+    """
+    The registration loop shared by the browser and HTTP paths.
+
+    Courses are tried in priority order. After a conflict or not-allowed answer the
+    course switches to its next alternate group and is retried right away; courses
+    without an answer are retried in the next round.
+
+    `register_option(course)` tries the course's current group and returns an Outcome.
+    `verify(pending)` optionally returns the ids of pending courses that turned out to be
+    registered anyway; `retry_delay` seconds pass between rounds (0 starts the next round
+    right away). `progress` shares state with parallel sessions (see automation.parallel).
+    `guard` (see automation.timetable) rejects groups clashing with registered courses
+    before `register_option` is called. With `max_rounds`, courses still pending after that
+    many rounds are given up on. `checkpoint()`, if given, is called between rounds. Returns (and fills `results`, if given) a dict mapping
+    each course id to its final outcome, or None for courses still pending.
+    """
+    pending = {course.course_id: course for course in plan}  # Highest priority first
+    if results is None:
+        results = {}
+    for course_id in pending:
+        results.setdefault(course_id, None)
+
+    def settle(course, outcome):
+        results[course.course_id] = outcome
+        del pending[course.course_id]
+        if guard is not None and outcome is Outcome.REGISTERED:
+            guard.commit(course)
+        if progress is not None:
+            progress.settle(course.course_id, registered=outcome is Outcome.REGISTERED)
+
+    # Continue attempting until all courses are processed
+    rounds = 0
+    while pending:
+        rounds += 1
+        for course in list(pending.values()):
+            if progress is not None:
+                if progress.stopped:
+                    logging.info("🛑 Registration stopped by another session.")
+                    return results
+                if progress.is_settled(course.course_id):
+                    logging.info(f"⏭️ Course {course.course_id} was settled by another session. Removing from list.")
+                    del pending[course.course_id]
+                    continue
+
+            while True:
+                clashes = guard.clashes(course) if guard is not None else None
+                if clashes:
+                    # Known to clash with a registered course: no need to ask the portal
+                    logging.info(f"🗓️ Course {course.course_id} (Group {course.group_code}) clashes with "
+                                 f"{', '.join(sorted(clashes))} locally.")
+                    outcome = Outcome.CONFLICT
+                else:
+                    outcome = register_option(course)
+                    if progress is not None:
+                        progress.attempted()
+
+                if outcome is Outcome.REGISTERED:
+                    logging.info(f"✅ Course {course.course_id} with group {course.group_code} successfully registered. Removing from list.")
+                    settle(course, outcome)
+
+                # Maximum credits reached -> STOP everything!
+                elif outcome is Outcome.CREDIT_LIMIT:
+                    logging.critical("⚠️ Maximum allowed credits reached! Stopping registration process.")
+                    results[course.course_id] = outcome
+                    if progress is not None:
+                        progress.stop()
+                    return results
+
+                elif outcome in (Outcome.CONFLICT, Outcome.NOT_ALLOWED):
+                    reason = "has a scheduling conflict" if outcome is Outcome.CONFLICT else "is not allowed"
+                    failed_group = course.group_code
+                    if course.advance():
+                        # Switch to the next alternate group without waiting for another round
+                        logging.warning(f"⏳ Course {course.course_id} (Group {failed_group}) {reason}. "
+                                        f"Trying group {course.group_code}, sub-group {course.sub_group}...")
+                        continue
+                    logging.warning(f"⏳ Course {course.course_id} (Group {failed_group}) {reason}. Removing from list.")
+                    settle(course, outcome)
+
+                elif outcome is Outcome.CAPACITY_FULL:
+                    # A seat may free up later: try the alternates now, and start over next round
+                    failed_group = course.group_code
+                    if course.advance():
+                        logging.warning(f"⏳ Course {course.course_id} (Group {failed_group}) is full. "
+                                        f"Trying group {course.group_code}, sub-group {course.sub_group}...")
+                        continue
+                    logging.info(f"⏳ Course {course.course_id} (Group {failed_group}) is full. Trying again next round...")
+                    course.rewind()
+                break
 
         # Check if courses have been taken
-        for course_group in course_list[:]:  # Iterate over a copy to allow modifications
-            
-            parts = course_group.split(':')
-            course_id = parts[0]
-            group_code = parts[1]
+        if verify is not None and pending:
+            for course_id in verify(pending):
+                course = pending[course_id]
+                logging.info(f"✅ Course {course_id} (Group {course.group_code}) successfully registered.")
+                settle(course, Outcome.REGISTERED)
 
-            try:
-                WebDriverWait(driver, 5).until(
-                    EC.invisibility_of_element_located((By.XPATH, f"//td[@class='label-link' and @addnewcrs='{course_id}']"))
-                )
-                logging.info(f"✅ Course {course_id} (Group {group_code}) successfully registered.")
-                course_list.remove(course_group)
+        if not pending:
+            break  # Exit if all courses are processed
 
-            except:
-                logging.info(f"🔄 Course {course_id} (Group {group_code}) is still available. Trying again...")
+        if max_rounds is not None and rounds >= max_rounds:
+            logging.info(f"⏹️ Stopping after {rounds} rounds; {len(pending)} courses still pending.")
+            return results
 
-        if not course_list:
-            break  # Exit if all courses are processed
+        if checkpoint is not None:
+            checkpoint()
 
-        logging.info(f"⏳ Waiting before the next attempt... {len(course_list)} courses remaining.")
-        sleep(0.5)  # Adjust sleep time as needed
+        if retry_delay > 0:
+            logging.info(f"⏳ Waiting before the next attempt... {len(pending)} courses remaining.")
+            with span("round.retry_delay"):
+                sleep(retry_delay)  # Adjust sleep time as needed
+        else:
+            logging.info(f"🔁 Starting the next attempt round... {len(pending)} courses remaining.")
 
     logging.info("🎉 All courses processed successfully!")
+    return results
+
+
+def _new_group_clashes(driver, course, guard):
+    """
+    Reads the meeting times of the course's group rows if the guard hadn't seen them
+    (they may only load with the cell click) and returns the registered courses the
+    current group clashes with.
+    """
+    if guard is None or guard.knows(course):
+        return set()
+    with span("timetable.groups", course=course.course_id):
+        try:
+            guard.add_group_rows(course, driver.execute_script(SCAN_GROUP_TIMES_JS, page_layout(), course.course_id))
+        except WebDriverException as e:
+            logging.warning(f"⚠️ Could not read the meeting times of {course.course_id}'s groups ({e}).")
+            return set()
+    return guard.clashes(course)
 
 
-def check_unavailable_course_reasons(driver, unavailable_courses):
+def _select_and_register(driver, course, semester_code, catalog, guard=None):
+    """
+    Clicks the course cell, then the row of the group currently tried, located by the
+    catalog's precompiled selectors. With a `guard`, a group whose row only showed up
+    after the cell click is checked against the registered courses before it is clicked.
+    Returns the Outcome (Outcome.UNKNOWN if the portal gave no recognizable answer).
+    """
+    group_ident = course.ident(semester_code)
+    row_selector = catalog.row_selector(course, semester_code)
+
+    # Attempt to select course
+    with span("course.click", course=course.course_id):
+        course_cell = WebDriverWait(driver, 5).until(EC.element_to_be_clickable(catalog.cell_locator(course.course_id)))
+        mark_toasts(driver)
+        course_cell.click()
+
+    # Check system messages for errors before selecting group; stop waiting once the group row shows
+    with span("course.message_wait", course=course.course_id) as step:
+        outcome, message = handle_system_messages(driver, timeout=COURSE_TOAST_TIMEOUT, until=row_selector,
+                                                  outcomes=COURSE_CLICK_OUTCOMES)
+        step.set(outcome=outcome.value, message=message)
+    if outcome is not Outcome.UNKNOWN:
+        return outcome
+    record_group_rows(driver, course.course_id)
+
+    clashes = _new_group_clashes(driver, course, guard)
+    if clashes:
+        logging.info(f"🗓️ Course {course.course_id} (Group {course.group_code}) clashes with "
+                     f"{', '.join(sorted(clashes))} locally.")
+        return Outcome.CONFLICT
+
+    # Select group
+    with span("group.click", ident=group_ident):
+        group_row = WebDriverWait(driver, 5).until(EC.element_to_be_clickable((By.CSS_SELECTOR, row_selector)))
+        mark_toasts(driver)
+        group_row.click()
+
+    logging.info(f"🔄 Attempting to register for course {course.course_id} (Group {course.group_code}, Sub-group {course.sub_group})...")
+
+    # Check system messages for the result
+    with span("group.message_wait", ident=group_ident) as step:
+        outcome, message = handle_system_messages(driver)
+        step.set(outcome=outcome.value, message=message)
+    return outcome
+
+
+def attempt_course_registration(driver, course_list, semester_code, progress=None, retry_delay=0, guard=None,
+                                max_rounds=None, catalog=None, session=None):
+    """
+    Handles the automated process of selecting and registering for courses.
+    `course_list` is a COURSES string or a list of entries / Course objects. `guard` is
+    the TimetableGuard to check picks against; by default it's read from the page.
+    `max_rounds` limits the attempt rounds (see `run_registration_rounds`). `catalog` is
+    the page's section catalog; by default it's read from the page. With a `session`
+    (see automation.session_guard), a click that finds the session expired logs in again
+    and tries the same group once more, and the browser may be replaced between rounds
+    if it uses too much memory (see automation.memory).
+    Returns a dict mapping each course id to its outcome (None if still pending).
+    """
+    if not semester_code:
+        raise ValueError("SEMESTER code must be set in the .env file.")
+
+    plan = parse_course_plan(course_list)
+    if catalog is None:
+        catalog = read_registration_catalog(driver, semester_code)
+
+    def register_option(course, retried=False):
+        try:
+            outcome = _select_and_register(driver, course, semester_code, catalog, guard)
+        except Exception:
+            outcome = None
+        # No answer may mean the click was sent to the login page; only then is the session asked
+        if outcome in (None, Outcome.UNKNOWN) and not retried and session is not None and session.recover_if_expired():
+            return register_option(course, retried=True)
+        if outcome is None:
+            logging.error(f"⚠️ Could not register for {course.course_id} (Group {course.group_code})")
+            return Outcome.UNKNOWN
+        return outcome
+
+    def verify(pending):
+        # One pass over the page: a course counts as registered once it's in the registered
+        # table or its cell is gone from the offered courses
+        with span("verify.scan", pending=len(pending)):
+            try:
+                state = scan_registration_state(driver)
+                if state is None and session is not None and session.recover_if_expired():
+                    state = scan_registration_state(driver)
+            except SessionExpired:
+                raise
+            except Exception as e:
+                logging.warning(f"⚠️ Could not read the registration page to verify courses: {e}")
+                return []
+        return confirmed_registrations(pending, state)
+
+    if guard is None:
+        # Meeting times of every group and registered course, for local conflict checks
+        with span("timetable.scan"):
+            guard = read_timetable(driver)
+
+    results = run_registration_rounds(plan, register_option, progress=progress, verify=verify,
+                                      retry_delay=retry_delay, guard=guard, max_rounds=max_rounds,
+                                      checkpoint=session.checkpoint if session is not None else None)
+    record_snapshot(driver, "registered")
+    return results
+
+
+def check_unavailable_course_reasons(driver, unavailable_courses, semester_code=None, cache=None):
     """
     Checks the reason why the courses were not seen for registration.
+    All courses are checked in batched script calls; with a `cache` (see
+    automation.course_checks), answers from earlier runs are reused.
     """
     if not unavailable_courses:
         return
-    
-    logging.info("\n🔍 Checking the reason why some courses were not available:")
-    for course in unavailable_courses:
-        course_id = course.split(':')[0]
-        try:
-            # Find and clear the input field, then enter the course code
-            input_field = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "edCrsCode"))
-            )
-            input_field.clear()
-            input_field.send_keys(course_id)
 
-            # Click the check button
-            check_button = driver.find_element(By.ID, "btnCheckCrs")
-            check_button.click()
+    logging.info("\n🔍 Checking the reason why some courses were not available:")
+    course_ids = [course.course_id for course in parse_course_plan(unavailable_courses)]
+    answers, to_check = cached_check_answers(course_ids, semester_code, cache)
 
-            # Wait for the result to appear in the label and log it
-            result_label = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.ID, "lblCheckResult"))
-            )
-            result_text = result_label.text.strip()
-            logging.info(f"➡️ Result for course {course_id}: {result_text}")
-            sleep(0.5)
+    if to_check:
+        try:
+            with span("unavailable.check", courses=len(to_check)):
+                checked = check_courses(driver, to_check)
         except Exception as e:
-            logging.error(f"⚠️ Error checking course {course_id}: {e}")
\ No newline at end of file
+            logging.error(f"⚠️ Error checking courses {', '.join(to_check)}: {e}")
+            checked = {}
+        if not any(checked.values()):
+            # Nothing answered: an expired session gets the login page back for every check
+            ensure_session(driver)
+        record_checks(checked)
+        store_check_answers(answers, checked, semester_code, cache)
+
+    report_check_answers(course_ids, answers, to_check)
+
+
+def cached_check_answers(course_ids, semester_code, cache):
+    """ Returns ({course id: cached answer}, course ids still to check). """
+    answers = {}
+    if cache is not None:
+        for course_id in course_ids:
+            cached = cache.get(semester_code, course_id)
+            if cached is not None:
+                answers[course_id] = cached
+    return answers, [course_id for course_id in course_ids if course_id not in answers]
+
+
+def store_check_answers(answers, checked, semester_code, cache):
+    """ Adds the checker's answers to `answers` and the cache, skipping courses that got none. """
+    checked = {course_id: text for course_id, text in checked.items() if text}
+    answers.update(checked)
+    if cache is not None:
+        cache.put(semester_code, checked)
+
+
+def report_check_answers(course_ids, answers, to_check):
+    for course_id in course_ids:
+        if course_id in answers:
+            cached = " (cached)" if course_id not in to_check else ""
+            logging.info(f"➡️ Result for course {course_id}{cached}: {answers[course_id]}")
+        elif course_id in to_check:
+            logging.error(f"⚠️ No answer from the course checker for course {course_id}")
@@ -0,0 +1,102 @@
+"""
+In-place recovery from an expired portal session.
+
+The portal ends idle sessions, which can happen during a long wait for the
+registration window or a seat watch. Steps that get no answer, or an unexpected
+page, ask the page (one script call, see `session_problem`) whether the login
+form is back, the page was redirected to a login URL, or one of the page's own
+requests was answered 401/403, and raise SessionExpired if so.
+
+`SessionGuard` then logs in again with the browser that's already open (the
+Chrome process, its cache and connections are kept), returns to the registration
+page if the run had entered it, and runs the interrupted step again. That skips
+the browser relaunch of a cold restart; `python -m tools.bench_startup --recovery`
+compares the two.
+"""
+
+import logging
+import time
+
+from .memory import memory_checkpoint
+from .portal import SESS_URL
+from .sess_client import SessionExpired, log_in, navigate_to_registration_page, session_problem, wait_for_home_page
+from .tracing import span
+
+# Failed re-logins in a row before giving up (a wrong password would otherwise loop forever)
+MAX_LOGIN_ATTEMPTS = 3
+
+
+class SessionGuard:
+    """Keeps one driver's portal session usable across a run, logging in again where it expired."""
+
+    def __init__(self, driver, username, password, sess_url=SESS_URL, max_attempts=MAX_LOGIN_ATTEMPTS):
+        self.driver = driver
+        self.username = username
+        self.password = password
+        self.sess_url = sess_url
+        self.max_attempts = max_attempts
+        # Set once the registration page was entered: recovering returns there
+        self.entered = False
+        # Re-logins in a row that didn't get the session back
+        self.failed_attempts = 0
+        # Seconds each successful recovery took
+        self.recovery_times = []
+
+    def log_in(self):
+        log_in(self.driver, self.username, self.password, sess_url=self.sess_url)
+
+    def recover(self, reason):
+        """
+        Logs in again in the open browser and goes back to the registration page if it
+        was entered. Raises SessionExpired after `max_attempts` failed re-logins in a row.
+        """
+        while True:
+            if self.failed_attempts >= self.max_attempts:
+                self.failed_attempts = 0
+                raise SessionExpired(f"{reason}; logging in again failed {self.max_attempts} times")
+            logging.warning(f"🔑 Session expired ({reason}). Logging in again in the open browser...")
+            started = time.perf_counter()
+            try:
+                with span("session.recover", reason=reason):
+                    self.restore()
+            except SessionExpired as e:
+                self.failed_attempts += 1
+                reason = str(e)
+                continue
+            self.failed_attempts = 0
+            elapsed = time.perf_counter() - started
+            self.recovery_times.append(elapsed)
+            logging.info(f"🔑 Session restored in {elapsed:.1f} s without restarting the browser.")
+            return
+
+    def restore(self):
+        """
+        Logs in and goes back to the registration page if the run had entered it.
+        Raises SessionExpired if the login didn't take (e.g. the password changed).
+        """
+        self.log_in()
+        if self.entered:
+            # Entering checks the session itself
+            navigate_to_registration_page(self.driver)
+        else:
+            wait_for_home_page(self.driver)
+
+    def checkpoint(self):
+        """ A safe point between steps, where the memory governor may replace the browser (see automation.memory). """
+        memory_checkpoint(self.driver, self.restore)
+
+    def recover_if_expired(self):
+        """ Asks the page whether the session expired, and recovers if so. Returns True if it did. """
+        problem = session_problem(self.driver)
+        if not problem:
+            return False
+        self.recover(problem)
+        return True
+
+    def run(self, step, *args, **kwargs):
+        """ Runs `step(*args, **kwargs)`, recovering and running it again whenever it raises SessionExpired. """
+        while True:
+            try:
+                return step(*args, **kwargs)
+            except SessionExpired as e:
+                self.recover(str(e))
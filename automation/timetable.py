@@ -0,0 +1,160 @@
+"""
+Offline timetable conflict checks.
+
+When the bot enters the registration page it reads the meeting times of every
+group row and of the already registered courses in one script call. Picks that
+would clash with a registered course are then rejected (or re-routed to an
+alternate group) locally, without spending two clicks and a toast wait on a
+"برخورد ساعات تشکیل" answer.
+
+If a course's group rows only show up once its cell is clicked, their times are
+read right after that click, before the group is.
+
+Meeting times look like "شنبه 08:00-10:00، دوشنبه 08:00-09:00". Groups whose
+times can't be read are never rejected locally; the portal still has the last word.
+The meeting-times cell and the registered-courses table are found with the
+MEETING_TIMES_SELECTOR, REGISTERED_COURSES_SELECTOR and REGISTERED_COURSE_ATTRIBUTE
+settings (see automation.portal), which follow the mock portal unless set.
+"""
+
+import logging
+import re
+from bisect import bisect_left, insort
+
+from .portal import page_layout
+
+# Reads the group rows' and the registered courses' meeting times at once; arguments[0] is the page layout
+SCAN_TIMETABLE_JS = """
+var layout = arguments[0];
+var rows = function (selector, key) {
+  return Array.prototype.map.call(document.querySelectorAll(selector), function (row) {
+    var time = row.querySelector(layout.MEETING_TIMES_SELECTOR);
+    return [row.getAttribute(key), time ? time.textContent : ''];
+  });
+};
+return [rows('tr[ident]', 'ident'),
+        rows(layout.REGISTERED_COURSES_SELECTOR + ' tr[' + layout.REGISTERED_COURSE_ATTRIBUTE + ']',
+             layout.REGISTERED_COURSE_ATTRIBUTE)];
+"""
+
+# Reads the meeting times of one course's group rows; arguments[0] is the page layout, arguments[1] the course id
+SCAN_GROUP_TIMES_JS = """
+var layout = arguments[0], course = arguments[1];
+return Array.prototype.filter.call(document.querySelectorAll('tr[ident]'), function (row) {
+  return (row.getAttribute('ident') || '').split(':')[1] === course;
+}).map(function (row) {
+  var time = row.querySelector(layout.MEETING_TIMES_SELECTOR);
+  return [row.getAttribute('ident'), time ? time.textContent : ''];
+});
+"""
+
+# Persian and Arabic-Indic digits and Arabic letter forms the portal mixes in; spaces,
+# zero-width non-joiners and direction marks are dropped
+_NORMALIZE = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩يك', '01234567890123456789یک', ' \u200c\u200e\u200f\t\n')
+
+# "<weekday> HH:MM-HH:MM" in normalized text. Only the weekday names themselves are
+# matched, so separators around them ("و", "-", "،") never end up in the day; longer
+# names come first since "شنبه" ends all the others. An optional "ساعت" may follow the day.
+_WEEKDAYS = ('یکشنبه', 'دوشنبه', 'سهشنبه', 'چهارشنبه', 'پنجشنبه', 'شنبه', 'جمعه')
+_SLOT = re.compile('(' + '|'.join(_WEEKDAYS) + r')(?:ساعت)?(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})')
+
+
+def parse_meeting_times(text):
+    """
+    Parses meeting times into (day, start minute, end minute) tuples.
+    Day names are normalized, so "سه شنبه" and "سه‌شنبه" are the same day.
+    """
+    slots = []
+    for day, start_h, start_m, end_h, end_m in _SLOT.findall((text or '').translate(_NORMALIZE)):
+        slots.append((day, int(start_h) * 60 + int(start_m), int(end_h) * 60 + int(end_m)))
+    return slots
+
+
+class Timetable:
+    """An interval index per weekday: sorted (start, end, owner) tuples."""
+
+    def __init__(self):
+        self._days = {}
+
+    def add(self, owner, slots):
+        for day, start, end in slots:
+            insort(self._days.setdefault(day, []), (start, end, owner))
+
+    def conflicts(self, slots):
+        """ Returns the owners of every interval overlapping one of `slots`. """
+        found = set()
+        for day, start, end in slots:
+            intervals = self._days.get(day)
+            if not intervals:
+                continue
+            # Only intervals starting before `end` can overlap
+            index = bisect_left(intervals, (end,))
+            found.update(owner for _, other_end, owner in intervals[:index] if other_end > start)
+        return found
+
+
+class TimetableGuard:
+    """Pre-checks course picks against the meeting times of the registered courses."""
+
+    def __init__(self, group_times, registered_times):
+        # "course:group:subgroup" -> slots, for every group row on the page
+        self.group_times = group_times
+        self.registered = Timetable()
+        for course_id, slots in registered_times.items():
+            self.registered.add(course_id, slots)
+
+    @classmethod
+    def from_page(cls, driver):
+        """ Builds the guard from the registration page in a single script call. """
+        return cls.from_scan(*driver.execute_script(SCAN_TIMETABLE_JS, page_layout()))
+
+    @classmethod
+    def from_scan(cls, group_rows, registered_rows):
+        """ Builds the guard from the result of SCAN_TIMETABLE_JS. """
+        group_times = _group_times(group_rows)
+        registered_times = {course_id: parse_meeting_times(times) for course_id, times in registered_rows}
+        logging.info(f"🗓️ Read meeting times of {len(group_times)} groups and {len(registered_times)} registered courses.")
+        return cls(group_times, registered_times)
+
+    def knows(self, course):
+        """ Whether the course's current group row was seen. """
+        return course.option_key in self.group_times
+
+    def add_group_rows(self, course, group_rows):
+        """
+        Adds the course's group rows read with SCAN_GROUP_TIMES_JS. Its current group
+        counts as seen even if its row wasn't there, so it isn't read again.
+        """
+        for key, slots in _group_times(group_rows).items():
+            self.group_times.setdefault(key, slots)
+        self.group_times.setdefault(course.option_key, [])
+
+    def clashes(self, course):
+        """ Returns the registered course ids clashing with the course's current group (empty if unknown). """
+        slots = self.group_times.get(course.option_key)
+        if not slots:
+            return set()
+        return self.registered.conflicts(slots) - {course.course_id}
+
+    def commit(self, course):
+        """ Records the course's current group as registered. """
+        self.registered.add(course.course_id, self.group_times.get(course.option_key, []))
+
+
+def _group_times(group_rows):
+    # "semester:course:group:subgroup" idents -> slots keyed by "course:group:subgroup"
+    group_times = {}
+    for ident, times in group_rows:
+        parts = (ident or '').split(':')
+        if len(parts) >= 4:
+            group_times[':'.join(parts[1:4])] = parse_meeting_times(times)
+    return group_times
+
+
+def read_timetable(driver):
+    """ Returns a TimetableGuard for the registration page, or None if the page couldn't be read. """
+    try:
+        return TimetableGuard.from_page(driver)
+    except Exception as e:
+        logging.warning(f"⚠️ Could not read meeting times; conflicts will only be detected by the portal ({e}).")
+        return None
@@ -0,0 +1,111 @@
+"""
+Event-driven detection of the portal's toast messages.
+
+A MutationObserver injected into the page queues every new `div.toast-message`
+with a sequence number and a timestamp. Python marks the queue before an action
+and then blocks on it with a short timeout, returning as soon as a relevant toast
+shows up instead of sleeping a fixed amount. Toasts queued before the mark are
+never reported, but a late answer to an earlier click can still arrive after it;
+callers therefore only wait for the messages the current click can produce.
+"""
+
+from collections import namedtuple
+
+from selenium.common.exceptions import WebDriverException
+
+Toast = namedtuple('Toast', ['seq', 'text', 'timestamp'])
+
+# Installs the watcher once per document; later calls reuse the existing queue.
+_INSTALL_JS = r"""
+var w = window.__sessToasts;
+if (!w) {
+  w = window.__sessToasts = {seq: 0, cursor: 0, items: [], listeners: []};
+  var queue = function (el) {
+    w.seq += 1;
+    w.items.push({seq: w.seq, el: el, text: el.textContent, ts: Date.now() / 1000});
+    if (w.items.length > 50) { w.items.shift(); }
+  };
+  new MutationObserver(function (mutations) {
+    mutations.forEach(function (m) {
+      m.addedNodes.forEach(function (node) {
+        if (node.nodeType !== 1) { return; }
+        if (node.matches('div.toast-message')) { queue(node); }
+        node.querySelectorAll('div.toast-message').forEach(queue);
+      });
+    });
+    w.listeners.slice().forEach(function (fn) { fn(); });
+  }).observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+}
+"""
+
+_MARK_JS = _INSTALL_JS + r"""
+w.cursor = w.seq;
+return w.seq;
+"""
+
+_WAIT_JS = _INSTALL_JS + r"""
+var done = arguments[arguments.length - 1];
+var after = arguments[0] === null ? w.cursor : arguments[0];
+var until = arguments[2], timeout = arguments[3];
+var match = arguments[1] && arguments[1].map(function (source) { return new RegExp(source); });
+var finished = false, timer = null;
+
+function pending() {
+  return w.items.filter(function (item) {
+    if (item.seq <= after) { return false; }
+    var text = (item.el.textContent || item.text).trim();
+    return !match || match.some(function (re) { return re.test(text); });
+  }).map(function (item) {
+    return [item.seq, (item.el.textContent || item.text).trim(), item.ts];
+  });
+}
+
+function reached() {
+  if (!until) { return false; }
+  var el = document.querySelector(until);
+  return !!(el && el.offsetParent !== null);
+}
+
+function check(timedOut) {
+  if (finished) { return; }
+  var found = pending();
+  if (found.length || timedOut || reached()) {
+    finished = true;
+    clearTimeout(timer);
+    w.listeners.splice(w.listeners.indexOf(check), 1);
+    if (found.length) { w.cursor = Math.max(w.cursor, found[found.length - 1][0]); }
+    done(found);
+  }
+}
+
+w.listeners.push(check);
+timer = setTimeout(function () { check(true); }, timeout * 1000);
+check(false);
+"""
+
+
+def mark_toasts(driver):
+    """
+    Starts a new attribution window: only toasts that appear after this call are
+    returned by the next `wait_for_toasts`. Returns the current sequence number.
+    """
+    return driver.execute_script(_MARK_JS)
+
+
+def wait_for_toasts(driver, timeout=3.0, match=None, until=None, after=None):
+    """
+    Blocks until a toast newer than the last mark (or `after`) appears and
+    returns the new toasts, oldest first.
+
+    `match` limits the wait to toasts matching one of the given regular expressions
+    (sources in the common Python/JavaScript syntax, see automation.messages).
+    `until` is a CSS selector; the wait also ends, with no toasts, as soon as a
+    visible element matches it. An empty list is returned on timeout or when the
+    page navigates away during the wait.
+    """
+    try:
+        found = driver.execute_async_script(_WAIT_JS, after, list(match) if match else None, until, timeout)
+    except WebDriverException:
+        # The document was unloaded mid-wait (e.g. a redirect); its toasts are gone with it.
+        return []
+    return [Toast(int(seq), text, ts) for seq, text, ts in found or []]
@@ -0,0 +1,184 @@
+"""
+Per-step timing of registration runs.
+
+Every step of the flow (login, each navigation attempt, each course and group
+click, each message and verification wait) runs inside a `span`. While tracing
+is off, `span` returns a shared do-nothing object, so the instrumentation costs
+one global lookup per step. While it's on, spans are collected from all threads
+and written at the end of the run as Chrome trace-event JSON (open it in
+chrome://tracing or https://ui.perfetto.dev), with a p50/p95 summary per step.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+# Where runs write their trace unless TRACE_FILE names another file
+DEFAULT_TRACE_FILE = "registration_trace.json"
+
+# The active Tracer, or None while tracing is off
+_tracer = None
+
+
+class _NullSpan:
+    """Stands in for a span while tracing is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'started')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.record(self.name, self.started, time.perf_counter() - self.started, self.args)
+        return False
+
+    def set(self, **args):
+        """ Attaches details learned during the step (e.g. its outcome) to the span. """
+        self.args.update(args)
+
+
+class Tracer:
+    """Collects finished spans as (name, start, duration, thread, args), and counter samples."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+        # (name, time, {series: value})
+        self.counters = []
+        self.thread_names = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, started, duration, args):
+        thread = threading.current_thread()
+        with self._lock:
+            self.thread_names[thread.ident] = thread.name
+            self.spans.append((name, started - self.origin, duration, thread.ident, args))
+
+    def record_counter(self, name, values):
+        with self._lock:
+            self.counters.append((name, time.perf_counter() - self.origin, values))
+
+    def write_chrome_trace(self, path):
+        """ Writes the spans as Chrome trace-event JSON ("X" complete events, microseconds). """
+        pid = os.getpid()
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in self.thread_names.items()
+        ]
+        events.extend(
+            {"name": name, "cat": name.split('.')[0], "ph": "X", "pid": pid, "tid": tid,
+             "ts": round(start * 1e6), "dur": round(duration * 1e6), "args": args}
+            for name, start, duration, tid, args in self.spans
+        )
+        # Counters ("C" events) show as a graph over time, e.g. memory
+        events.extend(
+            {"name": name, "ph": "C", "pid": pid, "ts": round(at * 1e6), "args": values}
+            for name, at, values in self.counters
+        )
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+    def summary(self):
+        """ Returns {step name: (count, total, p50, p95, max)} with times in seconds. """
+        durations = {}
+        for name, _, duration, _, _ in self.spans:
+            durations.setdefault(name, []).append(duration)
+        rows = {}
+        for name, values in durations.items():
+            values.sort()
+            rows[name] = (len(values), sum(values), _percentile(values, 50), _percentile(values, 95), values[-1])
+        return rows
+
+    def format_summary(self):
+        """ The summary as a text table, slowest steps (by total time) first. """
+        lines = [f"{'step':<28}{'count':>7}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"]
+        rows = sorted(self.summary().items(), key=lambda row: -row[1][1])
+        for name, (count, total, p50, p95, longest) in rows:
+            lines.append(f"{name:<28}{count:>7}{total:>10.2f}{p50 * 1000:>10.0f}{p95 * 1000:>10.0f}{longest * 1000:>10.0f}")
+        return '\n'.join(lines)
+
+
+def _percentile(values, percent):
+    """ Nearest-rank percentile of an already sorted list. """
+    rank = max(1, -(-len(values) * percent // 100))  # ceil without floats
+    return values[rank - 1]
+
+
+def span(name, **args):
+    """
+    Times a step: `with span("course.click", course=course_id): ...`.
+    Returns a no-op while tracing is off.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name, args)
+
+
+def trace_counter(name, **values):
+    """ Records values of a time series, e.g. `trace_counter("memory", browser_mb=512)`. A no-op while tracing is off. """
+    tracer = _tracer
+    if tracer is not None:
+        tracer.record_counter(name, values)
+
+
+def tracing_enabled():
+    return _tracer is not None
+
+
+def start_tracing():
+    """ Turns tracing on (for all threads) and returns the new Tracer. """
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing(path=None):
+    """
+    Turns tracing off. Writes the trace to `path`, if given, and logs the per-step summary.
+    Returns the Tracer, or None if tracing wasn't on.
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return None
+    if path:
+        try:
+            tracer.write_chrome_trace(path)
+            logging.info(f"⏱️ Wrote timing trace of {len(tracer.spans)} steps to {path}")
+        except OSError as e:
+            logging.error(f"⚠️ Could not write the timing trace to {path}: {e}")
+    if tracer.spans:
+        logging.info("⏱️ Time per step:\n" + tracer.format_summary())
+    return tracer
+
+
+def active_tracer():
+    """ Returns the running Tracer, or None while tracing is off. """
+    return _tracer
@@ -0,0 +1,265 @@
+"""
+Seat watching for the add/drop period.
+
+After the normal run, the watcher keeps the same logged-in session and polls the
+registration page for free seats in the target groups. Each poll is one
+in-page `fetch` of the registration page, parsed off-screen, so the browser
+neither reloads nor renders anything. Snapshots are diffed against the previous
+one and a registration attempt fires as soon as a target group goes from full
+to free (or a course shows up on the page).
+
+Polling speeds up while capacities are moving and slows down while they
+aren't, backs off on errors, and logs in again when the session expires. Only
+the latest snapshot is kept, so memory stays flat over days of watching.
+
+Capacities are read from the SEAT_CAPACITY_SELECTOR cell of each group row (see
+automation.portal), which follows the mock portal unless set. If a target's
+seats can't be read, the watcher can't tell when they open: it warns loudly and
+attempts the course on polls with a growing interval instead.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from collections import namedtuple
+
+from .http_engine import attempt_course_registration_http
+from .messages import Outcome
+from .plan import parse_course_plan
+from .portal import page_layout
+from .sess_client import SESS_URL, SessionExpired, navigate_to_registration_page, attempt_course_registration
+from .session_guard import SessionGuard
+from .tracing import span
+
+# Seconds between polls: the starting point, and the range it adapts within
+WATCH_INTERVAL = 15
+MIN_WATCH_INTERVAL = 5
+MAX_WATCH_INTERVAL = 60
+# Longest wait after repeated errors, and errors in a row before logging in again
+MAX_ERROR_BACKOFF = 300
+ERRORS_BEFORE_RELOGIN = 3
+# Reload the page now and then so the page's own memory doesn't grow over days
+PAGE_RESET_INTERVAL = 3600
+# Longest wait between attempts at a course whose seats can't be read
+MAX_BLIND_INTERVAL = 300
+
+# Fetches the registration page in the background and reads capacities off the fetched document
+_SNAPSHOT_JS = r"""
+var layout = arguments[0], done = arguments[arguments.length - 1];
+fetch(location.href, {credentials: 'same-origin', cache: 'no-store'}).then(function (response) {
+  return response.text().then(function (html) {
+    var doc = new DOMParser().parseFromString(html, 'text/html');
+    if (!doc.querySelector('td.label-link[addnewcrs], ' + layout.REGISTERED_COURSES_SELECTOR)) {
+      done({expired: true, status: response.status});
+      return;
+    }
+    var attr = function (selector, name) {
+      return Array.prototype.map.call(doc.querySelectorAll(selector), function (el) {
+        return el.getAttribute(name);
+      });
+    };
+    var groups = {};
+    doc.querySelectorAll('tr[ident]').forEach(function (row) {
+      var capacity = row.querySelector(layout.SEAT_CAPACITY_SELECTOR);
+      groups[row.getAttribute('ident')] = capacity ? capacity.textContent : '';
+    });
+    done({groups: groups, offered: attr('td.label-link[addnewcrs]', 'addnewcrs'),
+          registered: attr(layout.REGISTERED_COURSES_SELECTOR + ' tr[' + layout.REGISTERED_COURSE_ATTRIBUTE + ']', layout.REGISTERED_COURSE_ATTRIBUTE)});
+  });
+}, function (error) { done({error: String(error)}); });
+"""
+
+# Free seats per "course:group:subgroup" (None when the page doesn't say), plus course ids
+Snapshot = namedtuple('Snapshot', ['seats', 'offered', 'registered'])
+
+_NUMBERS = re.compile(r'\d+')
+
+
+def _free_seats(text):
+    # "enrolled/capacity" -> capacity - enrolled; anything else is unknown
+    numbers = [int(n) for n in _NUMBERS.findall(text or '')]
+    if len(numbers) >= 2:
+        return max(numbers[1] - numbers[0], 0)
+    return None
+
+
+def take_snapshot(driver):
+    """ Reads the target page's seats in one background request. Raises SessionExpired or RuntimeError. """
+    found = driver.execute_async_script(_SNAPSHOT_JS, page_layout())
+    if not found or 'error' in found:
+        raise RuntimeError(f"Snapshot failed: {(found or {}).get('error', 'no answer')}")
+    if found.get('expired'):
+        raise SessionExpired(f"Registration page not served (HTTP {found.get('status')}).")
+    seats = {}
+    for ident, capacity in found['groups'].items():
+        parts = ident.split(':')
+        if len(parts) >= 4:
+            seats[':'.join(parts[1:4])] = _free_seats(capacity)
+    return Snapshot(seats, frozenset(found['offered']), frozenset(found['registered']))
+
+
+def opened_courses(previous, current, targets):
+    """
+    Returns the target courses worth an attempt now: a group of theirs went from full
+    (or absent) to free. Courses whose seats can't be read are left to `blind_courses`.
+    """
+    opened = []
+    for course in targets:
+        if course.course_id not in current.offered:
+            continue
+        for key in course.option_keys():
+            free = current.seats.get(key)
+            before = previous.seats.get(key) if previous is not None else None
+            if free and not before:
+                opened.append(course)
+                break
+    return opened
+
+
+def blind_courses(current, targets):
+    """ Returns the offered target courses none of whose groups show a readable seat count. """
+    return [course for course in targets if course.course_id in current.offered
+            and all(current.seats.get(key) is None for key in course.option_keys())]
+
+
+def capacities_moved(previous, current, targets):
+    """ True if any target group's free seats changed between the snapshots. """
+    if previous is None:
+        return False
+    return any(previous.seats.get(key) != current.seats.get(key)
+               for course in targets for key in course.option_keys())
+
+
+def watch_for_seats(driver, username, password, courses_str, semester, use_http_engine=False,
+                    interval=WATCH_INTERVAL, stop_event=None, sess_url=SESS_URL, log_in_first=False):
+    """
+    Watches the target groups and registers as soon as a seat opens, until every target
+    is settled (registered, not allowed or conflicting), the credit limit is hit, or
+    `stop_event` is set. The driver should be on the registration page, unless
+    `log_in_first` is set; the watcher logs in again whenever the session expires.
+    Returns {course id: outcome} for the settled courses.
+    """
+    stop_event = stop_event or threading.Event()
+    targets = {course.course_id: course for course in parse_course_plan(courses_str)}
+    attempt = attempt_course_registration_http if use_http_engine else attempt_course_registration
+    settled = {}
+
+    previous = None
+    wait = interval
+    errors = 0
+    # Course id -> [monotonic time of its next attempt, interval after that] for courses with unreadable seats
+    blind_retries = {}
+    last_reset = time.monotonic()
+    logging.info(f"👀 Watching {len(targets)} courses for free seats (every ~{interval} s). Stop the bot to end.")
+
+    # Logging in again goes back to the registration page, in the same browser
+    session = SessionGuard(driver, username, password, sess_url=sess_url)
+    session.entered = True
+
+    def log_in_again(reason=None):
+        try:
+            if reason is None:
+                session.log_in()
+                session.run(navigate_to_registration_page, driver)
+            else:
+                session.recover(reason)
+            return True
+        except SystemExit:
+            raise
+        except Exception as e:
+            logging.error(f"⚠️ Logging in again failed: {e}")
+            return False
+
+    if log_in_first and not log_in_again():
+        return settled
+
+    while targets and not stop_event.is_set():
+        try:
+            with span("watch.snapshot"):
+                current = take_snapshot(driver)
+            errors = 0
+        except SessionExpired as e:
+            if log_in_again(str(e)):
+                previous = None
+            else:
+                errors += 1
+                stop_event.wait(min(MAX_ERROR_BACKOFF, interval * 2 ** errors))
+            continue
+        except Exception as e:
+            errors += 1
+            backoff = min(MAX_ERROR_BACKOFF, interval * 2 ** errors)
+            logging.warning(f"⚠️ Seat check failed ({e}). Retrying in {backoff:.0f} s...")
+            # Whatever state the page is in after repeated failures, a fresh login gets it back
+            if errors >= ERRORS_BEFORE_RELOGIN and log_in_again(f"{errors} failed seat checks"):
+                previous = None
+            stop_event.wait(backoff)
+            continue
+
+        # Courses registered elsewhere (another session, or by hand) need no more watching
+        for course_id in current.registered & targets.keys():
+            logging.info(f"✅ Course {course_id} is registered. No longer watching it.")
+            settled[course_id] = Outcome.REGISTERED
+            del targets[course_id]
+
+        opened = opened_courses(previous, current, list(targets.values()))
+
+        # Seats that can't be read can't be seen opening: attempt those courses on a backoff schedule
+        now = time.monotonic()
+        blind = blind_courses(current, targets.values())
+        unseen = [course.course_id for course in blind if course.course_id not in blind_retries]
+        if unseen:
+            logging.warning(f"🚨 SEAT COUNTS UNREADABLE for {', '.join(unseen)}: the watcher can't see when their "
+                            f"seats open (check SEAT_CAPACITY_SELECTOR). Attempting them anyway, every "
+                            f"{interval:.0f} s at first and backing off to every {MAX_BLIND_INTERVAL} s.")
+        blind_ids = {course.course_id for course in blind}
+        for course_id in list(blind_retries):
+            if course_id not in blind_ids:
+                del blind_retries[course_id]
+        due = [course for course in blind if blind_retries.setdefault(course.course_id, [now, interval])[0] <= now]
+        for course in due:
+            next_wait = blind_retries[course.course_id][1]
+            blind_retries[course.course_id] = [now + next_wait, min(MAX_BLIND_INTERVAL, next_wait * 2)]
+
+        if opened:
+            logging.info(f"🪑 Seats opened in {', '.join(course.course_id for course in opened)}. Registering...")
+        if due:
+            logging.info(f"🔁 Trying {', '.join(course.course_id for course in due)} (seats unknown)...")
+        attempts = opened + due
+        if attempts:
+            # The visible page is stale: reload it so its course cells and rows match the server
+            driver.refresh()
+            last_reset = time.monotonic()
+            for course in attempts:
+                course.rewind()
+            results = attempt(driver, attempts, semester, max_rounds=1, session=session)
+            for course_id, outcome in results.items():
+                if outcome in (Outcome.REGISTERED, Outcome.NOT_ALLOWED, Outcome.CONFLICT):
+                    settled[course_id] = outcome
+                    targets.pop(course_id, None)
+            if Outcome.CREDIT_LIMIT in results.values():
+                logging.critical("⚠️ Maximum allowed credits reached. Stopping the seat watch.")
+                break
+
+        # Poll faster while capacities are moving, slower while they're quiet.
+        # Seats only trigger an attempt when they open, so a seat lost to someone else
+        # is tried again the next time it frees up rather than on every poll.
+        if opened or capacities_moved(previous, current, targets.values()):
+            wait = max(MIN_WATCH_INTERVAL, wait / 2)
+        else:
+            wait = min(MAX_WATCH_INTERVAL, wait * 1.25)
+        previous = current
+
+        if time.monotonic() - last_reset > PAGE_RESET_INTERVAL:
+            driver.refresh()
+            last_reset = time.monotonic()
+        # Between polls is a safe point to replace a browser that grew too big
+        session.checkpoint()
+
+        # A little jitter so polls don't fall into lockstep with the portal's own cycles
+        stop_event.wait(wait * random.uniform(0.9, 1.1))
+
+    if not targets:
+        logging.info("🎉 All watched courses are settled.")
+    return settled
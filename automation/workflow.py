@@ -0,0 +1,97 @@
+"""
+The complete registration flow, shared by the CLI, the GUI and parallel sessions.
+"""
+
+import logging
+import time
+
+from .sess_client import (
+    SESS_URL,
+    navigate_to_registration_page,
+    get_available_courses,
+    attempt_course_registration,
+    check_unavailable_course_reasons,
+    read_registration_catalog
+)
+from .catalog import default_catalog_cache
+from .course_checks import default_check_cache
+from .http_engine import attempt_course_registration_http
+from .plan import parse_course_plan
+from .planner import register_within_budget
+from .session_guard import SessionGuard
+from .timetable import read_timetable
+from .scheduler import wait_for_registration_window
+
+
+def run_registration(driver, username, password, courses_str, semester, opens_at=None,
+                     use_http_engine=False, progress=None, sess_url=SESS_URL, max_credits=None, results=None,
+                     stop_event=None):
+    """
+    Logs in, enters the registration page (on schedule if `opens_at` is given),
+    registers the available courses that fit the credit ceiling (read from the page
+    unless `max_credits` is given) and reports why the others are unavailable.
+    If the session expires along the way, it logs in again in the same browser and
+    picks up the step it was on. Each attempted course's outcome is recorded in
+    `results`, if given. If `stop_event` is set while waiting for the registration page,
+    the run ends there. Returns the list of unavailable courses.
+    """
+    # Catch plan mistakes before logging in, if this semester's page was seen before
+    check_plan_against_catalog(courses_str, semester)
+
+    # Log in to the university system
+    session = SessionGuard(driver, username, password, sess_url=sess_url)
+    session.log_in()
+
+    # Navigate to the registration operations page
+    # (long waits may replace a browser grown too big, see automation.memory)
+    if opens_at:
+        entered = session.run(wait_for_registration_window, driver, opens_at, checkpoint=session.checkpoint,
+                              stop_event=stop_event) is not None
+    else:
+        entered = session.run(navigate_to_registration_page, driver, checkpoint=session.checkpoint,
+                              stop_event=stop_event)
+    if not entered:
+        logging.info("🛑 Registration stopped while waiting for the registration page.")
+        return []
+    session.entered = True
+
+    # Check which courses are available; the page is only scraped again if it changed since the last run
+    catalog = session.run(read_registration_catalog, driver, semester, cache=default_catalog_cache())
+    available_courses, unavailable_courses = get_available_courses(driver, courses_str, catalog=catalog)
+    logging.info(f"Found {len(available_courses)} available courses for registration attempt.")
+
+    # Automatically attempt to register
+    if available_courses:
+        attempt = attempt_course_registration_http if use_http_engine else attempt_course_registration
+        # Meeting times, read once and kept up to date across the passes below
+        guard = read_timetable(driver)
+        # Attempt the most valuable courses that fit the credit ceiling first
+        outcomes = register_within_budget(driver, available_courses,
+                                          lambda chosen: attempt(driver, chosen, semester, progress=progress, guard=guard,
+                                                                 catalog=catalog, session=session),
+                                          max_credits=max_credits, progress=progress)
+        if results is not None:
+            results.update(outcomes)
+
+    # Check and print the reasons why certain courses are unavailable
+    if unavailable_courses:
+        session.run(check_unavailable_course_reasons, driver, unavailable_courses, semester,
+                    cache=default_check_cache())
+
+    return unavailable_courses
+
+
+def check_plan_against_catalog(courses_str, semester):
+    """
+    Warns about planned courses and groups missing from the cached section catalog
+    of the semester (see automation.catalog). Needs no browser; does nothing without a catalog.
+    """
+    catalog = default_catalog_cache().get(semester)
+    if catalog is None or not courses_str:
+        return
+    not_offered, missing = catalog.validate(parse_course_plan(courses_str))
+    scraped = time.strftime("%Y-%m-%d %H:%M", time.localtime(catalog.scraped_at))
+    for course in not_offered:
+        logging.warning(f"⚠️ Course {course.course_id} was not offered when the page was last seen ({scraped}).")
+    for course_id, keys in missing.items():
+        logging.warning(f"⚠️ Course {course_id} had no group {', '.join(keys)} when the page was last seen ({scraped}).")
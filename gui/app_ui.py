@@ -1,34 +1,75 @@
 import os
 import threading
+from collections import deque
+from functools import partial
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import logging
+from logging.handlers import RotatingFileHandler
 from dotenv import load_dotenv, set_key
-from selenium import webdriver
 
-# Import the automation functions
+# Import the automation functions. Only the light ones: Selenium and the registration
+# flow load on the pre-warm thread (see launch_browser), after the window is up.
 from automation import (
-    log_in,
-    navigate_to_registration_page,
-    get_available_courses,
-    attempt_course_registration,
-    check_unavailable_course_reasons
+    SESS_URL,
+    parse_course,
+    parse_course_plan,
+    create_driver,
+    DriverPrewarmer,
+    DEFAULT_TRACE_FILE,
+    configure_message_patterns,
+    start_recording,
+    start_tracing,
+    stop_recording,
+    stop_tracing
 )
 
 ENV_FILE = ".env"
 
+# Lines kept in the log area, and milliseconds between log area updates
+MAX_LOG_LINES = 2000
+LOG_FLUSH_INTERVAL = 100
+
+# Full history on disk: 1 MB files, the last 5 kept
+DEFAULT_LOG_FILE = "registration.log"
+LOG_FILE_SIZE = 1024 * 1024
+LOG_FILE_BACKUPS = 5
+
+
+def launch_browser(headless):
+    """ The pre-warm factory: loads the registration flow, then launches Chrome, both off the Tk thread. """
+    import automation.workflow, automation.parallel, automation.watcher  # noqa: F401
+    return create_driver(headless=headless)
+
+
 # Custom logging handler to redirect logs to a Tkinter widget
 
 
 class TkinterLogHandler(logging.Handler):
-    def __init__(self, text_widget):
+    """
+    Queues formatted records for the GUI, which drains them in batches (see
+    RegistrationBotUI.flush_log). Emitting never touches Tk and never blocks: the queue
+    keeps only the newest MAX_LOG_LINES lines, the most the log area would show anyway.
+    """
+
+    def __init__(self, max_lines=MAX_LOG_LINES):
         super().__init__()
-        self.text_widget = text_widget
+        self.lines = deque(maxlen=max_lines)
 
     def emit(self, record):
-        # Format the log record and pass it to the Tkinter log method
-        msg = self.format(record)
-        self.text_widget.log(msg)
+        try:
+            self.lines.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+    def drain(self):
+        """ Returns the queued lines, oldest first. """
+        lines = []
+        while True:
+            try:
+                lines.append(self.lines.popleft())
+            except IndexError:
+                return lines
 
 
 class RegistrationBotUI:
@@ -36,8 +77,9 @@ class RegistrationBotUI:
         # Initialize main window
         self.root = root
         self.root.title("SESS Registration Bot")
-        self.root.geometry("500x600")
+        self.root.geometry("560x700")
         self.driver = None
+        self.prewarmer = None
         self.course_entries = []
         self.course_rows = []
 
@@ -51,6 +93,11 @@ class RegistrationBotUI:
             main_frame, text="Login Information", padding="10")
         credentials_frame.pack(fill=tk.X, pady=5)
 
+        # Run options frame
+        options_frame = ttk.LabelFrame(
+            main_frame, text="Options", padding="10")
+        options_frame.pack(fill=tk.X, pady=5)
+
         # Course list section
         self.courses_frame = ttk.LabelFrame(
             main_frame, text="Course List", padding="10")
@@ -70,6 +117,17 @@ class RegistrationBotUI:
         self.username_var = tk.StringVar()
         self.password_var = tk.StringVar()
         self.semester_var = tk.StringVar()
+        self.opens_at_var = tk.StringVar()
+        self.http_engine_var = tk.BooleanVar()
+        self.sessions_var = tk.StringVar(value="1")
+        self.max_credits_var = tk.StringVar()
+        self.headless_var = tk.BooleanVar()
+        self.trace_var = tk.BooleanVar()
+        self.watch_var = tk.BooleanVar()
+        self.stop_event = threading.Event()
+        self.trace_file = DEFAULT_TRACE_FILE
+        self.record_dir = None
+        self.record_redact = []
 
         ttk.Label(credentials_frame, text="Username:").grid(
             row=0, column=0, sticky=tk.W, padx=5, pady=5)
@@ -88,6 +146,36 @@ class RegistrationBotUI:
 
         credentials_frame.columnconfigure(1, weight=1)
 
+        # --- Options Widgets ---
+        ttk.Label(options_frame, text="Opens At (optional):").grid(
+            row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        ttk.Entry(options_frame, textvariable=self.opens_at_var,
+                  width=30).grid(row=0, column=1, sticky=tk.EW)
+
+        ttk.Label(options_frame, text="Parallel Sessions:").grid(
+            row=1, column=0, sticky=tk.W, padx=5, pady=5)
+        ttk.Spinbox(options_frame, from_=1, to=8, textvariable=self.sessions_var,
+                    width=5).grid(row=1, column=1, sticky=tk.W)
+
+        ttk.Label(options_frame, text="Max Credits (optional):").grid(
+            row=2, column=0, sticky=tk.W, padx=5, pady=5)
+        ttk.Entry(options_frame, textvariable=self.max_credits_var,
+                  width=5).grid(row=2, column=1, sticky=tk.W)
+
+        ttk.Checkbutton(options_frame, text="Use fast HTTP engine",
+                        variable=self.http_engine_var).grid(row=3, column=1, sticky=tk.W, pady=5)
+
+        ttk.Checkbutton(options_frame, text="Headless browser", variable=self.headless_var,
+                        command=self.start_prewarm).grid(row=4, column=1, sticky=tk.W)
+
+        ttk.Checkbutton(options_frame, text="Write timing trace", variable=self.trace_var).grid(
+            row=5, column=1, sticky=tk.W, pady=5)
+
+        ttk.Checkbutton(options_frame, text="Keep watching for free seats (add/drop)",
+                        variable=self.watch_var).grid(row=6, column=1, sticky=tk.W)
+
+        options_frame.columnconfigure(1, weight=1)
+
         # --- Course List Widgets ---
         # Button to add new courses dynamically
         self.add_course_button = ttk.Button(
@@ -97,11 +185,15 @@ class RegistrationBotUI:
         # Header row for course table
         header_frame = ttk.Frame(self.courses_frame)
         header_frame.pack(fill=tk.X, padx=5, pady=(5, 0))
-        ttk.Label(header_frame, text="Unit Code", width=25).pack(
+        ttk.Label(header_frame, text="Unit Code", width=18).pack(
+            side=tk.LEFT, expand=True)
+        ttk.Label(header_frame, text="Group", width=7).pack(
             side=tk.LEFT, expand=True)
-        ttk.Label(header_frame, text="Group", width=10).pack(
+        ttk.Label(header_frame, text="Subgroup", width=7).pack(
             side=tk.LEFT, expand=True)
-        ttk.Label(header_frame, text="Subgroup", width=10).pack(
+        ttk.Label(header_frame, text="Alternates", width=12).pack(
+            side=tk.LEFT, expand=True)
+        ttk.Label(header_frame, text="Priority", width=6).pack(
             side=tk.LEFT, expand=True)
         # Spacer for remove button
         ttk.Label(header_frame, text="", width=5).pack(side=tk.RIGHT)
@@ -116,6 +208,11 @@ class RegistrationBotUI:
             actions_frame, text="Start Registration", command=self.start_registration_thread)
         self.start_button.pack(fill=tk.X)
 
+        # Ends a seat watch (or any run) at the next safe point
+        self.stop_button = ttk.Button(
+            actions_frame, text="Stop Watching", command=self.stop_event.set, state=tk.DISABLED)
+        self.stop_button.pack(fill=tk.X, pady=(5, 0))
+
         # --- Log Widgets ---
         # Scrollable log output area
         self.log_area = scrolledtext.ScrolledText(
@@ -127,48 +224,100 @@ class RegistrationBotUI:
         # Attach custom Tkinter log handler to root logger
         root_logger = logging.getLogger()
         root_logger.setLevel(logging.INFO)
-        root_logger.addHandler(TkinterLogHandler(self))
+        self.log_handler = TkinterLogHandler()
+        root_logger.addHandler(self.log_handler)
         # Silence noisy selenium logs
         logging.getLogger('selenium').setLevel(logging.ERROR)
+        self.flush_log()
 
         # --- Load .env ---
         self.load_or_create_env()
 
-    def log(self, message):
-        """ Append a message to the log area safely from any thread. """
-        self.root.after(0, self._log_message, message)
-
-    def _log_message(self, message):
-        # Insert a new log line into the text widget
-        self.log_area.configure(state='normal')
-        self.log_area.insert(tk.END, message + "\n")
-        self.log_area.see(tk.END)
-        self.log_area.configure(state='disabled')
-
-    def add_course_entry(self, unit="", group="", subgroup=""):
+        # Keep the full history in rotating log files; the log area only shows the latest lines
+        log_file = os.getenv("LOG_FILE", DEFAULT_LOG_FILE)
+        if log_file:
+            file_handler = RotatingFileHandler(log_file, maxBytes=LOG_FILE_SIZE, backupCount=LOG_FILE_BACKUPS,
+                                               encoding='utf-8')
+            file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+            root_logger.addHandler(file_handler)
+
+        # Extra portal messages to recognize, on top of the built-in ones
+        if os.getenv("MESSAGE_PATTERNS"):
+            try:
+                configure_message_patterns(os.getenv("MESSAGE_PATTERNS"))
+            except (OSError, ValueError) as e:
+                logging.error(f"⚠️ Could not load message patterns: {e}")
+
+        # --- Pre-warm a browser ---
+        # Launch Chrome in the background now, so "Start Registration" goes straight to logging in
+        self.start_prewarm()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def start_prewarm(self):
+        """ (Re)starts launching a browser in the background with the current options. """
+        if self.prewarmer:
+            old = self.prewarmer
+            threading.Thread(target=old.discard, daemon=True).start()
+        factory = partial(launch_browser, headless=self.headless_var.get())
+        self.prewarmer = DriverPrewarmer(factory, warm_url=SESS_URL).start()
+
+    def on_close(self):
+        """ Quits the pre-warmed browser before closing the window. """
+        self.stop_event.set()
+        if self.prewarmer:
+            self.prewarmer.discard()
+        self.root.destroy()
+
+    def flush_log(self):
+        """ Moves the queued log lines into the log area in one insert, then schedules the next flush. """
+        lines = self.log_handler.drain()
+        if lines:
+            # Only follow new lines if the user hasn't scrolled up to read older ones
+            at_bottom = self.log_area.yview()[1] >= 0.999
+            self.log_area.configure(state='normal')
+            self.log_area.insert(tk.END, "\n".join(lines) + "\n")
+            # Drop the oldest lines beyond the limit (the text always ends with an empty line)
+            excess = int(self.log_area.index('end-1c').split('.')[0]) - 1 - MAX_LOG_LINES
+            if excess > 0:
+                self.log_area.delete('1.0', f'{excess + 1}.0')
+            self.log_area.configure(state='disabled')
+            if at_bottom:
+                self.log_area.see(tk.END)
+        self.root.after(LOG_FLUSH_INTERVAL, self.flush_log)
+
+    def add_course_entry(self, unit="", group="", subgroup="", alternates="", priority=""):
         """ Dynamically adds a new row of entry fields for a course. """
         row_frame = ttk.Frame(self.course_entry_frame)
         row_frame.pack(fill=tk.X, pady=2, padx=5)
 
         # Input fields for unit, group, and subgroup
-        unit_entry = ttk.Entry(row_frame, width=25)
+        unit_entry = ttk.Entry(row_frame, width=18)
         unit_entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 2))
         unit_entry.insert(0, unit)
 
-        group_entry = ttk.Entry(row_frame, width=10)
+        group_entry = ttk.Entry(row_frame, width=7)
         group_entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=2)
         group_entry.insert(0, group)
 
-        subgroup_entry = ttk.Entry(row_frame, width=10)
+        subgroup_entry = ttk.Entry(row_frame, width=7)
         subgroup_entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=2)
         subgroup_entry.insert(0, subgroup)
 
+        # Alternate groups ("2|3:1") tried in order, and an optional priority (higher goes first)
+        alternates_entry = ttk.Entry(row_frame, width=12)
+        alternates_entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=2)
+        alternates_entry.insert(0, alternates)
+
+        priority_entry = ttk.Entry(row_frame, width=6)
+        priority_entry.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=2)
+        priority_entry.insert(0, priority)
+
         # Button to remove the row
         remove_btn = ttk.Button(
             row_frame, text="-", width=3, command=lambda f=row_frame: f.destroy())
         remove_btn.pack(side=tk.RIGHT, padx=(2, 0))
 
-        self.course_rows.append((unit_entry, group_entry, subgroup_entry))
+        self.course_rows.append((unit_entry, group_entry, subgroup_entry, alternates_entry, priority_entry))
 
     def load_or_create_env(self):
         """ Loads data from .env or creates the file if it doesn't exist. """
@@ -183,36 +332,58 @@ class RegistrationBotUI:
         self.username_var.set(os.getenv("SESS_USERNAME", ""))
         self.password_var.set(os.getenv("SESS_PASSWORD", ""))
         self.semester_var.set(os.getenv("SEMESTER", ""))
+        self.opens_at_var.set(os.getenv("REGISTRATION_OPENS_AT", ""))
+        self.http_engine_var.set(os.getenv("REGISTRATION_ENGINE", "browser").lower() == "http")
+        self.sessions_var.set(os.getenv("PARALLEL_SESSIONS") or "1")
+        self.max_credits_var.set(os.getenv("MAX_CREDITS", ""))
+        self.headless_var.set(os.getenv("HEADLESS", "").lower() in ("1", "true", "yes"))
+        self.watch_var.set(os.getenv("WATCH_SEATS", "").lower() in ("1", "true", "yes"))
+        self.trace_var.set(bool(os.getenv("TRACE_FILE")))
+        self.trace_file = os.getenv("TRACE_FILE") or DEFAULT_TRACE_FILE
+        # Session recording has no checkbox: it's for collecting replay data (see tools.replay_server)
+        self.record_dir = os.getenv("RECORD_SESSION") or None
+        self.record_redact = [text.strip() for text in os.getenv("RECORD_REDACT", "").split(',')]
+        # No checkbox either: a limit for multi-hour runs, set in .env (see automation.memory)
+        self.memory_limit = os.getenv("MEMORY_LIMIT_MB", "").strip()
 
         # Parse course entries from the environment variable
         courses_str = os.getenv("COURSES", "")
         if courses_str:
-            for course in courses_str.split(','):
-                parts = course.strip().split(':')
-                unit = parts[0] if len(parts) > 0 else ""
-                group = parts[1] if len(parts) > 1 else ""
-                subgroup = parts[2] if len(parts) > 2 else ""
-                self.add_course_entry(unit, group, subgroup)
+            for entry in courses_str.split(','):
+                if not entry.strip():
+                    continue
+                try:
+                    course = parse_course(entry)
+                except ValueError as e:
+                    logging.warning(f"⚠️ Skipping course entry: {e}")
+                    continue
+                group, subgroup = course.options[0]
+                priority = str(course.priority) if course.explicit_priority else ""
+                self.add_course_entry(course.course_id, group, subgroup or "", course.alternates, priority)
 
         logging.info("Loaded settings from .env file.")
 
     def save_env(self):
         """ Saves current GUI settings to the .env file. Returns the courses string. """
         course_list = []
-        for unit_entry, group_entry, subgroup_entry in self.course_rows:
+        for unit_entry, group_entry, subgroup_entry, alternates_entry, priority_entry in self.course_rows:
             if not unit_entry.winfo_exists():
                 continue  # Skip destroyed rows
 
             unit = unit_entry.get().strip()
             group = group_entry.get().strip()
             subgroup = subgroup_entry.get().strip()
+            alternates = alternates_entry.get().strip()
+            priority = priority_entry.get().strip()
 
             # Only save if unit and group are provided
             if unit and group:
-                if subgroup:
-                    course_list.append(f"{unit}:{group}:{subgroup}")
-                else:
-                    course_list.append(f"{unit}:{group}")
+                entry = f"{unit}:{group}:{subgroup}" if subgroup else f"{unit}:{group}"
+                if alternates:
+                    entry += f"|{alternates}"
+                if priority:
+                    entry += f"@{priority}"
+                course_list.append(entry)
 
         courses_str = ",".join(course_list)
 
@@ -221,6 +392,13 @@ class RegistrationBotUI:
         set_key(ENV_FILE, "SESS_PASSWORD", self.password_var.get())
         set_key(ENV_FILE, "SEMESTER", self.semester_var.get())
         set_key(ENV_FILE, "COURSES", courses_str)
+        set_key(ENV_FILE, "REGISTRATION_OPENS_AT", self.opens_at_var.get().strip())
+        set_key(ENV_FILE, "REGISTRATION_ENGINE", "http" if self.http_engine_var.get() else "browser")
+        set_key(ENV_FILE, "PARALLEL_SESSIONS", self.sessions_var.get().strip() or "1")
+        set_key(ENV_FILE, "MAX_CREDITS", self.max_credits_var.get().strip())
+        set_key(ENV_FILE, "HEADLESS", "true" if self.headless_var.get() else "false")
+        set_key(ENV_FILE, "WATCH_SEATS", "true" if self.watch_var.get() else "false")
+        set_key(ENV_FILE, "TRACE_FILE", self.trace_file if self.trace_var.get() else "")
         logging.info("Settings saved to .env file.")
         return courses_str
 
@@ -231,7 +409,32 @@ class RegistrationBotUI:
                 "Error", "Please fill in Username, Password, and Semester Code.")
             return
 
+        if self.opens_at_var.get().strip():
+            from automation import parse_opening_time
+            try:
+                parse_opening_time(self.opens_at_var.get())
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
+                return
+
+        if not self.sessions_var.get().strip().isdigit() or int(self.sessions_var.get()) < 1:
+            messagebox.showerror("Error", "Parallel Sessions must be a positive number.")
+            return
+
+        if self.max_credits_var.get().strip() and not self.max_credits_var.get().strip().isdigit():
+            messagebox.showerror("Error", "Max Credits must be a number (or left empty to look for it on the registration page).")
+            return
+
+        if self.memory_limit and (not self.memory_limit.isdigit() or int(self.memory_limit) < 1):
+            messagebox.showerror("Error", "MEMORY_LIMIT_MB in the .env file must be a positive number of megabytes (or left empty).")
+            return
+
         courses_str = self.save_env()  # Save settings and get the course string
+        try:
+            parse_course_plan(courses_str)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
         if not courses_str:
             messagebox.showwarning(
                 "Warning", "No courses have been added to the list.")
@@ -239,6 +442,9 @@ class RegistrationBotUI:
 
         # Disable the start button to prevent duplicate clicks
         self.start_button.config(state=tk.DISABLED, text="Running...")
+        self.stop_event.clear()
+        if self.watch_var.get():
+            self.stop_button.config(state=tk.NORMAL)
 
         # Run Selenium automation in a background thread
         thread = threading.Thread(
@@ -248,35 +454,50 @@ class RegistrationBotUI:
 
     def registration_worker(self, courses_str):
         """ The worker function that runs the Selenium automation. """
+        from automation import (launch_recyclable, parse_opening_time, register_in_parallel, run_registration,
+                                start_memory_governor, stop_memory_governor, watch_for_seats)
+
+        tracing = self.trace_var.get()
+        if tracing:
+            start_tracing()
         try:
             logging.info("\n--- Starting Registration Process ---")
 
             username = self.username_var.get()
             password = self.password_var.get()
             semester = self.semester_var.get()
-
-            # Launch Chrome WebDriver
-            self.driver = webdriver.Chrome()
-
-            # Perform the automated steps
-            log_in(self.driver, username, password)
-            navigate_to_registration_page(self.driver)
-
-            # Fetch available/unavailable courses
-            available_courses, unavailable_courses = get_available_courses(
-                self.driver, courses_str)
-            logging.info(
-                f"Found {len(available_courses)} available courses for registration attempt.")
-
-            # Try to register available courses
-            if available_courses:
-                attempt_course_registration(
-                    self.driver, available_courses, semester)
-
-            # Log reasons for unavailable courses
-            if unavailable_courses:
-                check_unavailable_course_reasons(
-                    self.driver, unavailable_courses)
+            if self.record_dir:
+                start_recording(self.record_dir, redact=[username, password, *self.record_redact])
+            if self.memory_limit:
+                start_memory_governor(int(self.memory_limit))
+
+            opens_at = self.opens_at_var.get().strip()
+            opens_at = parse_opening_time(opens_at) if opens_at else None
+            use_http_engine = self.http_engine_var.get()
+            sessions = int(self.sessions_var.get())
+            max_credits = int(self.max_credits_var.get()) if self.max_credits_var.get().strip() else None
+
+            if sessions > 1:
+                # Split the courses over several browser sessions registering at once
+                register_in_parallel(username, password, courses_str, semester, sessions=sessions,
+                                     driver_factory=self.prewarmer.take, opens_at=opens_at,
+                                     use_http_engine=use_http_engine, max_credits=max_credits)
+            else:
+                # Use the pre-warmed Chrome WebDriver
+                self.driver = launch_recyclable(self.prewarmer.take)
+
+                # Perform the automated steps
+                run_registration(self.driver, username, password, courses_str, semester,
+                                 opens_at=opens_at, use_http_engine=use_http_engine, max_credits=max_credits)
+
+            if self.watch_var.get() and not self.stop_event.is_set():
+                # Keep one session watching for seats that open later (add/drop)
+                logged_in = self.driver is not None
+                if not logged_in:
+                    self.driver = launch_recyclable(self.prewarmer.take)
+                watch_for_seats(self.driver, username, password, courses_str, semester,
+                                use_http_engine=use_http_engine, stop_event=self.stop_event,
+                                log_in_first=not logged_in)
 
             logging.info("\n🎉 Process finished successfully.")
             messagebox.showinfo(
@@ -287,9 +508,16 @@ class RegistrationBotUI:
             messagebox.showerror(
                 "Critical Error", f"The process failed with an error: {e}")
         finally:
+            stop_recording()
+            stop_memory_governor()
+            if tracing:
+                stop_tracing(self.trace_file)
             # Always clean up the WebDriver
             if self.driver:
                 self.driver.quit()
-            # Re-enable the start button
+                self.driver = None
+            # Re-enable the start button and get a fresh browser ready for the next run
             self.root.after(0, lambda: self.start_button.config(
                 state=tk.NORMAL, text="Start Registration"))
+            self.root.after(0, lambda: self.stop_button.config(state=tk.DISABLED))
+            self.root.after(0, self.start_prewarm)
@@ -1,15 +1,47 @@
 import os
 import sys
+import time
 import logging
-import tkinter as tk
 from dotenv import load_dotenv
-from selenium import webdriver
-from automation import *
-from gui.app_ui import RegistrationBotUI
+from functools import partial
+
+# Each mode imports only what it uses: the CLI never loads Tk, and the GUI shows its
+# window before Selenium loads (see gui.app_ui). `python -m tools.bench_import` tracks this.
+
+
+def env_number(name, default=None, convert=int, allow_zero=False):
+    """Reads a positive number setting from the environment, logging and raising ValueError if it isn't one."""
+    text = (os.getenv(name) or "").strip()
+    if not text:
+        return default
+    try:
+        value = convert(text)
+    except ValueError:
+        value = None
+    if value is None or value < 0 or (value == 0 and not allow_zero):
+        logging.critical(f"{name} must be a positive number, got {text!r}.")
+        raise ValueError(f"Invalid {name} in .env file.")
+    return value
 
 
 def run_cli():
     """Runs the application in Command-Line Interface (CLI) mode."""
+    from automation import (
+        WATCH_INTERVAL,
+        configure_message_patterns,
+        create_driver,
+        launch_recyclable,
+        parse_opening_time,
+        register_in_parallel,
+        run_registration,
+        start_memory_governor,
+        start_recording,
+        start_tracing,
+        stop_memory_governor,
+        stop_recording,
+        stop_tracing,
+        watch_for_seats
+    )
 
     # Configure root logger for console output
     logging.basicConfig(
@@ -29,6 +61,13 @@ def run_cli():
     password = os.getenv("SESS_PASSWORD")
     courses_str = os.getenv("COURSES")
     semester = os.getenv("SEMESTER")
+    use_http_engine = os.getenv("REGISTRATION_ENGINE", "browser").lower() == "http"
+    opens_at = os.getenv("REGISTRATION_OPENS_AT")
+    headless = os.getenv("HEADLESS", "").lower() in ("1", "true", "yes")
+    trace_file = os.getenv("TRACE_FILE")
+    record_dir = os.getenv("RECORD_SESSION")
+    message_patterns = os.getenv("MESSAGE_PATTERNS")
+    watch_seats = os.getenv("WATCH_SEATS", "").lower() in ("1", "true", "yes")
 
     # Validate that all required variables are present
     if not all([username, password, courses_str, semester]):
@@ -36,26 +75,57 @@ def run_cli():
             "One or more required environment variables are missing in .env file.")
         raise ValueError("Required environment variables are missing.")
 
+    sessions = env_number("PARALLEL_SESSIONS", 1)
+    max_credits = env_number("MAX_CREDITS")
+    watch_interval = env_number("WATCH_INTERVAL", WATCH_INTERVAL, convert=float)
+    memory_limit = env_number("MEMORY_LIMIT_MB")
+
+    if message_patterns:
+        # Extra portal messages to recognize, on top of the built-in ones
+        configure_message_patterns(message_patterns)
+
     driver = None
+    if trace_file:
+        # Time every step of the run; the trace and a per-step summary are written at the end
+        start_tracing()
+    if record_dir:
+        # Save sanitized pages and step timings for offline replay (tools.replay_server)
+        extra = [text.strip() for text in os.getenv("RECORD_REDACT", "").split(',')]
+        start_recording(record_dir, redact=[username, password, *extra])
+    if memory_limit:
+        # Replace browsers that grow past the limit during long waits, restoring their session
+        start_memory_governor(memory_limit)
     try:
-        # automatically manage the ChromeDriver installation
-        driver = webdriver.Chrome()
+        opens_at = parse_opening_time(opens_at) if opens_at else None
 
-        # Log in to the university system
-        log_in(driver, username, password)
+        if sessions > 1:
+            # Split the courses over several browser sessions registering at once
+            register_in_parallel(username, password, courses_str, semester, sessions=sessions,
+                                 driver_factory=partial(create_driver, headless=headless),
+                                 opens_at=opens_at, use_http_engine=use_http_engine, max_credits=max_credits)
+            if watch_seats:
+                # Keep one session watching for seats that open later (add/drop)
+                driver = launch_recyclable(partial(create_driver, headless=headless))
+                watch_for_seats(driver, username, password, courses_str, semester, use_http_engine=use_http_engine,
+                                interval=watch_interval, log_in_first=True)
+            return
 
-        # Navigate to the registration operations page
-        navigate_to_registration_page(driver)
+        # automatically manage the ChromeDriver installation, with a lean, fast-starting profile
+        driver = launch_recyclable(partial(create_driver, headless=headless))
 
-        # Check which courses are available
-        available_courses, unavailable_courses = get_available_courses(
-            driver, courses_str)
+        # Log in, wait for the registration window, register and report unavailable courses
+        run_registration(driver, username, password, courses_str, semester,
+                         opens_at=opens_at, use_http_engine=use_http_engine, max_credits=max_credits)
 
-        # Automatically attempt to register
-        attempt_course_registration(driver, available_courses, semester)
+        if watch_seats:
+            # Keep the session watching for seats that open later (add/drop); Ctrl+C stops it
+            watch_for_seats(driver, username, password, courses_str, semester,
+                            use_http_engine=use_http_engine, interval=watch_interval)
 
-        # Check and print the reasons why certain courses are unavailable
-        check_unavailable_course_reasons(driver, unavailable_courses)
+        # Report the timings now rather than after the browser is closed
+        stop_recording()
+        stop_memory_governor()
+        stop_tracing(trace_file)
 
         # Wait for user input before closing the browser
         input("Press Enter to close the browser...")
@@ -63,16 +133,128 @@ def run_cli():
     except SystemExit as e:
         # This exception is raised by navigate_to_registration_page on critical errors
         logging.critical(f"Process terminated: {e}")
+    except KeyboardInterrupt:
+        logging.info("Stopped by the user.")
     except Exception as e:
         logging.error(f"An unexpected error occurred: {e}")
     finally:
+        stop_recording()
+        stop_memory_governor()
+        stop_tracing(trace_file)
         if driver:
             driver.quit()
         logging.info("--- CLI mode finished ---")
 
 
+def run_jobs_cli(jobs_file):
+    """Runs the registrations of every account in `jobs_file` concurrently."""
+    from automation import DEFAULT_JOBS_REPORT, LOGIN_STAGGER, configure_message_patterns, load_jobs, run_jobs
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s',
+        datefmt='%H:%M:%S'
+    )
+    logging.getLogger('selenium').setLevel(logging.ERROR)
+
+    logging.info(f"--- Running the accounts in {jobs_file} ---")
+
+    # Settings shared by every account unless its entry overrides them
+    load_dotenv()
+    defaults = {
+        "semester": os.getenv("SEMESTER"),
+        "opens_at": os.getenv("REGISTRATION_OPENS_AT"),
+        "max_credits": env_number("MAX_CREDITS"),
+        "use_http_engine": os.getenv("REGISTRATION_ENGINE", "browser").lower() == "http",
+    }
+    max_browsers = env_number("MAX_BROWSERS")
+    stagger = env_number("LOGIN_STAGGER", LOGIN_STAGGER, convert=float, allow_zero=True)
+    report_file = os.getenv("JOBS_REPORT") or DEFAULT_JOBS_REPORT
+    memory_limit = env_number("MEMORY_LIMIT_MB")
+    message_patterns = os.getenv("MESSAGE_PATTERNS")
+
+    if message_patterns:
+        configure_message_patterns(message_patterns)
+
+    try:
+        jobs = load_jobs(jobs_file, defaults)
+        # Many browsers at once are only practical without windows
+        run_jobs(jobs, max_browsers=max_browsers, stagger=stagger, report_path=report_file,
+                 memory_limit=memory_limit)
+    except KeyboardInterrupt:
+        logging.info("Stopped by the user.")
+    except (OSError, ValueError) as e:
+        logging.critical(f"Could not run the jobs: {e}")
+    logging.info("--- Jobs finished ---")
+
+
+def run_server_cli():
+    """Serves the HTTP control API until interrupted."""
+    from automation import (
+        DEFAULT_CONTROL_PORT,
+        ControlServer,
+        configure_message_patterns,
+        load_accounts,
+        max_concurrent_browsers,
+        start_memory_governor,
+        stop_memory_governor
+    )
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(threadName)s - %(levelname)s - %(message)s',
+        datefmt='%H:%M:%S'
+    )
+    logging.getLogger('selenium').setLevel(logging.ERROR)
+
+    load_dotenv()
+    accounts_file = os.getenv("ACCOUNTS_FILE")
+    message_patterns = os.getenv("MESSAGE_PATTERNS")
+    workers = env_number("MAX_BROWSERS")
+    memory_limit = env_number("MEMORY_LIMIT_MB")
+    port = env_number("CONTROL_PORT", DEFAULT_CONTROL_PORT)
+    defaults = {
+        "semester": os.getenv("SEMESTER"),
+        "max_credits": os.getenv("MAX_CREDITS") or None,
+        "use_http_engine": os.getenv("REGISTRATION_ENGINE", "browser").lower() == "http",
+    }
+
+    if message_patterns:
+        configure_message_patterns(message_patterns)
+
+    try:
+        accounts = load_accounts(accounts_file) if accounts_file else {}
+    except (OSError, ValueError) as e:
+        logging.critical(f"Could not read the accounts: {e}")
+        return
+    # The .env account is available as "default"
+    if os.getenv("SESS_USERNAME") and os.getenv("SESS_PASSWORD"):
+        accounts.setdefault("default", (os.getenv("SESS_USERNAME"), os.getenv("SESS_PASSWORD")))
+    if not accounts:
+        logging.critical("No accounts: set ACCOUNTS_FILE or SESS_USERNAME/SESS_PASSWORD in the .env file.")
+        return
+
+    server = ControlServer(accounts, workers=workers or max_concurrent_browsers(),
+                           host=os.getenv("CONTROL_HOST") or "127.0.0.1",
+                           port=port,
+                           token=os.getenv("CONTROL_TOKEN") or None, defaults=defaults)
+    if memory_limit:
+        # Replace worker browsers that grow past the limit, restoring their session
+        start_memory_governor(memory_limit)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        logging.info("Stopping the control API...")
+    finally:
+        server.stop()
+        stop_memory_governor()
+
+
 def run_gui():
     """Launches the Graphical User Interface (GUI) for the application."""
+    import tkinter as tk
+    from gui.app_ui import RegistrationBotUI
+
     root = tk.Tk()
     app = RegistrationBotUI(root)
     root.mainloop()
@@ -82,5 +264,11 @@ if __name__ == '__main__':
     # Check command-line arguments to decide which mode to run
     if len(sys.argv) > 1 and sys.argv[1].lower() == '--cli':
         run_cli()
+    elif len(sys.argv) > 1 and sys.argv[1].lower() == '--jobs':
+        if len(sys.argv) < 3:
+            sys.exit("Usage: python main.py --jobs <jobs file>")
+        run_jobs_cli(sys.argv[2])
+    elif len(sys.argv) > 1 and sys.argv[1].lower() == '--serve':
+        run_server_cli()
     else:
         run_gui()
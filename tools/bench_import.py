@@ -0,0 +1,142 @@
+"""
+Import-time benchmark for the entry points.
+
+Runs each mode's imports in a fresh interpreter with `python -X importtime` and
+reports the total import time, the process wall time and the heaviest imports,
+so a stray top-level `import selenium` or `import tkinter` shows up before a
+registration day:
+
+- cli:        what `main.py --cli` imports before it launches Chrome
+- gui:        what `main.py` imports before the window can paint
+- background: what the GUI then loads on its pre-warm thread
+- eager:      everything at once, as the entry point used to import it
+
+    python -m tools.bench_import --runs 5 --save imports.json
+    python -m tools.bench_import --runs 5 --baseline imports.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MODES = {
+    "cli": "import main; from automation import run_registration, register_in_parallel, watch_for_seats, "
+           "parse_opening_time, create_driver; import selenium.webdriver",
+    "gui": "import main, tkinter; import gui.app_ui",
+    "background": "import automation.workflow, automation.parallel, automation.watcher, selenium.webdriver",
+    "eager": "import tkinter, selenium.webdriver, gui.app_ui; from automation import *",
+}
+
+# Modules that must stay out of a mode's imports
+FORBIDDEN = {
+    "cli": ["tkinter"],
+    "gui": ["selenium", "urllib3"],
+}
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr):
+    """ Returns ({top-level module: cumulative us}, set of every imported module) from -X importtime output. """
+    top_level, modules = {}, set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # The header line
+        modules.add(name.strip())
+        # Nested imports are indented under the module that pulled them in
+        if not name[1:].startswith(" "):
+            top_level[name.strip()] = int(cumulative)
+    return top_level, modules
+
+
+def run_mode(code):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_ROOT,
+                            capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{result.stderr[-2000:]}")
+    top_level, modules = parse_importtime(result.stderr)
+    return {
+        "import_ms": sum(top_level.values()) / 1000,
+        "wall_ms": wall * 1000,
+        "modules": len(modules),
+        "top_level": top_level,
+        "loaded": modules,
+    }
+
+
+def bench(modes, runs):
+    summary = {}
+    for mode in modes:
+        # The first run writes .pyc files and fills the OS file cache; it isn't counted
+        run_mode(MODES[mode])
+        results = [run_mode(MODES[mode]) for _ in range(runs)]
+        heaviest = sorted(results[-1]["top_level"].items(), key=lambda item: -item[1])[:5]
+        loaded = results[-1]["loaded"]
+        summary[mode] = {
+            "import_ms": statistics.median(r["import_ms"] for r in results),
+            "wall_ms": statistics.median(r["wall_ms"] for r in results),
+            "modules": results[-1]["modules"],
+            "heaviest": [[name, us / 1000] for name, us in heaviest],
+            "forbidden_loaded": [name for name in FORBIDDEN.get(mode, [])
+                                 if any(m == name or m.startswith(name + ".") for m in loaded)],
+        }
+    return summary
+
+
+def print_report(summary, baseline=None):
+    print(f"{'mode':<12}{'import ms':>12}{'baseline':>12}{'wall ms':>12}{'modules':>10}")
+    for mode, result in summary.items():
+        old = (baseline or {}).get(mode, {}).get("import_ms")
+        print(f"{mode:<12}{result['import_ms']:>12.1f}{'-' if old is None else f'{old:.1f}':>12}"
+              f"{result['wall_ms']:>12.1f}{result['modules']:>10}")
+    for mode, result in summary.items():
+        print(f"\n{mode} heaviest: " + ", ".join(f"{name} {ms:.1f} ms" for name, ms in result["heaviest"]))
+        if result["forbidden_loaded"]:
+            print(f"{mode} LOADS {', '.join(result['forbidden_loaded'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the entry points' cold-start import time.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mode", choices=list(MODES), action="append",
+                        help="mode to measure (repeatable; default: all)")
+    parser.add_argument("--save", help="write the summary to this JSON file")
+    parser.add_argument("--baseline", help="compare against a summary saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown before a mode counts as a regression")
+    args = parser.parse_args()
+
+    summary = bench(args.mode or list(MODES), args.runs)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(summary, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    failed = False
+    for mode, result in summary.items():
+        if result["forbidden_loaded"]:
+            failed = True
+        old = (baseline or {}).get(mode, {}).get("import_ms")
+        if old is not None and result["import_ms"] > old * (1 + args.tolerance):
+            print(f"REGRESSION {mode}: {old:.1f} ms -> {result['import_ms']:.1f} ms")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Startup benchmark: how long from "start" until the bot is logged in.
+
+Compares the old behavior (bare `webdriver.Chrome()` with full page loads), the
+lean driver profile, and a driver pre-warmed in the background as the GUI does,
+against the mock portal serving slow images, fonts and analytics.
+
+With --recovery, it instead measures getting back to the registration page after
+the session expired there: logging in again in the open browser (SessionGuard)
+against the old cold restart (quit, relaunch, log in).
+
+    python -m tools.bench_startup --runs 3 --headless
+    python -m tools.bench_startup --runs 3 --headless --recovery
+"""
+
+import argparse
+import logging
+import statistics
+import time
+from functools import partial
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from automation import log_in, navigate_to_registration_page, create_driver, DriverPrewarmer, SessionGuard
+from automation.sess_client import REGISTRATION_PAGE_MARKER
+from tools.mock_portal import MockPortal, PortalConfig
+
+
+def bare_driver(headless):
+    # The driver as main.py and the GUI created it before the lean profile
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    return webdriver.Chrome(options=options)
+
+
+def logged_in(driver, url):
+    """Logs in and waits until the home page's registration tile is there."""
+    log_in(driver, "benchmark", "benchmark", sess_url=url)
+    WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.inner")))
+
+
+def time_cold(factory, url):
+    started = time.perf_counter()
+    driver = factory()
+    try:
+        logged_in(driver, url)
+        return time.perf_counter() - started
+    finally:
+        driver.quit()
+
+
+def time_prewarmed(factory, url):
+    prewarmer = DriverPrewarmer(factory, warm_url=url).start()
+    # The user is still typing: the launch finishes before "Start Registration" is clicked
+    prewarmer.wait()
+    started = time.perf_counter()
+    driver = prewarmer.take()
+    try:
+        logged_in(driver, url)
+        return time.perf_counter() - started
+    finally:
+        driver.quit()
+
+
+def on_registration_page(driver, url):
+    """Logs in and enters the registration page."""
+    log_in(driver, "benchmark", "benchmark", sess_url=url)
+    navigate_to_registration_page(driver)
+    WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.CSS_SELECTOR, REGISTRATION_PAGE_MARKER)))
+
+
+def time_cold_restart(factory, portal):
+    """Seconds from an expired session on the registration page back to it, relaunching the browser."""
+    driver = factory()
+    try:
+        on_registration_page(driver, portal.url)
+        portal.expire_sessions()
+        started = time.perf_counter()
+    finally:
+        driver.quit()
+    driver = factory()
+    try:
+        on_registration_page(driver, portal.url)
+        return time.perf_counter() - started
+    finally:
+        driver.quit()
+
+
+def time_in_place(factory, portal):
+    """Seconds from an expired session on the registration page back to it, in the same browser."""
+    driver = factory()
+    try:
+        on_registration_page(driver, portal.url)
+        portal.expire_sessions()
+        # The next request after the timeout lands on the login page
+        driver.refresh()
+        started = time.perf_counter()
+        session = SessionGuard(driver, "benchmark", "benchmark", sess_url=portal.url)
+        session.entered = True
+        if not session.recover_if_expired():
+            raise RuntimeError("The expired session was not detected.")
+        WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.CSS_SELECTOR, REGISTRATION_PAGE_MARKER)))
+        return time.perf_counter() - started
+    finally:
+        driver.quit()
+
+
+def compare_recovery(args):
+    factory = partial(create_driver, headless=args.headless)
+    results = {}
+    with MockPortal(PortalConfig(asset_count=args.assets, asset_delay=args.asset_delay)) as portal:
+        for name, measure in (("cold restart", time_cold_restart), ("in-place re-login", time_in_place)):
+            results[name] = statistics.median(measure(factory, portal) for _ in range(args.runs))
+
+    baseline = results["cold restart"]
+    print(f"{'recovery':<30}{'expired->registration (s)':>27}{'saved (s)':>12}")
+    for name, seconds in results.items():
+        print(f"{name:<30}{seconds:>27.2f}{baseline - seconds:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare browser startup strategies against the mock portal.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--assets", type=int, default=10, help="images per page on the mock portal")
+    parser.add_argument("--asset-delay", type=float, default=0.3, help="seconds to serve each asset")
+    parser.add_argument("--recovery", action="store_true",
+                        help="compare recovering from an expired session in place against a cold restart")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('selenium').setLevel(logging.ERROR)
+
+    if args.recovery:
+        compare_recovery(args)
+        return
+
+    config = PortalConfig(asset_count=args.assets, asset_delay=args.asset_delay)
+    modes = {
+        "bare webdriver.Chrome()": partial(time_cold, partial(bare_driver, args.headless)),
+        "lean profile": partial(time_cold, partial(create_driver, headless=args.headless)),
+        "lean profile, pre-warmed": partial(time_prewarmed, partial(create_driver, headless=args.headless)),
+    }
+
+    results = {}
+    with MockPortal(config) as portal:
+        for name, measure in modes.items():
+            results[name] = statistics.median(measure(portal.url) for _ in range(args.runs))
+
+    baseline = results["bare webdriver.Chrome()"]
+    print(f"{'mode':<30}{'start->logged in (s)':>22}{'saved (s)':>12}")
+    for name, seconds in results.items():
+        print(f"{name:<30}{seconds:>22.2f}{baseline - seconds:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
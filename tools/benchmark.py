@@ -0,0 +1,278 @@
+"""
+End-to-end registration latency benchmark against the local mock portal.
+
+Runs log_in -> navigate_to_registration_page -> get_available_courses ->
+attempt_course_registration against tools.mock_portal and reports
+time-to-first-registration, time-to-all-registered and WebDriver round-trips
+per course, so regressions show up before a real registration day.
+
+With --replay, the flow runs against a recorded registration day instead (see
+tools.replay_server), with the recorded courses unless --courses is given.
+With --engine cdp, the same flow runs through automation.aio over the DevTools
+protocol, and round-trips count protocol commands instead of WebDriver commands.
+
+    python -m tools.benchmark --runs 3 --headless --save bench.json
+    python -m tools.benchmark --runs 3 --headless --baseline bench.json
+    python -m tools.benchmark --runs 3 --headless --replay recording --baseline replay.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+from collections import Counter
+
+from selenium import webdriver
+
+from automation import (
+    log_in,
+    navigate_to_registration_page,
+    get_available_courses,
+    attempt_course_registration,
+    attempt_course_registration_http,
+    configure_message_patterns
+)
+from automation import aio
+from tools.mock_portal import MOCK_MESSAGE_PATTERNS, MockPortal, PortalConfig
+from tools.replay_server import Recording, ReplayPortal
+
+# The last entry is not offered by the default mock catalog.
+DEFAULT_COURSES = "190131034:1,190130018:1:1,190131040:1,190131050:1,190131060:1,190139999:1"
+
+# Metrics where a larger value is a regression, in report order.
+METRICS = [
+    "login_s",
+    "navigate_s",
+    "scan_s",
+    "time_to_first_registration_s",
+    "time_to_all_registered_s",
+    "round_trips_per_course",
+]
+
+
+class RoundTripCounter:
+    """Counts every WebDriver command sent by a driver and its elements."""
+
+    def __init__(self, driver):
+        self.total = 0
+        self.by_command = Counter()
+        original_execute = driver.execute
+
+        def counting_execute(driver_command, params=None):
+            self.total += 1
+            self.by_command[driver_command] += 1
+            return original_execute(driver_command, params)
+
+        # WebElement commands go through their parent driver's execute, so this covers both.
+        driver.execute = counting_execute
+
+
+def create_driver(headless):
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    return webdriver.Chrome(options=options)
+
+
+def run_once(config, courses, semester, headless, engine="browser", replay=None, speed=1.0, max_rounds=None):
+    """Runs the full flow once against a fresh mock portal (or a replay of `replay`) and returns its metrics."""
+    with (ReplayPortal(replay, speed) if replay else MockPortal(config)) as portal:
+        driver = create_driver(headless)
+        try:
+            counter = RoundTripCounter(driver)
+            start = time.perf_counter()
+            wall_start = time.time()
+
+            log_in(driver, "benchmark", "benchmark", sess_url=portal.url)
+            logged_in = time.perf_counter()
+
+            navigate_to_registration_page(driver)
+            entered = time.perf_counter()
+
+            available, unavailable = get_available_courses(driver, courses)
+            scanned = time.perf_counter()
+
+            trips_before = counter.total
+            register = attempt_course_registration_http if engine == "http" else attempt_course_registration
+            # A replay repeats its last answers, so a course full on the day would be retried forever
+            register(driver, list(available), semester, max_rounds=max_rounds)
+            attempt_trips = counter.total - trips_before
+        finally:
+            driver.quit()
+
+        registrations = [stamp for stamp, _, _ in portal.events("registered")]
+
+    first = min(registrations) - wall_start if registrations else None
+    everything = max(registrations) - wall_start if len(registrations) == len(available) and available else None
+    return {
+        "login_s": logged_in - start,
+        "navigate_s": entered - logged_in,
+        "scan_s": scanned - entered,
+        "time_to_first_registration_s": first,
+        "time_to_all_registered_s": everything,
+        "round_trips_per_course": attempt_trips / len(available) if available else None,
+        "registered": len(registrations),
+        "available": len(available),
+        "unavailable": len(unavailable),
+        "round_trips": counter.total,
+    }
+
+
+async def _run_cdp_flow(portal, courses, semester, headless, max_rounds):
+    browser = await aio.Browser.launch(headless=headless)
+    try:
+        page = await browser.new_page()
+        trips = Counter()
+        original_send = browser.connection.send
+
+        async def counting_send(method, params=None, session_id=None):
+            trips[method] += 1
+            return await original_send(method, params, session_id)
+
+        browser.connection.send = counting_send
+        stamps = {"start": time.perf_counter(), "wall_start": time.time()}
+
+        await aio.log_in(page, "benchmark", "benchmark", sess_url=portal.url)
+        stamps["logged_in"] = time.perf_counter()
+
+        await aio.navigate_to_registration_page(page)
+        stamps["entered"] = time.perf_counter()
+
+        available, unavailable = await aio.get_available_courses(page, courses)
+        stamps["scanned"] = time.perf_counter()
+
+        trips_before = sum(trips.values())
+        await aio.attempt_course_registration(page, list(available), semester, max_rounds=max_rounds)
+        stamps["attempt_trips"] = sum(trips.values()) - trips_before
+        stamps["round_trips"] = sum(trips.values())
+        return available, unavailable, stamps
+    finally:
+        await browser.close()
+
+
+def run_once_cdp(config, courses, semester, headless, replay=None, speed=1.0, max_rounds=None):
+    """Like run_once, through automation.aio; round-trips are DevTools protocol commands."""
+    with (ReplayPortal(replay, speed) if replay else MockPortal(config)) as portal:
+        available, unavailable, stamps = asyncio.run(_run_cdp_flow(portal, courses, semester, headless, max_rounds))
+        registrations = [stamp for stamp, _, _ in portal.events("registered")]
+
+    first = min(registrations) - stamps["wall_start"] if registrations else None
+    everything = (max(registrations) - stamps["wall_start"]
+                  if len(registrations) == len(available) and available else None)
+    return {
+        "login_s": stamps["logged_in"] - stamps["start"],
+        "navigate_s": stamps["entered"] - stamps["logged_in"],
+        "scan_s": stamps["scanned"] - stamps["entered"],
+        "time_to_first_registration_s": first,
+        "time_to_all_registered_s": everything,
+        "round_trips_per_course": stamps["attempt_trips"] / len(available) if available else None,
+        "registered": len(registrations),
+        "available": len(available),
+        "unavailable": len(unavailable),
+        "round_trips": stamps["round_trips"],
+    }
+
+
+def summarize(runs):
+    """Median of every metric over the runs, skipping runs where it was not reached."""
+    summary = {}
+    for key in runs[0]:
+        values = [run[key] for run in runs if run[key] is not None]
+        summary[key] = statistics.median(values) if values else None
+    return summary
+
+
+def compare(summary, baseline, tolerance):
+    """Returns the metrics that got worse than the baseline by more than `tolerance`."""
+    regressions = []
+    for key in METRICS:
+        new, old = summary.get(key), baseline.get(key)
+        if old is None:
+            continue
+        if new is None or new > old * (1 + tolerance):
+            regressions.append((key, old, new))
+    return regressions
+
+
+def print_report(summary, baseline=None):
+    print(f"{'metric':<32}{'median':>12}{'baseline':>12}")
+    for key in METRICS + ["registered", "available", "unavailable", "round_trips"]:
+        value = summary.get(key)
+        old = (baseline or {}).get(key)
+        fmt = lambda v: "-" if v is None else f"{v:.3f}"
+        print(f"{key:<32}{fmt(value):>12}{fmt(old):>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the registration flow against the mock portal.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--courses")
+    parser.add_argument("--engine", choices=["browser", "http", "cdp"], default="browser")
+    parser.add_argument("--config", help="JSON scenario file for the mock portal")
+    parser.add_argument("--api-delay", type=float, help="override the portal's API delay (s)")
+    parser.add_argument("--toast-delay", type=float, help="override the portal's toast delay (s)")
+    parser.add_argument("--page-delay", type=float, help="override the portal's page delay (s)")
+    parser.add_argument("--error-rate", type=float, help="override the portal's API error rate")
+    parser.add_argument("--replay", help="run against this recorded session instead of the mock portal")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (with --replay)")
+    parser.add_argument("--max-rounds", type=int, help="registration rounds per run (default: 3 with --replay)")
+    parser.add_argument("--save", help="write the summary to this JSON file")
+    parser.add_argument("--baseline", help="compare against a summary saved with --save")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%H:%M:%S')
+    logging.getLogger('selenium').setLevel(logging.ERROR)
+
+    courses, semester, max_rounds = args.courses or DEFAULT_COURSES, None, args.max_rounds
+    if args.replay:
+        recorded_courses, semester = Recording(args.replay).plan()
+        courses = args.courses or recorded_courses
+        max_rounds = max_rounds or 3
+    else:
+        # The mock portal's made-up messages; a recording has the real ones
+        configure_message_patterns(MOCK_MESSAGE_PATTERNS)
+
+    runs = []
+    for index in range(args.runs):
+        config = PortalConfig.from_file(args.config) if args.config else PortalConfig()
+        for name in ("api_delay", "toast_delay", "page_delay", "error_rate"):
+            if getattr(args, name) is not None:
+                setattr(config, name, getattr(args, name))
+        if args.engine == "cdp":
+            result = run_once_cdp(config, courses, semester or config.semester, args.headless,
+                                  replay=args.replay, speed=args.speed, max_rounds=max_rounds)
+        else:
+            result = run_once(config, courses, semester or config.semester, args.headless, args.engine,
+                              replay=args.replay, speed=args.speed, max_rounds=max_rounds)
+        print(f"run {index + 1}/{args.runs}: "
+              f"first={result['time_to_first_registration_s']} all={result['time_to_all_registered_s']}")
+        runs.append(result)
+
+    summary = summarize(runs)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(summary, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    if baseline:
+        regressions = compare(summary, baseline, args.tolerance)
+        for key, old, new in regressions:
+            print(f"REGRESSION {key}: {old} -> {new}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+Load test for the control API against the local mock portal.
+
+Starts the mock portal and a ControlServer, subscribes to /events, submits a few
+hundred jobs (one mock account each) over HTTP and waits until all of them have
+finished. Reports:
+
+- submit latency: POST /jobs round-trip
+- queue wait: submit -> a worker starts the job (includes waiting for a free worker)
+- dispatch gap: a worker finishing one job -> starting its next (the scheduler's own overhead)
+- event delivery latency: event published -> received by the SSE subscriber
+- event throughput: events received per second over the run
+
+By default jobs register over plain HTTP (login, enter, add-course requests) so
+hundreds of them fit on one machine; --browser runs the full Selenium flow instead.
+
+    python -m tools.load_control_api --jobs 300 --workers 8
+    python -m tools.load_control_api --jobs 40 --workers 4 --browser
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import threading
+import time
+from functools import partial
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urljoin
+
+import urllib3
+
+from automation import create_driver
+from automation.control_api import BrowserRunner, ControlServer
+from automation.messages import classifier, configure_message_patterns
+from automation.plan import parse_course_plan
+from automation.sess_client import run_registration_rounds
+from tools.mock_portal import MOCK_MESSAGE_PATTERNS, MockPortal, PortalConfig
+
+DEFAULT_COURSES = "190131034:1|2,190130018:1:1,190131040:1,190131050:1,190131060:1"
+
+
+class PortalHttpRunner:
+    """Registers a job's courses with plain HTTP requests to the mock portal: no browser needed."""
+
+    def __init__(self, portal_url, max_rounds=3):
+        self.portal_url = portal_url
+        self.max_rounds = max_rounds
+        self.http = urllib3.PoolManager(maxsize=32, retries=False, timeout=urllib3.Timeout(10))
+
+    def _request(self, cookies, method, path, fields=None):
+        headers = {'Cookie': '; '.join(f"{k}={v}" for k, v in cookies.items())}
+        if method == 'POST':
+            headers['Content-Type'] = 'application/x-www-form-urlencoded; charset=UTF-8'
+        response = self.http.request(method, urljoin(self.portal_url, path), body=urlencode(fields or {}) if
+                                     method == 'POST' else None, headers=headers, redirect=False)
+        for header in response.headers.getlist('Set-Cookie'):
+            for name, morsel in SimpleCookie(header).items():
+                cookies[name] = morsel.value
+        return response
+
+    def __call__(self, job, credentials, progress):
+        username, password = credentials
+        cookies = {}
+        self._request(cookies, 'POST', '/', {'edId': username, 'edPass': password})
+        self._request(cookies, 'POST', '/api/enter')
+        page = self._request(cookies, 'GET', '/register').data.decode('utf-8')
+        token = page.split('name="__RequestVerificationToken" value="', 1)[1].split('"', 1)[0]
+
+        def register_option(course):
+            ident = f"{job.semester}:{course.course_id}:{course.group_code}:{course.sub_group}"
+            response = self._request(cookies, 'POST', '/api/addcourse',
+                                     {'ident': ident, '__RequestVerificationToken': token})
+            return classifier.classify(json.loads(response.data).get('message', '')).outcome
+
+        run_registration_rounds(parse_course_plan(job.courses), register_option, progress=progress,
+                                retry_delay=0, results=job.results, max_rounds=self.max_rounds)
+
+
+class EventCounter:
+    """Reads /events as an SSE client and timestamps every event on arrival."""
+
+    def __init__(self, url):
+        self.url = url
+        self.received = []  # (arrival time, event)
+        self.finished = 0
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait(5)
+        return self
+
+    def _run(self):
+        http = urllib3.PoolManager(timeout=urllib3.Timeout(connect=5, read=None))
+        response = http.request('GET', urljoin(self.url, '/events'), preload_content=False)
+        self.ready.set()
+        buffer = b""
+        # read1 returns whatever has arrived instead of waiting for a full buffer
+        while chunk := response.read1(65536):
+            buffer += chunk
+            *messages, buffer = buffer.split(b"\n\n")
+            arrived = time.time()
+            for message in messages:
+                for line in message.split(b"\n"):
+                    if line.startswith(b"data: "):
+                        event = json.loads(line[6:])
+                        self.received.append((arrived, event))
+                        if event["type"] == "finished":
+                            self.finished += 1
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(values)
+    return {"p50": statistics.median(ordered), "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max": ordered[-1]}
+
+
+def run_load_test(jobs, workers, courses, browser=False, headless=True):
+    config = PortalConfig()
+    # Enough seats for every account, so the run measures scheduling rather than full groups
+    for course in config.courses.values():
+        for group in course["groups"]:
+            group["capacity"] = max(group["capacity"], jobs)
+    accounts = {f"student-{index}": (f"40000{index:05d}", "secret") for index in range(jobs)}
+
+    with MockPortal(config) as portal:
+        if browser:
+            runner = BrowserRunner(partial(create_driver, headless=headless), sess_url=portal.url)
+        else:
+            runner = PortalHttpRunner(portal.url)
+        server = ControlServer(accounts, workers=workers, runner=runner, port=0,
+                               defaults={"semester": config.semester}).start()
+        try:
+            counter = EventCounter(server.url).start()
+            http = urllib3.PoolManager(maxsize=4)
+            submit_latencies = []
+            started = time.time()
+            for account in accounts:
+                sent = time.perf_counter()
+                response = http.request('POST', urljoin(server.url, '/jobs'),
+                                        body=json.dumps({"account": account, "courses": courses}),
+                                        headers={'Content-Type': 'application/json'})
+                submit_latencies.append(time.perf_counter() - sent)
+                if response.status != 202:
+                    raise RuntimeError(f"Submitting failed: HTTP {response.status} {response.data!r}")
+
+            while counter.finished < jobs:
+                time.sleep(0.05)
+            elapsed = time.time() - started
+        finally:
+            server.stop()
+        registered = len(portal.events("registered"))
+
+    events = [event for _, event in counter.received]
+    queue_waits = [event["waited"] for event in events if event["type"] == "started"]
+    delivery = [arrived - event["time"] for arrived, event in counter.received]
+
+    # Dispatch gap: a worker's previous "finished" to its next "started"
+    last_finished, worker_of, gaps = {}, {}, []
+    for event in events:
+        if event["type"] == "started":
+            worker_of[event["job"]] = event["worker"]
+            if event["worker"] in last_finished:
+                gaps.append(event["time"] - last_finished[event["worker"]])
+        elif event["type"] == "finished" and event["job"] in worker_of:
+            last_finished[worker_of[event["job"]]] = event["time"]
+
+    return {
+        "jobs": jobs,
+        "workers": workers,
+        "elapsed_s": elapsed,
+        "jobs_per_minute": jobs / elapsed * 60,
+        "registered": registered,
+        "events": len(events),
+        "events_per_second": len(events) / elapsed,
+        "submit_latency_s": percentiles(submit_latencies),
+        "queue_wait_s": percentiles(queue_waits),
+        "dispatch_gap_s": percentiles(gaps),
+        "event_delivery_s": percentiles(delivery),
+    }
+
+
+def print_report(result):
+    for key in ("jobs", "workers", "elapsed_s", "jobs_per_minute", "registered", "events", "events_per_second"):
+        value = result[key]
+        print(f"{key:<24}{value:>12.3f}" if isinstance(value, float) else f"{key:<24}{value:>12}")
+    print(f"{'latency':<24}{'p50':>12}{'p95':>12}{'max':>12}")
+    for key in ("submit_latency_s", "queue_wait_s", "dispatch_gap_s", "event_delivery_s"):
+        fmt = lambda v: "-" if v is None else f"{v * 1000:.2f}ms"
+        print(f"{key:<24}" + "".join(f"{fmt(result[key][p]):>12}" for p in ("p50", "p95", "max")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the control API against the mock portal.")
+    parser.add_argument("--jobs", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--courses", default=DEFAULT_COURSES)
+    parser.add_argument("--browser", action="store_true", help="run the full Selenium flow for every job")
+    parser.add_argument("--headed", action="store_true", help="show the browsers (with --browser)")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%H:%M:%S')
+    logging.getLogger('selenium').setLevel(logging.ERROR)
+
+    configure_message_patterns(MOCK_MESSAGE_PATTERNS)
+    result = run_load_test(args.jobs, args.workers, args.courses, browser=args.browser, headless=not args.headed)
+    print_report(result)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
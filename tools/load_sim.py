@@ -0,0 +1,335 @@
+"""
+Concurrency load simulation: how many registrations one host can run at once.
+
+Starts the mock portal and, for each concurrency level K, launches K browsers
+that run the full flow at the same moment (log_in -> navigate_to_registration_page
+-> get_available_courses -> attempt_course_registration), each as its own
+account. Levels ramp up until one is unhealthy (failures, latency far above
+the single-browser latency, or the CPU saturated). Reports, per level:
+
+- run latency percentiles (from the shared start to the last course's answer)
+- browser launch time
+- throughput: completed runs per minute
+- host CPU (mean and peak) and the lowest available memory seen
+- peak RSS of each browser (chromedriver and its Chrome processes)
+- failed runs (errors, or courses left unregistered)
+
+and recommends a concurrency for the host: the largest healthy level, capped by
+how many browsers of the measured size fit in the memory that was free at the start.
+
+    python -m tools.load_sim --levels 1,2,4,8 --save capacity.json
+    python -m tools.load_sim --levels 1,2,4,6,8,12 --repeat 2 --csv capacity.csv
+"""
+
+import argparse
+import csv
+import json
+import logging
+import statistics
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:  # Optional: without it, CPU is read from /proc/stat (Linux only)
+    psutil = None
+
+from automation import create_driver, log_in, navigate_to_registration_page, get_available_courses, \
+    attempt_course_registration, configure_message_patterns, Outcome
+from automation.memory import available_memory, process_tree_rss
+from automation.sess_client import read_registration_catalog
+from tools.mock_portal import MOCK_MESSAGE_PATTERNS, MockPortal, PortalConfig
+
+DEFAULT_COURSES = "190131034:1|2,190130018:1:1,190131040:1,190131050:1,190131060:1"
+DEFAULT_LEVELS = "1,2,4,8,12,16"
+# Seconds between host samples
+SAMPLE_INTERVAL = 0.5
+
+_MB = 1024 * 1024
+
+
+def _cpu_times():
+    # (busy, total) jiffies since boot, from the first line of /proc/stat
+    with open("/proc/stat") as f:
+        fields = [int(value) for value in f.readline().split()[1:]]
+    idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+    return sum(fields) - idle, sum(fields)
+
+
+class HostSampler:
+    """Samples host CPU, available memory and the RSS of every watched browser on a background thread."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.cpu = []
+        self.available = []
+        self.peak_rss = {}  # chromedriver pid -> peak bytes of its process tree
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="host-sampler", daemon=True)
+
+    def watch(self, pid):
+        with self._lock:
+            self.peak_rss.setdefault(pid, 0)
+
+    def start(self):
+        if psutil is not None:
+            psutil.cpu_percent(interval=None)  # The first call only sets the reference point
+        self._thread.start()
+        return self
+
+    def _cpu_percent(self, previous):
+        if psutil is not None:
+            return psutil.cpu_percent(interval=None), None
+        try:
+            busy, total = _cpu_times()
+        except OSError:
+            return None, None
+        if previous is None or total == previous[1]:
+            return None, (busy, total)
+        return 100.0 * (busy - previous[0]) / (total - previous[1]), (busy, total)
+
+    def _run(self):
+        _, reference = self._cpu_percent(None)
+        while not self._stop.wait(self.interval):
+            cpu, reference = self._cpu_percent(reference)
+            if cpu is not None:
+                self.cpu.append(cpu)
+            memory = available_memory()
+            if memory is not None:
+                self.available.append(memory)
+            with self._lock:
+                pids = list(self.peak_rss)
+            for pid in pids:
+                rss = process_tree_rss(pid)
+                if rss:
+                    with self._lock:
+                        self.peak_rss[pid] = max(self.peak_rss[pid], rss)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+    return {"p50": statistics.median(ordered), "p95": pick(0.95), "p99": pick(0.99), "max": ordered[-1]}
+
+
+def run_flow(name, portal, courses, semester, headless, max_rounds, start_line, sampler):
+    """One account's full flow in its own browser; waits at `start_line` so all runs of a level start together."""
+    result = {"name": name, "launch_s": None, "latency_s": None, "registered": 0, "planned": 0, "error": None}
+    launched = time.perf_counter()
+    driver = None
+    try:
+        driver = create_driver(headless=headless)
+        sampler.watch(driver.service.process.pid)
+        result["launch_s"] = time.perf_counter() - launched
+    except Exception as e:
+        result["error"] = f"launch failed: {e}"
+    try:
+        # Every run of the level crosses the line together, like students at the opening time
+        start_line.wait()
+        if driver is None:
+            return result
+        started = time.perf_counter()
+        log_in(driver, name, "secret", sess_url=portal.url)
+        navigate_to_registration_page(driver)
+        catalog = read_registration_catalog(driver, semester)
+        available, _ = get_available_courses(driver, courses, catalog=catalog)
+        outcomes = attempt_course_registration(driver, available, semester, max_rounds=max_rounds, catalog=catalog)
+        result["latency_s"] = time.perf_counter() - started
+        result["planned"] = len(available)
+        result["registered"] = sum(outcome is Outcome.REGISTERED for outcome in outcomes.values())
+        if not available or result["registered"] < len(available):
+            result["error"] = f"registered {result['registered']} of {len(available)} courses"
+    except threading.BrokenBarrierError:
+        result["error"] = result["error"] or "level aborted"
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    finally:
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+    return result
+
+
+def run_level(level, batch, portal, courses, semester, headless, max_rounds):
+    """Runs `level` flows at once and summarizes them."""
+    sampler = HostSampler().start()
+    start_line = threading.Barrier(level)
+    results = [None] * level
+
+    def run(index):
+        results[index] = run_flow(f"load-{level}-{batch}-{index}", portal, courses, semester, headless,
+                                  max_rounds, start_line, sampler)
+
+    threads = [threading.Thread(target=run, args=(index,), name=f"load-{index}") for index in range(level)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    sampler.stop()
+    return results, elapsed, sampler
+
+
+def summarize_level(level, batches):
+    """ Folds the batches of one level into a capacity-curve point. """
+    runs = [result for results, _, _ in batches for result in results]
+    elapsed = sum(seconds for _, seconds, _ in batches)
+    cpu = [value for _, _, sampler in batches for value in sampler.cpu]
+    available = [value for _, _, sampler in batches for value in sampler.available]
+    rss = [peak / _MB for _, _, sampler in batches for peak in sampler.peak_rss.values() if peak]
+    completed = [result for result in runs if result["error"] is None]
+    return {
+        "concurrency": level,
+        "runs": len(runs),
+        "failures": len(runs) - len(completed),
+        "errors": sorted({result["error"] for result in runs if result["error"]}),
+        "latency_s": percentiles([result["latency_s"] for result in completed]),
+        "launch_s": percentiles([result["launch_s"] for result in runs if result["launch_s"] is not None]),
+        "runs_per_minute": len(completed) / elapsed * 60 if elapsed else 0.0,
+        "cpu_percent": {"mean": statistics.mean(cpu) if cpu else None, "peak": max(cpu) if cpu else None},
+        "browser_rss_mb": {"p50": statistics.median(rss) if rss else None, "max": max(rss) if rss else None},
+        "min_available_mb": min(available) / _MB if available else None,
+    }
+
+
+def unhealthy_reason(point, baseline, max_failure_rate, latency_budget, cpu_limit):
+    """ Why a level is past the host's capacity, or None if it's healthy. """
+    if point["runs"] and point["failures"] / point["runs"] > max_failure_rate:
+        return f"{point['failures']}/{point['runs']} runs failed"
+    p95, base = point["latency_s"]["p95"], baseline["latency_s"]["p95"]
+    if p95 is None:
+        return "no run completed"
+    if base and p95 > base * (1 + latency_budget):
+        return f"p95 latency {p95:.1f} s is more than {1 + latency_budget:g}x the single-level {base:.1f} s"
+    peak_cpu = point["cpu_percent"]["peak"]
+    if peak_cpu is not None and peak_cpu > cpu_limit:
+        return f"CPU peaked at {peak_cpu:.0f}%"
+    return None
+
+
+def recommend(curve, free_memory_mb):
+    """ The largest healthy level, capped by how many browsers fit in the free memory. """
+    healthy = [point["concurrency"] for point in curve if point["unhealthy"] is None]
+    recommended = max(healthy) if healthy else 1
+    sizes = [point["browser_rss_mb"]["max"] for point in curve if point["browser_rss_mb"]["max"]]
+    memory_bound = int(free_memory_mb // max(sizes)) if sizes and free_memory_mb else None
+    if memory_bound is not None:
+        recommended = max(1, min(recommended, memory_bound))
+    return recommended, memory_bound
+
+
+def simulate(levels, courses=DEFAULT_COURSES, repeat=1, headless=True, max_rounds=3, max_failure_rate=0.0,
+             latency_budget=1.0, cpu_limit=90.0, keep_going=False):
+    config = PortalConfig()
+    # Enough seats for every account, so the curve measures the host rather than full groups
+    for course in config.courses.values():
+        for group in course["groups"]:
+            group["capacity"] = max(group["capacity"], max(levels) * repeat)
+
+    free_memory = available_memory()
+    curve = []
+    with MockPortal(config) as portal:
+        for level in levels:
+            batches = [run_level(level, batch, portal, courses, config.semester, headless, max_rounds)
+                       for batch in range(repeat)]
+            point = summarize_level(level, batches)
+            point["unhealthy"] = unhealthy_reason(point, curve[0] if curve else point, max_failure_rate,
+                                                  latency_budget, cpu_limit)
+            curve.append(point)
+            print_point(point)
+            if point["unhealthy"] and not keep_going:
+                break
+
+    free_memory_mb = free_memory / _MB if free_memory else None
+    recommended, memory_bound = recommend(curve, free_memory_mb)
+    return {
+        "courses": courses,
+        "free_memory_mb": free_memory_mb,
+        "curve": curve,
+        "memory_bound": memory_bound,
+        "recommended_concurrency": recommended,
+    }
+
+
+def _fmt(value, spec=".2f"):
+    return "-" if value is None else format(value, spec)
+
+
+def print_header():
+    print(f"{'K':>4}{'runs':>6}{'fail':>6}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'runs/min':>10}"
+          f"{'cpu avg%':>10}{'cpu max%':>10}{'rss MB':>9}{'free MB':>10}  verdict")
+
+
+def print_point(point):
+    latency = point["latency_s"]
+    print(f"{point['concurrency']:>4}{point['runs']:>6}{point['failures']:>6}"
+          f"{_fmt(latency['p50']):>9}{_fmt(latency['p95']):>9}{_fmt(latency['p99']):>9}"
+          f"{_fmt(point['runs_per_minute'], '.1f'):>10}"
+          f"{_fmt(point['cpu_percent']['mean'], '.0f'):>10}{_fmt(point['cpu_percent']['peak'], '.0f'):>10}"
+          f"{_fmt(point['browser_rss_mb']['max'], '.0f'):>9}{_fmt(point['min_available_mb'], '.0f'):>10}"
+          f"  {point['unhealthy'] or 'ok'}")
+
+
+def write_csv(curve, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["concurrency", "runs", "failures", "latency_p50_s", "latency_p95_s", "latency_p99_s",
+                         "runs_per_minute", "cpu_mean_percent", "cpu_peak_percent", "browser_rss_max_mb",
+                         "min_available_mb"])
+        for point in curve:
+            writer.writerow([point["concurrency"], point["runs"], point["failures"],
+                             point["latency_s"]["p50"], point["latency_s"]["p95"], point["latency_s"]["p99"],
+                             point["runs_per_minute"], point["cpu_percent"]["mean"], point["cpu_percent"]["peak"],
+                             point["browser_rss_mb"]["max"], point["min_available_mb"]])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find how many concurrent registrations this host can run.")
+    parser.add_argument("--levels", default=DEFAULT_LEVELS, help="comma-separated concurrency levels to ramp through")
+    parser.add_argument("--repeat", type=int, default=1, help="batches per level, for more latency samples")
+    parser.add_argument("--courses", default=DEFAULT_COURSES)
+    parser.add_argument("--max-rounds", type=int, default=3, help="registration rounds per run")
+    parser.add_argument("--headed", action="store_true", help="show the browsers")
+    parser.add_argument("--max-failure-rate", type=float, default=0.0,
+                        help="failed runs (fraction) a level may have and still count as healthy")
+    parser.add_argument("--latency-budget", type=float, default=1.0,
+                        help="how much p95 latency may grow over the first level (1.0 = up to 2x)")
+    parser.add_argument("--cpu-limit", type=float, default=90.0, help="peak host CPU %% a healthy level stays under")
+    parser.add_argument("--keep-going", action="store_true", help="keep ramping past the first unhealthy level")
+    parser.add_argument("--save", help="write the capacity curve and recommendation to this JSON file")
+    parser.add_argument("--csv", help="write the capacity curve to this CSV file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%H:%M:%S')
+    logging.getLogger('selenium').setLevel(logging.ERROR)
+
+    configure_message_patterns(MOCK_MESSAGE_PATTERNS)
+    levels = sorted({int(level) for level in args.levels.split(",") if level.strip()})
+    print_header()
+    result = simulate(levels, courses=args.courses, repeat=args.repeat, headless=not args.headed,
+                      max_rounds=args.max_rounds, max_failure_rate=args.max_failure_rate,
+                      latency_budget=args.latency_budget, cpu_limit=args.cpu_limit, keep_going=args.keep_going)
+
+    memory_text = (f", memory fits ~{result['memory_bound']} browsers" if result["memory_bound"] is not None
+                   else "")
+    print(f"\nRecommended concurrency for this host: {result['recommended_concurrency']}{memory_text}.")
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.csv:
+        write_csv(result["curve"], args.csv)
+
+
+if __name__ == '__main__':
+    main()
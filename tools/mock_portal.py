@@ -0,0 +1,633 @@
+"""
+A local stand-in for the SESS portal.
+
+Serves just enough of the portal for the bot to run end to end: the login form
+(edId/edPass/edEnter), the "عملیات ثبت نام" tile, the course cells and group
+rows of the registration page, toast messages and the course checker
+(edCrsCode/btnCheckCrs/lblCheckResult). Delays and failure modes come from a
+PortalConfig, so registration-day behavior can be reproduced on any machine.
+
+Run it on its own with:
+    python -m tools.mock_portal --port 8800 --config scenario.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from html import escape
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Messages shown by the portal. The bot matches on substrings of these texts; the
+# "already registered" and "capacity full" texts are made up, so the tools running
+# against this stand-in teach them to the bot with MOCK_MESSAGE_PATTERNS.
+MSG_SUCCESS = "ثبت نام در کلاس با موفقیت انجام شد"
+MSG_CONFLICT = "برخورد ساعات تشکیل کلاس با درس {other}"
+MSG_CREDIT_LIMIT = "تعداد واحد اخذ شده بیش از حد مجاز است"
+MSG_NOT_ALLOWED = "این درس چند گروه دارد که شما اجازه ثبت نام در هیچ کدامشان را ندارید"
+MSG_CAPACITY_FULL = "ظرفیت گروه تکمیل شده است"
+MSG_ALREADY_REGISTERED = "این درس قبلا اخذ شده است"
+MSG_NOT_ACTIVE = "در حال حاضر ثبت نام برای این دانشجو فعال نیست"
+MSG_EVALUATION_INCOMPLETE = "براي دروس زير ارزيابي انجام نداده ايد"
+MSG_SERVER_ERROR = "خطا در برقراری ارتباط با سرور"
+MSG_NOT_OFFERED = "درس {course} در این نیمسال ارائه نشده است"
+MSG_CHECK_OK = "درس {course} قابل اخذ است"
+
+# MESSAGE_PATTERNS file recognizing the made-up messages above
+MOCK_MESSAGE_PATTERNS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_messages.json")
+
+# A small catalog used when no scenario file is given.
+DEFAULT_COURSES = {
+    "190131034": {
+        "name": "ساختمان داده", "credits": 3,
+        "groups": [
+            {"group": "1", "sub": "0", "capacity": 40, "times": "شنبه 08:00-10:00، دوشنبه 08:00-09:00"},
+            {"group": "2", "sub": "0", "capacity": 40, "times": "یکشنبه 10:00-12:00، سه شنبه 10:00-11:00"},
+        ],
+    },
+    "190130018": {
+        "name": "فیزیک ۲", "credits": 3,
+        "groups": [
+            {"group": "1", "sub": "1", "capacity": 30, "times": "شنبه 10:00-12:00، چهارشنبه 08:00-09:00"},
+            {"group": "1", "sub": "2", "capacity": 30, "times": "شنبه 10:00-12:00، چهارشنبه 09:00-10:00"},
+        ],
+    },
+    "190131040": {
+        "name": "سیستم عامل", "credits": 3,
+        "groups": [
+            {"group": "1", "sub": "0", "capacity": 35, "times": "یکشنبه 08:00-10:00، سه شنبه 08:00-09:00"},
+        ],
+    },
+    "190131050": {
+        "name": "پایگاه داده", "credits": 3,
+        "groups": [
+            {"group": "1", "sub": "0", "capacity": 35, "times": "دوشنبه 10:00-12:00، چهارشنبه 10:00-11:00"},
+        ],
+    },
+    "190131060": {
+        "name": "آز پایگاه داده", "credits": 1,
+        "groups": [
+            {"group": "1", "sub": "0", "capacity": 20, "times": "پنج شنبه 08:00-10:00"},
+        ],
+    },
+}
+
+
+@dataclass
+class PortalConfig:
+    """Behavior of the stand-in portal. All delays are in seconds."""
+    semester: str = "14041"
+    # username -> password. When empty, any non-empty credentials are accepted.
+    accounts: dict = field(default_factory=dict)
+    courses: dict = field(default_factory=lambda: json.loads(json.dumps(DEFAULT_COURSES)))
+    # Courses that are offered but hidden from the registration page, with the checker's answer.
+    hidden_courses: dict = field(default_factory=dict)
+    # Courses the student may not take in any group.
+    not_allowed: list = field(default_factory=list)
+    max_credits: int = 20
+    # Unix time (server clock) at which registration opens. None means already open.
+    opens_at: float = None
+    # Seconds added to the server clock, e.g. to exercise clock-offset estimation.
+    clock_skew: float = 0.0
+    evaluation_incomplete: bool = False
+    page_delay: float = 0.0
+    api_delay: float = 0.05
+    toast_delay: float = 0.05
+    toast_lifetime: float = 4.0
+    # Probability that an API call answers with a server error.
+    error_rate: float = 0.0
+    # Idle seconds after which a session expires. None keeps sessions forever.
+    session_ttl: float = None
+    # Images each page references (plus one web font and an analytics script), each served after asset_delay
+    asset_count: int = 0
+    asset_delay: float = 0.0
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds a config from a scenario dict, ignoring unknown keys."""
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+# Client-side behavior of the portal pages: course/group clicks, toasts and the checker.
+PORTAL_JS = r"""
+(function () {
+  var cfg = window.PORTAL_CONFIG || {toastDelay: 0, toastLifetime: 4000};
+
+  function toast(text) {
+    setTimeout(function () {
+      var box = document.getElementById('toast-container');
+      if (!box) {
+        box = document.createElement('div');
+        box.id = 'toast-container';
+        document.body.appendChild(box);
+      }
+      var item = document.createElement('div');
+      item.className = 'toast';
+      var msg = document.createElement('div');
+      msg.className = 'toast-message';
+      msg.textContent = text;
+      item.appendChild(msg);
+      box.appendChild(item);
+      setTimeout(function () { item.remove(); }, cfg.toastLifetime);
+    }, cfg.toastDelay);
+  }
+
+  function call(method, url, data) {
+    var options = {method: method, credentials: 'same-origin'};
+    if (data) {
+      options.headers = {'Content-Type': 'application/x-www-form-urlencoded'};
+      options.body = new URLSearchParams(data);
+    }
+    return fetch(url, options).then(function (r) {
+      if (r.status === 401) { window.location = '/'; throw new Error('session expired'); }
+      return r.json();
+    });
+  }
+
+  function token() {
+    var input = document.querySelector('input[name="__RequestVerificationToken"]');
+    return input ? input.value : '';
+  }
+
+  document.addEventListener('click', function (ev) {
+    // Matched by text like the bot does, so recorded pages (see tools.replay_server) work too
+    var tile = ev.target.closest('div.inner');
+    if (tile && tile.textContent.indexOf('عملیات ثبت نام') !== -1) {
+      call('POST', '/api/enter', {}).then(function (res) {
+        if (res.ok) { window.location = '/register'; } else { toast(res.message); }
+      });
+      return;
+    }
+
+    var cell = ev.target.closest('td.label-link[addnewcrs]');
+    if (cell) {
+      var crs = cell.getAttribute('addnewcrs');
+      call('GET', '/api/groups?crs=' + encodeURIComponent(crs)).then(function (res) {
+        document.querySelectorAll('tr[ident]').forEach(function (row) {
+          row.style.display = (res.ok && row.getAttribute('data-crs') === crs) ? '' : 'none';
+        });
+        if (res.message) { toast(res.message); }
+      });
+      return;
+    }
+
+    var row = ev.target.closest('tr[ident]');
+    if (row) {
+      call('POST', '/api/addcourse', {
+        ident: row.getAttribute('ident'),
+        __RequestVerificationToken: token()
+      }).then(function (res) {
+        toast(res.message);
+        if (!res.ok) { return; }
+        var crs = row.getAttribute('data-crs');
+        var taken = document.querySelector('td.label-link[addnewcrs="' + crs + '"]');
+        if (taken) { taken.parentNode.remove(); }
+        document.querySelectorAll('tr[data-crs="' + crs + '"][ident]').forEach(function (r) { r.remove(); });
+        var reg = document.createElement('tr');
+        reg.setAttribute('data-crs', crs);
+        reg.setAttribute('data-ident', res.ident);
+        reg.innerHTML = '<td>' + crs + '</td><td class="crs-credits">' + res.credits +
+          '</td><td class="crs-time">' + res.times + '</td>';
+        document.querySelector('#registeredCourses tbody').appendChild(reg);
+      });
+      return;
+    }
+
+    if (ev.target.id === 'btnCheckCrs') {
+      var code = document.getElementById('edCrsCode').value;
+      call('POST', '/api/checkcourse', {crs: code}).then(function (res) {
+        document.getElementById('lblCheckResult').textContent = res.message;
+      });
+    }
+  });
+})();
+"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="fa" dir="rtl">
+<head><meta charset="utf-8"><title>{title}</title>{assets}</head>
+<body>
+{body}
+<script>window.PORTAL_CONFIG = {config};</script>
+<script>{script}</script>
+</body>
+</html>
+"""
+
+LOGIN_BODY = """<form method="post" action="/" id="frmLogin">
+  <div class="error">{error}</div>
+  <input type="text" name="edId" id="edId">
+  <input type="password" name="edPass" id="edPass">
+  <input type="submit" name="edEnter" id="edEnter" value="ورود">
+</form>"""
+
+HOME_BODY = """<div class="tiles">
+  <div class="tile"><div class="inner" data-action="enter">عملیات ثبت نام</div></div>
+  <div class="tile"><div class="inner">کارنامه</div></div>
+</div>"""
+
+
+class PortalState:
+    """Server-side state shared by all request handlers."""
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.sessions = {}  # session id -> {"username", "last_seen"}
+        self.registered = {}  # username -> {course_id: group dict}
+        self.enrolled = {}  # ident -> seats taken
+        self.groups = {}  # ident -> (course_id, group dict)
+        for course_id, course in config.courses.items():
+            for group in course["groups"]:
+                ident = self.ident(course_id, group)
+                self.groups[ident] = (course_id, group)
+                self.enrolled[ident] = group.get("enrolled", 0)
+        # (time.time(), kind, data) tuples for benchmarks to inspect.
+        self.events = []
+
+    def ident(self, course_id, group):
+        return f"{self.config.semester}:{course_id}:{group['group']}:{group.get('sub', '0')}"
+
+    def now(self):
+        """Current time on the server clock."""
+        return time.time() + self.config.clock_skew
+
+    def record(self, kind, **data):
+        with self.lock:
+            self.events.append((time.time(), kind, data))
+
+    def is_open(self):
+        return self.config.opens_at is None or self.now() >= self.config.opens_at
+
+
+class PortalRequestHandler(BaseHTTPRequestHandler):
+    server_version = "MockSESS/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        logging.debug("mock portal: " + format, *args)
+
+    def date_time_string(self, timestamp=None):
+        # The Date header follows the (possibly skewed) server clock.
+        return formatdate(self.state.now() if timestamp is None else timestamp, usegmt=True)
+
+    # --- Helpers ---
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-store")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def _json(self, data, status=200):
+        self._send(status, json.dumps(data, ensure_ascii=False), "application/json; charset=utf-8")
+
+    def _redirect(self, location, headers=None):
+        headers = dict(headers or {})
+        headers["Location"] = location
+        self._send(302, "", headers=headers)
+
+    def _page(self, title, body):
+        cfg = self.state.config
+        client_cfg = json.dumps({"toastDelay": int(cfg.toast_delay * 1000),
+                                 "toastLifetime": int(cfg.toast_lifetime * 1000)})
+        if cfg.page_delay:
+            time.sleep(cfg.page_delay)
+        assets = ""
+        if cfg.asset_count:
+            assets = ('<link rel="stylesheet" href="/static/site.css">'
+                      '<script src="/static/analytics.js"></script>'
+                      + "".join(f'<link rel="preload" as="image" href="/static/banner{i}.png">'
+                                for i in range(cfg.asset_count)))
+            body = "".join(f'<img src="/static/banner{i}.png" alt="">' for i in range(cfg.asset_count)) + body
+        self._send(200, PAGE_TEMPLATE.format(title=title, assets=assets, body=body, config=client_cfg,
+                                             script=PORTAL_JS))
+
+    def _form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length).decode("utf-8") if length else ""
+        return {k: v[0] for k, v in parse_qs(raw, keep_blank_values=True).items()}
+
+    def _session(self):
+        """Returns (session id, session dict) for a live session, or (None, None)."""
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        if "SESSID" not in cookie:
+            return None, None
+        sid = cookie["SESSID"].value
+        ttl = self.state.config.session_ttl
+        with self.state.lock:
+            session = self.state.sessions.get(sid)
+            if session is None:
+                return None, None
+            if ttl is not None and time.time() - session["last_seen"] > ttl:
+                del self.state.sessions[sid]
+                return None, None
+            session["last_seen"] = time.time()
+            return sid, session
+
+    def _api_gate(self):
+        """Applies the API delay and error rate. Returns the session or None if a reply was sent."""
+        cfg = self.state.config
+        if cfg.api_delay:
+            time.sleep(cfg.api_delay)
+        _, session = self._session()
+        if session is None:
+            self._json({"ok": False, "message": "", "expired": True}, status=401)
+            return None
+        if cfg.error_rate and random.random() < cfg.error_rate:
+            self._json({"ok": False, "message": MSG_SERVER_ERROR}, status=500)
+            return None
+        return session
+
+    # --- Routing ---
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/":
+            self._page("ورود", LOGIN_BODY.format(error=""))
+        elif path == "/home":
+            if self._session()[1] is None:
+                return self._redirect("/")
+            self._page("سامانه آموزشی", HOME_BODY)
+        elif path == "/register":
+            _, session = self._session()
+            if session is None:
+                return self._redirect("/")
+            if not self.state.is_open():
+                return self._redirect("/home")
+            self._page("عملیات ثبت نام", self._register_body(session))
+        elif path == "/api/groups":
+            self._api_groups()
+        elif path.startswith("/static/"):
+            self._static(path)
+        else:
+            self._send(404, "not found", "text/plain; charset=utf-8")
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        if path == "/":
+            self._login()
+        elif path == "/api/enter":
+            self._api_enter()
+        elif path == "/api/addcourse":
+            self._api_add_course()
+        elif path == "/api/checkcourse":
+            self._api_check_course()
+        else:
+            self._send(404, "not found", "text/plain; charset=utf-8")
+
+    # --- Pages ---
+
+    def _login(self):
+        form = self._form()
+        username, password = form.get("edId", ""), form.get("edPass", "")
+        accounts = self.state.config.accounts
+        valid = username and password and (not accounts or accounts.get(username) == password)
+        if not valid:
+            return self._page("ورود", LOGIN_BODY.format(error="نام کاربری یا رمز عبور اشتباه است"))
+        sid = secrets.token_hex(16)
+        with self.state.lock:
+            self.state.sessions[sid] = {"username": username, "last_seen": time.time(),
+                                        "token": secrets.token_hex(16)}
+            self.state.registered.setdefault(username, {})
+        self.state.record("login", username=username)
+        self._redirect("/home", {"Set-Cookie": f"SESSID={sid}; Path=/; HttpOnly"})
+
+    def _register_body(self, session):
+        state = self.state
+        registered = state.registered[session["username"]]
+        course_rows, group_rows, registered_rows = [], [], []
+        for course_id, course in state.config.courses.items():
+            if course_id in registered:
+                group = registered[course_id]
+                registered_rows.append(
+                    f'<tr data-crs="{course_id}" data-ident="{state.ident(course_id, group)}">'
+                    f'<td>{course_id}</td><td class="crs-credits">{course["credits"]}</td>'
+                    f'<td class="crs-time">{escape(group.get("times", ""))}</td></tr>')
+                continue
+            course_rows.append(
+                f'<tr><td class="label-link" addnewcrs="{course_id}">{escape(course["name"])}</td>'
+                f'<td class="crs-credits">{course["credits"]}</td></tr>')
+            for group in course["groups"]:
+                ident = state.ident(course_id, group)
+                group_rows.append(
+                    f'<tr ident="{ident}" data-crs="{course_id}" style="display:none">'
+                    f'<td>{group["group"]}</td><td>{group.get("sub", "0")}</td>'
+                    f'<td class="crs-time">{escape(group.get("times", ""))}</td>'
+                    f'<td class="crs-capacity">{state.enrolled[ident]}/{group["capacity"]}</td></tr>')
+        return f"""<input type="hidden" name="__RequestVerificationToken" value="{session['token']}">
+<div id="maxCredits">حداکثر واحد مجاز: <span id="lblMaxCredits">{state.config.max_credits}</span></div>
+<table id="offeredCourses"><tbody>{''.join(course_rows)}</tbody></table>
+<table id="courseGroups"><tbody>{''.join(group_rows)}</tbody></table>
+<table id="registeredCourses"><tbody>{''.join(registered_rows)}</tbody></table>
+<div id="courseChecker">
+  <input type="text" id="edCrsCode">
+  <input type="button" id="btnCheckCrs" value="بررسی">
+  <span id="lblCheckResult"></span>
+</div>"""
+
+    def _static(self, path):
+        """Serves the page assets: slow, and useless to the bot."""
+        if self.state.config.asset_delay:
+            time.sleep(self.state.config.asset_delay)
+        if path.endswith(".css"):
+            self._send(200, "@font-face{font-family:Vazir;src:url(/static/vazir.woff2)}"
+                            "body{font-family:Vazir,sans-serif}", "text/css")
+        elif path.endswith(".js"):
+            self._send(200, "window.analyticsLoaded = true;", "application/javascript")
+        else:
+            # Placeholder bytes; browsers only need the request to complete
+            kind = "font/woff2" if path.endswith(".woff2") else "image/png"
+            self._send(200, "\0" * 2048, kind)
+
+    # --- API ---
+
+    def _api_enter(self):
+        session = self._api_gate()
+        if session is None:
+            return
+        if self.state.config.evaluation_incomplete:
+            return self._json({"ok": False, "message": MSG_EVALUATION_INCOMPLETE + ": 190131034"})
+        if not self.state.is_open():
+            return self._json({"ok": False, "message": MSG_NOT_ACTIVE})
+        self.state.record("enter", username=session["username"])
+        self._json({"ok": True, "message": ""})
+
+    def _api_groups(self):
+        session = self._api_gate()
+        if session is None:
+            return
+        course_id = parse_qs(urlsplit(self.path).query).get("crs", [""])[0]
+        if course_id in self.state.config.not_allowed:
+            return self._json({"ok": False, "message": MSG_NOT_ALLOWED})
+        self._json({"ok": course_id in self.state.config.courses, "message": ""})
+
+    def _api_add_course(self):
+        session = self._api_gate()
+        if session is None:
+            return
+        form = self._form()
+        if form.get("__RequestVerificationToken") != session["token"]:
+            return self._json({"ok": False, "message": MSG_SERVER_ERROR}, status=400)
+        ok, message, ident, group = self._register(session["username"], form.get("ident", ""))
+        if ok:
+            course_id = self.state.groups[ident][0]
+            self._json({"ok": True, "message": message, "ident": ident,
+                        "credits": self.state.config.courses[course_id]["credits"],
+                        "times": group.get("times", "")})
+        else:
+            self._json({"ok": False, "message": message})
+
+    def _register(self, username, ident):
+        """Applies the registration rules for one group. Returns (ok, message, ident, group)."""
+        state = self.state
+        if not state.is_open():
+            return False, MSG_NOT_ACTIVE, ident, None
+        if ident not in state.groups:
+            return False, MSG_SERVER_ERROR, ident, None
+        course_id, group = state.groups[ident]
+        course = state.config.courses[course_id]
+        with state.lock:
+            registered = state.registered[username]
+            if course_id in state.config.not_allowed:
+                return False, MSG_NOT_ALLOWED, ident, group
+            if course_id in registered:
+                return False, MSG_ALREADY_REGISTERED, ident, group
+            taken = sum(state.config.courses[c]["credits"] for c in registered)
+            if taken + course["credits"] > state.config.max_credits:
+                return False, MSG_CREDIT_LIMIT, ident, group
+            for other_id, other_group in registered.items():
+                if _times_overlap(group.get("times", ""), other_group.get("times", "")):
+                    return False, MSG_CONFLICT.format(other=other_id), ident, group
+            if state.enrolled[ident] >= group["capacity"]:
+                return False, MSG_CAPACITY_FULL, ident, group
+            state.enrolled[ident] += 1
+            registered[course_id] = group
+        state.record("registered", username=username, course=course_id, ident=ident)
+        return True, MSG_SUCCESS, ident, group
+
+    def _api_check_course(self):
+        session = self._api_gate()
+        if session is None:
+            return
+        course_id = self._form().get("crs", "").strip()
+        cfg = self.state.config
+        if course_id in cfg.hidden_courses:
+            message = cfg.hidden_courses[course_id]
+        elif course_id in cfg.courses:
+            message = MSG_CHECK_OK.format(course=course_id)
+        else:
+            message = MSG_NOT_OFFERED.format(course=course_id)
+        self._json({"ok": True, "message": message})
+
+
+def _parse_times(times):
+    """Parses "شنبه 08:00-10:00، دوشنبه 08:00-09:00" into (day, start, end) minute tuples."""
+    slots = []
+    for part in times.replace("،", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        day, _, span = part.rpartition(" ")
+        start, _, end = span.partition("-")
+        to_minutes = lambda hm: int(hm.split(":")[0]) * 60 + int(hm.split(":")[1])
+        slots.append((day.strip(), to_minutes(start), to_minutes(end)))
+    return slots
+
+
+def _times_overlap(first, second):
+    return any(d1 == d2 and s1 < e2 and s2 < e1
+               for d1, s1, e1 in _parse_times(first)
+               for d2, s2, e2 in _parse_times(second))
+
+
+class MockPortal:
+    """Runs the stand-in portal on a background thread."""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or PortalConfig()
+        self.state = PortalState(self.config)
+        self.httpd = ThreadingHTTPServer((host, port), PortalRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def events(self, kind=None):
+        with self.state.lock:
+            return [e for e in self.state.events if kind is None or e[1] == kind]
+
+    def expire_sessions(self):
+        """Ends every session, as the portal does after its idle timeout."""
+        with self.state.lock:
+            self.state.sessions.clear()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the SESS portal.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--config", help="JSON scenario file with PortalConfig fields")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%H:%M:%S')
+    config = PortalConfig.from_file(args.config) if args.config else PortalConfig()
+    portal = MockPortal(config, args.host, args.port)
+    logging.info(f"🧪 Mock SESS portal listening on {portal.url}")
+    try:
+        portal.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        portal.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+"""
+Serves a recorded portal session (see automation.recorder) back to the bot.
+
+The login, home and registration pages are the recorded snapshots, each served
+after its recorded load time. Clicks go through the mock portal's page script
+(tools.mock_portal.PORTAL_JS), and its API calls are answered with the recorded
+messages, in the recorded order and after the recorded wait: the n-th click on a
+course gets the answer its n-th recorded click got. Once a step's answers run
+out, its last answer repeats. Every login starts the recording over.
+
+    RECORD_SESSION=recording python main.py --cli       # on a registration day
+    python -m tools.replay_server recording --port 8800  # any day after
+    python -m tools.benchmark --replay recording --headless
+"""
+
+import argparse
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from automation.messages import Outcome, classifier
+from automation.recorder import RECORDING_FILE
+from tools.mock_portal import PORTAL_JS
+
+# Makes the recorded pages work without their own scripts: the login button posts the
+# form, and recorded group rows are added (hidden) for PORTAL_JS to show on a course click
+REPLAY_JS = r"""
+(function () {
+  document.addEventListener('click', function (ev) {
+    if (!ev.target.closest('#edEnter')) { return; }
+    ev.preventDefault();
+    var form = document.createElement('form');
+    form.method = 'post';
+    form.action = '/';
+    ['edId', 'edPass'].forEach(function (name) {
+      var input = document.createElement('input');
+      input.name = name;
+      input.value = (document.getElementById(name) || document.getElementsByName(name)[0] || {}).value || '';
+      form.appendChild(input);
+    });
+    document.body.appendChild(form);
+    form.submit();
+  }, true);
+
+  var rows = window.REPLAY_GROUP_ROWS || {};
+  var table = document.createElement('table');
+  table.id = 'replayGroups';
+  var body = document.createElement('tbody');
+  table.appendChild(body);
+  Object.keys(rows).forEach(function (crs) {
+    rows[crs].forEach(function (html) {
+      var holder = document.createElement('tbody');
+      holder.innerHTML = html;
+      var row = holder.querySelector('tr[ident]');
+      if (row && !document.querySelector('tr[ident="' + row.getAttribute('ident') + '"]')) {
+        row.style.display = 'none';
+        body.appendChild(row);
+      }
+    });
+  });
+  if (body.children.length) { document.body.appendChild(table); }
+  document.querySelectorAll('tr[ident]').forEach(function (row) {
+    var parts = row.getAttribute('ident').split(':');
+    if (parts.length > 1 && !row.hasAttribute('data-crs')) { row.setAttribute('data-crs', parts[1]); }
+  });
+})();
+"""
+
+PAGE_SCRIPTS = """<script>window.PORTAL_CONFIG = {{toastDelay: 0, toastLifetime: 4000}};
+window.REPLAY_GROUP_ROWS = {rows};</script>
+<script>{portal}</script>
+<script>{replay}</script>
+"""
+
+
+class Recording:
+    """A recording read from disk, with its answers grouped by what they answer."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, RECORDING_FILE), encoding='utf-8') as f:
+            data = json.load(f)
+        self.recorded_at = data.get("recorded_at")
+        self.pages = {}
+        for snapshot in data["snapshots"]:
+            with open(os.path.join(path, snapshot["file"]), encoding='utf-8') as f:
+                self.pages[snapshot["step"]] = (f.read(), snapshot.get("page_load_s") or 0.0)
+        self.group_rows = data.get("group_rows", {})
+        self.checks = data.get("checks", {})
+
+        # (message or None, seconds) in recorded order, per step and subject
+        self.answers = {}
+        for step in data["steps"]:
+            if step["name"] == "navigate.message_wait":
+                messages = step.get("messages") or []
+                key, message = ("enter",), messages[0] if messages else None
+            elif step["name"] == "course.message_wait":
+                key, message = ("course", step.get("course")), step.get("message")
+            elif step["name"] == "group.message_wait":
+                key, message = ("group", step.get("ident")), step.get("message")
+            else:
+                continue
+            self.answers.setdefault(key, []).append((message, step["duration"]))
+
+    def plan(self):
+        """ The courses the recorded run tried, as a COURSES string, and their semester. """
+        entries, semester = {}, None
+        for key in self.answers:
+            if key[0] == "group" and key[1] and key[1].count(':') >= 3:
+                semester, course_id, group, sub = key[1].split(':')[:4]
+                entries.setdefault(course_id, f"{course_id}:{group}:{sub}")
+        return ','.join(entries.values()), semester
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+    server_version = "ReplaySESS/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def portal(self):
+        return self.server.portal
+
+    def log_message(self, format, *args):
+        logging.debug("replay portal: " + format, *args)
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-store")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    def _json(self, data):
+        self._send(200, json.dumps(data, ensure_ascii=False), "application/json; charset=utf-8")
+
+    def _page(self, step):
+        if step not in self.portal.recording.pages:
+            return self._send(404, f"no '{step}' page in the recording", "text/plain; charset=utf-8")
+        html, load_time = self.portal.recording.pages[step]
+        self.portal.sleep(load_time)
+        rows = json.dumps(self.portal.recording.group_rows if step == "registration" else {}, ensure_ascii=False)
+        # The rows' HTML sits inside a <script>: keep a "</" in it from closing the tag
+        scripts = PAGE_SCRIPTS.format(rows=rows.replace("</", "<\\/"), portal=PORTAL_JS, replay=REPLAY_JS)
+        head, tag, tail = html.rpartition("</body>")
+        self._send(200, head + scripts + tag + tail if tag else html + scripts)
+
+    def _form(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length).decode("utf-8") if length else ""
+        return {k: v[0] for k, v in parse_qs(raw, keep_blank_values=True).items()}
+
+    def _session(self):
+        for part in self.headers.get("Cookie", "").split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == "SESSID":
+                return self.portal.sessions.get(value)
+        return None
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/":
+            self._page("login")
+        elif url.path == "/home":
+            self._page("home")
+        elif url.path == "/register":
+            self._page("registration")
+        elif url.path == "/api/groups":
+            course_id = parse_qs(url.query).get("crs", [""])[0]
+            message = self.portal.answer(self._session(), ("course", course_id))
+            self._json({"ok": message is None, "message": message or ""})
+        else:
+            self._send(404, "not found", "text/plain; charset=utf-8")
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        form = self._form()
+        if path == "/":
+            sid = self.portal.log_in(form.get("edId", ""))
+            self.send_response(302)
+            self.send_header("Location", "/home")
+            self.send_header("Set-Cookie", f"SESSID={sid}; Path=/; HttpOnly")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif path == "/api/enter":
+            message = self.portal.answer(self._session(), ("enter",))
+            self._json({"ok": message is None, "message": message or ""})
+        elif path == "/api/addcourse":
+            ident = form.get("ident", "")
+            session = self._session()
+            message = self.portal.answer(session, ("group", ident))
+            ok = message is not None and classifier.classify(message).outcome is Outcome.REGISTERED
+            if ok:
+                self.portal.record("registered", username=(session or {}).get("username"),
+                                   course=ident.split(':')[1] if ':' in ident else ident, ident=ident)
+            self._json({"ok": ok, "message": message or "", "ident": ident, "credits": "", "times": ""})
+        elif path == "/api/checkcourse":
+            self._json({"ok": True, "message": self.portal.recording.checks.get(form.get("crs", "").strip(), "")})
+        else:
+            self._send(404, "not found", "text/plain; charset=utf-8")
+
+
+class ReplayPortal:
+    """Runs a recorded session as a portal on a background thread; used like tools.mock_portal.MockPortal."""
+
+    def __init__(self, recording_dir, speed=1.0, host="127.0.0.1", port=0):
+        self.recording = Recording(recording_dir)
+        # 2.0 replays twice as fast as recorded; 0 answers without any delay
+        self.speed = speed
+        self.sessions = {}
+        self._events = []
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), ReplayRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.portal = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def sleep(self, seconds):
+        if self.speed and seconds:
+            time.sleep(seconds / self.speed)
+
+    def log_in(self, username):
+        sid = secrets.token_hex(16)
+        with self.lock:
+            self.sessions[sid] = {"username": username, "replayed": {}}
+        self.record("login", username=username)
+        return sid
+
+    def answer(self, session, key):
+        """ Waits as long as the recorded step took, then returns its recorded message (None: no message). """
+        answers = self.recording.answers.get(key)
+        if not answers:
+            return None
+        with self.lock:
+            replayed = session["replayed"] if session is not None else {}
+            index = replayed.get(key, 0)
+            replayed[key] = index + 1
+        message, duration = answers[min(index, len(answers) - 1)]
+        self.sleep(duration)
+        return message
+
+    def record(self, kind, **data):
+        with self.lock:
+            self._events.append((time.time(), kind, data))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def events(self, kind=None):
+        with self.lock:
+            return [e for e in self._events if kind is None or e[1] == kind]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a recorded SESS session back with its original timing.")
+    parser.add_argument("recording", help="directory written by RECORD_SESSION")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed (2 = twice as fast, 0 = no delays)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
+                        datefmt='%H:%M:%S')
+    portal = ReplayPortal(args.recording, args.speed, args.host, args.port)
+    courses, semester = portal.recording.plan()
+    logging.info(f"📼 Replaying the session recorded {portal.recording.recorded_at} on {portal.url}")
+    logging.info(f"📼 Recorded plan: SEMESTER={semester} COURSES={courses}")
+    try:
+        portal.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        portal.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()